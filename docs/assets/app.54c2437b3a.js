@@ -0,0 +1,1520 @@
+const STORAGE_KEY = "sms-learning-progress-v1";
+const QUIZ_PAGE_SIZE = 10;
+// Windowed lists ("全部显示" in the quiz, long knowledge results) only keep the
+// cards within VIRTUAL_OVERSCAN px of the viewport in the DOM; unmeasured cards
+// are assumed VIRTUAL_ESTIMATE px tall.
+const KNOWLEDGE_VIRTUAL_MIN = 100;
+const VIRTUAL_OVERSCAN = 800;
+const VIRTUAL_ESTIMATE = 240;
+const VIRTUAL_MAX_CARDS = 60;
+
+const TYPE_LABEL = {
+  single: "单选",
+  multiple: "多选",
+  truefalse: "判断",
+  short: "场景/简答",
+  flash: "闪卡",
+};
+
+// Searchable text per field; names match the fields of assets/search-index.json.
+const SEARCH_FIELDS = {
+  knowledge: {
+    title: (item) => item.title,
+    chapter: (item) => item.chapter,
+    tags: (item) => (item.tags || []).join(" "),
+    content: (item) => item.content,
+  },
+  questions: {
+    id: (q) => q.id,
+    stem: (q) => q.stem,
+    options: (q) => (q.options || []).join(" "),
+    explanation: (q) => q.explanation || "",
+    tags: (q) => (q.tags || []).join(" "),
+    source: (q) => q.source,
+    type: (q) => TYPE_LABEL[q.qtype] || q.qtype,
+  },
+};
+
+// Field weights used until the search index has loaded (the index carries its own).
+const SEARCH_WEIGHTS = {
+  knowledge: [["title", 7], ["chapter", 3], ["tags", 4], ["content", 1]],
+  questions: [["id", 5], ["stem", 7], ["options", 5], ["explanation", 3], ["tags", 4], ["source", 2], ["type", 1]],
+};
+
+// Used when the page names no manifest; shards and the search index are
+// resolved against the directory of whichever manifest is loaded.
+const DEFAULT_MANIFEST = "assets/data/manifest.json";
+
+const state = {
+  manifest: null,
+  data: null,
+  ui: {
+    tab: "knowledge",
+    knowledgeSearch: "",
+    knowledgeTag: "全部",
+    quizSource: "全部来源",
+    quizType: "全部题型",
+    quizSearch: "",
+    docSearch: "",
+    quizWrongOnly: false,
+    quizShowAll: false,
+    quizPage: 1,
+  },
+  progress: {
+    records: {},
+  },
+  dataDir: null,
+  searchIndex: null,
+  searchIndexRequest: null,
+  shards: new Map(),
+  ready: false,
+  // Keyed views of the card lists, by container (see patchCards).
+  views: new Map(),
+  windowFrame: 0,
+  cache: {
+    allTags: [],
+    postings: { knowledge: new Map(), questions: new Map() },
+    gramKeys: { knowledge: null, questions: null },
+    search: {
+      knowledge: { query: [], tokens: [], loose: false },
+      questions: { query: [], tokens: [], loose: false },
+    },
+  },
+};
+
+function $(selector) {
+  return document.querySelector(selector);
+}
+
+function $all(selector) {
+  return Array.from(document.querySelectorAll(selector));
+}
+
+function escapeHtml(input = "") {
+  return String(input)
+    .replaceAll("&", "&amp;")
+    .replaceAll("<", "&lt;")
+    .replaceAll(">", "&gt;")
+    .replaceAll('"', "&quot;")
+    .replaceAll("'", "&#39;");
+}
+
+function normalize(text = "") {
+  return String(text).trim().toLowerCase();
+}
+
+function escapeRegExp(input = "") {
+  return String(input).replace(/[.*+?^${}()|[\]\\]/g, "\\$&");
+}
+
+function getSearchTokens(raw = "") {
+  return Array.from(
+    new Set(
+      String(raw)
+        .trim()
+        .split(/\s+/)
+        .map((x) => normalize(x))
+        .filter(Boolean)
+    )
+  );
+}
+
+function scoreField(text = "", tokens = []) {
+  if (!tokens.length) return 0;
+  return scoreBlob(normalize(text), tokens);
+}
+
+// Same as scoreField for text that is already normalized.
+function scoreBlob(blob, tokens) {
+  if (!blob) return 0;
+
+  return tokens.reduce((score, token) => {
+    if (!token || !blob.includes(token)) return score;
+    const count = blob.split(token).length - 1;
+    let delta = 8 + Math.min(count, 4) * 2;
+    if (blob === token) delta += 24;
+    else if (blob.startsWith(token)) delta += 8;
+    return score + delta;
+  }, 0);
+}
+
+function highlightText(text = "", tokens = []) {
+  const raw = String(text);
+  if (!tokens.length) return escapeHtml(raw);
+
+  const pattern = new RegExp(`(${tokens.map((t) => escapeRegExp(t)).join("|")})`, "gi");
+  const parts = raw.split(pattern);
+  if (parts.length <= 1) return escapeHtml(raw);
+
+  return parts
+    .map((part, idx) => (idx % 2 === 1 ? `<mark class="search-hit">${escapeHtml(part)}</mark>` : escapeHtml(part)))
+    .join("");
+}
+
+function letterAt(index) {
+  return String.fromCharCode(65 + index);
+}
+
+function toPercent(numerator, denominator) {
+  if (!denominator) return "0%";
+  return `${Math.round((numerator / denominator) * 100)}%`;
+}
+
+function isObjective(q) {
+  return q.qtype === "single" || q.qtype === "multiple" || q.qtype === "truefalse";
+}
+
+function isAutoJudgeObjective(q) {
+  return q.qtype === "single" || q.qtype === "truefalse";
+}
+
+function parseAnswerLetters(answer) {
+  if (Array.isArray(answer)) {
+    return answer.map((x) => String(x).trim().toUpperCase()).filter(Boolean);
+  }
+  const raw = String(answer || "").trim();
+  if (!raw) return [];
+  return raw
+    .toUpperCase()
+    .replace(/[^A-Z]/g, "")
+    .split("")
+    .filter((ch, idx, arr) => idx === arr.indexOf(ch));
+}
+
+function deriveCorrectLetters(q) {
+  // Precomputed by the compact wire format; callers may sort the result.
+  if (q.correctLetters) return [...q.correctLetters];
+  if (!q.options || !q.options.length) return [];
+  if (q.qtype === "single" || q.qtype === "multiple") {
+    const direct = parseAnswerLetters(q.answer);
+    if (direct.length) return direct;
+
+    const ans = normalize(q.answer);
+    const idx = q.options.findIndex((opt) => normalize(opt) === ans);
+    return idx >= 0 ? [letterAt(idx)] : [];
+  }
+
+  if (q.qtype === "truefalse") {
+    const ans = String(q.answer || "").trim();
+    if (/^[A-Z]$/i.test(ans)) return [ans.toUpperCase()];
+    const idx = q.options.findIndex((opt) => String(opt).trim() === ans);
+    return idx >= 0 ? [letterAt(idx)] : [];
+  }
+
+  return [];
+}
+
+function uniqueSorted(arr) {
+  return Array.from(new Set(arr)).sort((a, b) => a.localeCompare(b, "zh-Hans-CN"));
+}
+
+function getRecord(qid) {
+  return state.progress.records[qid] || null;
+}
+
+function upsertRecord(qid, patch) {
+  const prev = state.progress.records[qid] || {};
+  state.progress.records[qid] = {
+    ...prev,
+    ...patch,
+    updatedAt: Date.now(),
+  };
+  persistProgress();
+}
+
+function persistProgress() {
+  localStorage.setItem(STORAGE_KEY, JSON.stringify(state.progress));
+}
+
+function loadProgress() {
+  const raw = localStorage.getItem(STORAGE_KEY);
+  if (!raw) return;
+  try {
+    const parsed = JSON.parse(raw);
+    if (parsed && typeof parsed === "object" && parsed.records) {
+      state.progress = parsed;
+    }
+  } catch {
+    // ignore invalid local storage
+  }
+}
+
+function resetProgress() {
+  state.progress = { records: {} };
+  persistProgress();
+  renderAll();
+}
+
+function setTab(tabName) {
+  state.ui.tab = tabName;
+  requestShards(getNeededShards());
+  $all(".tab").forEach((btn) => {
+    btn.classList.toggle("is-active", btn.dataset.tab === tabName);
+  });
+  $all(".tab-pane").forEach((pane) => {
+    pane.classList.toggle("is-active", pane.dataset.pane === tabName);
+  });
+  // Windowed lists rendered while hidden could not measure their cards.
+  scheduleWindowUpdate();
+}
+
+function getAllTags() {
+  if (state.cache.allTags.length) return state.cache.allTags;
+  state.cache.allTags = uniqueSorted(state.manifest.tags);
+  return state.cache.allTags;
+}
+
+function formatKnowledgeContent(raw = "", tokens = []) {
+  const lines = raw.split(/\n+/).map((x) => x.trim()).filter(Boolean);
+  if (!lines.length) return "<p class=\"hint\">暂无内容。</p>";
+
+  const bullets = lines.filter((line) => /^[-*]\s+/.test(line));
+  if (bullets.length >= Math.ceil(lines.length / 2)) {
+    const items = bullets
+      .map((line) => line.replace(/^[-*]\s+/, "").trim())
+      .map((line) => `<li>${highlightText(line, tokens)}</li>`)
+      .join("");
+    return `<ul class=\"compact-list\">${items}</ul>`;
+  }
+
+  return `<p>${highlightText(lines.join("\n"), tokens).replace(/\n/g, "<br />")}</p>`;
+}
+
+function getPostings(kind, gram) {
+  const cache = state.cache.postings[kind];
+  if (cache.has(gram)) return cache.get(gram);
+  const deltas = state.searchIndex[kind].postings[gram] || [];
+  const postings = new Array(deltas.length);
+  let prev = 0;
+  deltas.forEach((delta, i) => {
+    prev += delta;
+    postings[i] = prev;
+  });
+  cache.set(gram, postings);
+  return postings;
+}
+
+function intersectSorted(a, b) {
+  const out = [];
+  let i = 0;
+  let j = 0;
+  while (i < a.length && j < b.length) {
+    if (a[i] === b[j]) {
+      out.push(a[i]);
+      i += 1;
+      j += 1;
+    } else if (a[i] < b[j]) {
+      i += 1;
+    } else {
+      j += 1;
+    }
+  }
+  return out;
+}
+
+function getTokenPostings(kind, token) {
+  const chars = Array.from(token);
+  if (chars.length === 1) {
+    // Every occurrence of a character sits in a bigram or in a one-character run.
+    if (!state.cache.gramKeys[kind]) state.cache.gramKeys[kind] = Object.keys(state.searchIndex[kind].postings);
+    const merged = new Set();
+    state.cache.gramKeys[kind]
+      .filter((gram) => gram.includes(token))
+      .forEach((gram) => getPostings(kind, gram).forEach((p) => merged.add(p)));
+    return Array.from(merged);
+  }
+
+  const grams = new Set();
+  for (let i = 0; i < chars.length - 1; i += 1) grams.add(chars[i] + chars[i + 1]);
+  const lists = Array.from(grams, (gram) => getPostings(kind, gram)).sort((a, b) => a.length - b.length);
+  return lists.reduce((acc, list) => (acc.length ? intersectSorted(acc, list) : acc));
+}
+
+// Items whose fields may contain a token, as index -> bitmask of those fields.
+function getSearchCandidates(kind, tokens) {
+  const section = state.searchIndex?.[kind];
+  if (!section || section.count !== state.data[kind].length) return null;
+
+  const width = section.fields.length;
+  // Fields without postings are scored on every item.
+  const scanned = (section.scan || []).reduce((mask, f) => mask | (1 << f), 0);
+  const candidates = new Map();
+  if (scanned) state.data[kind].forEach((_, index) => candidates.set(index, scanned));
+  tokens.forEach((token) => {
+    getTokenPostings(kind, token).forEach((posting) => {
+      const index = Math.floor(posting / width);
+      candidates.set(index, (candidates.get(index) || 0) | (1 << posting % width));
+    });
+  });
+  return candidates;
+}
+
+function rankSearch(kind, tokens, accept) {
+  const items = state.data[kind];
+  const getters = SEARCH_FIELDS[kind];
+  const candidates = getSearchCandidates(kind, tokens);
+  const fields = candidates ? state.searchIndex[kind].fields : SEARCH_WEIGHTS[kind];
+  const entries = candidates ? Array.from(candidates) : items.map((_, index) => [index, -1]);
+  // Normalized field text from the compact index; a missing entry means the raw text is already normalized.
+  const blobs = candidates ? state.searchIndex[kind].search : null;
+
+  const fieldScore = (item, index, name, f) => {
+    if (!blobs) return scoreField(getters[name](item), tokens);
+    return scoreBlob(blobs[index]?.[f] ?? getters[name](item), tokens);
+  };
+
+  return entries
+    .filter(([index]) => items[index] && accept(items[index]))
+    .map(([index, mask]) => {
+      const item = items[index];
+      const score = fields.reduce(
+        (sum, [name, weight], f) => (mask & (1 << f) ? sum + fieldScore(item, index, name, f) * weight : sum),
+        0
+      );
+      return { item, index, score };
+    })
+    .filter((x) => x.score > 0)
+    .sort((a, b) => b.score - a.score || a.index - b.index)
+    .map(({ item }) => item);
+}
+
+// Splits long space-free tokens (typical for Chinese queries) into bigrams.
+function getLooseTokens(tokens) {
+  const loose = new Set();
+  let split = false;
+  tokens.forEach((token) => {
+    const chars = Array.from(token);
+    if (chars.length < 3) {
+      loose.add(token);
+      return;
+    }
+    split = true;
+    for (let i = 0; i < chars.length - 1; i += 1) loose.add(chars[i] + chars[i + 1]);
+  });
+  return split ? Array.from(loose) : [];
+}
+
+function searchItems(kind, raw, accept) {
+  const tokens = getSearchTokens(raw);
+  const search = state.cache.search[kind];
+  search.query = tokens;
+  search.tokens = tokens;
+  search.loose = false;
+  if (!tokens.length) return state.data[kind].filter(accept);
+
+  const ranked = rankSearch(kind, tokens, accept);
+  if (ranked.length) return ranked;
+
+  const loose = getLooseTokens(tokens);
+  if (!loose.length) return ranked;
+  search.tokens = loose;
+  search.loose = true;
+  return rankSearch(kind, loose, accept);
+}
+
+function getKnowledgeFiltered() {
+  const tag = state.ui.knowledgeTag;
+  return searchItems("knowledge", state.ui.knowledgeSearch, (item) => tag === "全部" || (item.tags || []).includes(tag));
+}
+
+function getQuizFiltered() {
+  const source = state.ui.quizSource;
+  const qtype = state.ui.quizType;
+
+  return searchItems("questions", state.ui.quizSearch, (q) => {
+    if (source !== "全部来源" && q.source !== source) return false;
+    if (qtype !== "全部题型" && q.qtype !== qtype) return false;
+
+    if (state.ui.quizWrongOnly) {
+      const rec = getRecord(q.id);
+      if (!rec || rec.correct !== false) return false;
+    }
+
+    return true;
+  });
+}
+
+function getDocFiltered() {
+  const tokens = getSearchTokens(state.ui.docSearch);
+  const docs = state.data.documents || [];
+  if (!tokens.length) return docs;
+
+  return docs
+    .map((doc, index) => {
+      const score =
+        scoreField(doc.title || "", tokens) * 7 +
+        scoreField(doc.desc || "", tokens) * 3 +
+        scoreField(doc.id || "", tokens) * 2;
+      return { doc, index, score };
+    })
+    .filter((x) => x.score > 0)
+    .sort((a, b) => b.score - a.score || a.index - b.index)
+    .map(({ doc }) => doc);
+}
+
+function formatObjectiveAnswerText(q, letters) {
+  if (!letters || !letters.length) return "未作答";
+  const list = letters.map((letter) => {
+    const idx = letter.charCodeAt(0) - 65;
+    const text = q.options?.[idx] || "";
+    return `${letter}. ${text}`;
+  });
+  return list.join("；");
+}
+
+function getSubjectiveReference(q) {
+  const direct = String(q.answer || "").trim();
+  const fallback = String(q.explanation || "").trim();
+  return direct || fallback || "（暂无参考答案）";
+}
+
+function setHtml(el, html) {
+  // Small panels are rebuilt from strings; an identical string leaves the DOM alone.
+  const view = state.views.get(el);
+  if (view?.html === html) return;
+  el.innerHTML = html;
+  state.views.set(el, { ...view, html });
+}
+
+function getView(container) {
+  let view = state.views.get(container);
+  if (!view?.cards) {
+    view = { ...view, cards: new Map(), virtual: null };
+    state.views.set(container, view);
+  }
+  return view;
+}
+
+function createNode(html) {
+  const template = document.createElement("template");
+  template.innerHTML = html.trim();
+  return template.content.firstElementChild;
+}
+
+function patchCards(container, cards, start = container.firstChild, end = null) {
+  // Keyed update: cards are [key, html] pairs placed between start and end
+  // (exclusive). A card whose html is unchanged keeps its node, so answering
+  // one question rebuilds one card; the rest are only moved into order.
+  const view = getView(container);
+  const next = new Map();
+  let ref = start;
+  cards.forEach(([key, html]) => {
+    const entry = view.cards.get(key);
+    let kept = entry && entry.html === html ? entry : null;
+    // Never swap out a draft while it is being typed; it is rebuilt once it loses focus.
+    if (!kept && entry?.node.contains(document.activeElement) && document.activeElement.tagName === "TEXTAREA") kept = entry;
+    const node = kept ? kept.node : createNode(html);
+    if (entry && !kept) {
+      if (entry.node === ref) ref = ref.nextSibling;
+      entry.node.remove();
+    }
+    if (node === ref) ref = ref.nextSibling;
+    else container.insertBefore(node, ref);
+    next.set(key, kept || { html, node });
+  });
+  while (ref && ref !== end) {
+    const stale = ref;
+    ref = ref.nextSibling;
+    stale.remove();
+  }
+  view.cards = next;
+}
+
+function renderCardList(container, cards) {
+  const view = getView(container);
+  if (view.virtual) {
+    view.virtual = null;
+    container.classList.remove("is-virtual");
+  }
+  patchCards(container, cards);
+}
+
+function renderVirtualList(container, items, keyOf, render) {
+  // Windowed list: a top and a bottom spacer stand in for the cards outside
+  // the window, so the DOM size does not grow with the number of items.
+  const view = getView(container);
+  if (!view.virtual) {
+    const spacer = () => {
+      const el = document.createElement("div");
+      el.className = "virtual-spacer";
+      el.setAttribute("aria-hidden", "true");
+      return el;
+    };
+    view.virtual = { heights: new Map(), top: spacer(), bottom: spacer() };
+    container.classList.add("is-virtual");
+  }
+  Object.assign(view.virtual, { items, keyOf, render, range: null });
+  updateWindow(container);
+}
+
+function updateWindow(container, settle = true) {
+  const view = getView(container);
+  const virtual = view.virtual;
+  if (!virtual) return;
+  const { items, keyOf, heights, top, bottom } = virtual;
+  if (container.firstChild !== top) container.insertBefore(top, container.firstChild);
+  if (container.lastChild !== bottom) container.appendChild(bottom);
+
+  // Hidden lists (inactive tab) measure as zero; they render the first window.
+  const visible = container.offsetParent !== null;
+  const rect = container.getBoundingClientRect();
+  const viewTop = visible ? -rect.top - VIRTUAL_OVERSCAN : 0;
+  const viewBottom = visible ? window.innerHeight - rect.top + VIRTUAL_OVERSCAN : window.innerHeight;
+  const heightAt = (i) => heights.get(keyOf(items[i])) ?? VIRTUAL_ESTIMATE;
+
+  let offset = 0;
+  let first = 0;
+  while (first < items.length - 1 && offset + heightAt(first) < viewTop) offset += heightAt(first++);
+  const before = offset;
+  let last = first;
+  while (last < items.length && offset < viewBottom && last - first < VIRTUAL_MAX_CARDS) offset += heightAt(last++);
+  let after = 0;
+  for (let i = last; i < items.length; i += 1) after += heightAt(i);
+
+  if (virtual.measured && virtual.range && virtual.range[0] === first && virtual.range[1] === last) return;
+  virtual.range = [first, last];
+  virtual.measured = visible;
+  top.style.height = `${before}px`;
+  bottom.style.height = `${after}px`;
+  const windowItems = items.slice(first, last);
+  patchCards(
+    container,
+    windowItems.map((item) => [keyOf(item), virtual.render(item)]),
+    top.nextSibling,
+    bottom
+  );
+  if (!visible) return;
+
+  // Card heights (including the gap) from the distance to the next card.
+  let changed = false;
+  windowItems.forEach((item) => {
+    const key = keyOf(item);
+    const node = view.cards.get(key).node;
+    const height = node.nextSibling.getBoundingClientRect().top - node.getBoundingClientRect().top;
+    if (heights.get(key) !== height) {
+      heights.set(key, height);
+      changed = true;
+    }
+  });
+  if (changed && settle) {
+    virtual.range = null;
+    updateWindow(container, false);
+  }
+}
+
+function scheduleWindowUpdate() {
+  if (state.windowFrame) return;
+  state.windowFrame = requestAnimationFrame(() => {
+    state.windowFrame = 0;
+    state.views.forEach((view, container) => {
+      if (view.virtual) updateWindow(container);
+    });
+  });
+}
+
+function renderMetaStats() {
+  $("#statKnowledge").textContent = state.data.meta.knowledge_count;
+  $("#statQuestions").textContent = state.data.meta.question_count;
+  if (!allQuestionsLoaded()) {
+    $("#statAnswered").textContent = "…";
+    $("#statCorrectRate").textContent = "…";
+    return;
+  }
+
+  const objective = state.data.questions.filter(isObjective);
+  const answeredObjective = objective.filter((q) => {
+    const rec = getRecord(q.id);
+    return rec && Array.isArray(rec.userLetters) && rec.userLetters.length;
+  });
+  const correct = answeredObjective.filter((q) => getRecord(q.id)?.correct === true).length;
+
+  $("#statAnswered").textContent = `${answeredObjective.length}/${objective.length}`;
+  $("#statCorrectRate").textContent = toPercent(correct, answeredObjective.length);
+}
+
+function renderQuickTags() {
+  const allTags = getAllTags();
+  const holder = $("#quickTags");
+  holder.innerHTML = allTags
+    .map((tag) => `<button class=\"chip\" data-quick-tag=\"${escapeHtml(tag)}\">${escapeHtml(tag)}</button>`)
+    .join("");
+}
+
+function renderKnowledgeTags() {
+  const box = $("#knowledgeTags");
+  const tags = ["全部", ...getAllTags()];
+  box.innerHTML = tags
+    .map((tag) => {
+      const active = state.ui.knowledgeTag === tag ? " is-active" : "";
+      return `<button class=\"chip${active}\" data-knowledge-tag=\"${escapeHtml(tag)}\">${escapeHtml(tag)}</button>`;
+    })
+    .join("");
+}
+
+function countRelatedByTags(tags = []) {
+  if (!tags.length) return 0;
+  if (!allQuestionsLoaded()) return state.manifest.related[tags.join("|")] ?? "…";
+  return state.data.questions.filter((q) => (q.tags || []).some((tag) => tags.includes(tag))).length;
+}
+
+function renderKnowledgeList() {
+  const list = $("#knowledgeList");
+  const status = $("#knowledgeSearchStatus");
+  const filtered = getKnowledgeFiltered();
+  const { query, tokens, loose } = state.cache.search.knowledge;
+
+  if (status) {
+    if (tokens.length) {
+      status.textContent = `检索“${query.join(" ")}”：匹配 ${filtered.length} 条（${loose ? "无完整匹配，按词片近似排序" : "按相关度排序"}）。`;
+    } else if (state.ui.knowledgeTag !== "全部") {
+      status.textContent = `当前标签“${state.ui.knowledgeTag}”：共 ${filtered.length} 条。`;
+    } else {
+      status.textContent = "输入关键词后会按相关度排序。";
+    }
+  }
+
+  if (!filtered.length) {
+    renderCardList(list, [["empty", `<div class=\"panel\"><p class=\"hint\">没有匹配结果，建议清空筛选后重试。</p></div>`]]);
+    return;
+  }
+
+  const render = (item) => renderKnowledgeCard(item, tokens);
+  if (filtered.length >= KNOWLEDGE_VIRTUAL_MIN) {
+    renderVirtualList(list, filtered, (item) => item.id, render);
+  } else {
+    renderCardList(list, filtered.map((item) => [item.id, render(item)]));
+  }
+}
+
+function renderKnowledgeCard(item, tokens = []) {
+  const relatedCount = countRelatedByTags(item.tags || []);
+  const primaryTag = (item.tags || [])[0] || "综合";
+  return `
+    <article class=\"knowledge-card\" id=\"k-${escapeHtml(item.id)}\">
+      <div class=\"meta-line\">
+        <span class=\"meta-badge\">${highlightText(item.chapter, tokens)}</span>
+        ${(item.tags || []).map((tag) => `<span class=\"meta-badge\">${highlightText(tag, tokens)}</span>`).join("")}
+      </div>
+      <h3>${highlightText(item.title, tokens)}</h3>
+      <div class=\"knowledge-content\">${formatKnowledgeContent(item.content, tokens)}</div>
+      <div class=\"tool-row\">
+        <button class=\"ghost-btn\" data-action=\"go-quiz-tag\" data-tag=\"${escapeHtml(primaryTag)}\">练习本主题题目（${relatedCount}）</button>
+      </div>
+    </article>`;
+}
+
+function renderQuizFilterOptions() {
+  const sourceSelect = $("#quizSourceFilter");
+  const typeSelect = $("#quizTypeFilter");
+
+  const sources = uniqueSorted(state.manifest.questions.map((shard) => shard.source));
+  sourceSelect.innerHTML = [
+    `<option value=\"全部来源\">全部来源</option>`,
+    ...sources.map((source) => `<option value=\"${escapeHtml(source)}\">${escapeHtml(source)}</option>`),
+  ].join("");
+
+  typeSelect.innerHTML = [
+    `<option value=\"全部题型\">全部题型</option>`,
+    ...Object.entries(TYPE_LABEL).map(([value, label]) => `<option value=\"${value}\">${label}</option>`),
+  ].join("");
+
+  sourceSelect.value = state.ui.quizSource;
+  typeSelect.value = state.ui.quizType;
+}
+
+function buildPageList(totalPages, current) {
+  if (totalPages <= 7) {
+    return Array.from({ length: totalPages }, (_, i) => i + 1);
+  }
+  if (current <= 4) return [1, 2, 3, 4, 5, "...", totalPages];
+  if (current >= totalPages - 3) return [1, "...", totalPages - 4, totalPages - 3, totalPages - 2, totalPages - 1, totalPages];
+  return [1, "...", current - 1, current, current + 1, "...", totalPages];
+}
+
+function renderPager(container, total, page) {
+  if (!container) return;
+  const totalPages = Math.max(1, Math.ceil(total / QUIZ_PAGE_SIZE));
+  const pages = buildPageList(totalPages, page);
+
+  setHtml(container, `
+    <div class=\"pager-info\">共 ${total} 题 · 第 ${page}/${totalPages} 页</div>
+    <div class=\"page-buttons\">
+      <button class=\"page-btn\" data-page=\"${Math.max(1, page - 1)}\" ${page === 1 ? "disabled" : ""}>上一页</button>
+      ${pages
+        .map((p) =>
+          p === "..."
+            ? `<span class=\"page-ellipsis\">…</span>`
+            : `<button class=\"page-btn${p === page ? " is-active" : ""}\" data-page=\"${p}\">${p}</button>`
+        )
+        .join("")}
+      <button class=\"page-btn\" data-page=\"${Math.min(totalPages, page + 1)}\" ${page === totalPages ? "disabled" : ""}>下一页</button>
+    </div>
+  `);
+}
+
+function renderObjectiveOptions(q, record, tokens = []) {
+  const correctLetters = deriveCorrectLetters(q);
+  const userLetters = Array.isArray(record?.userLetters) ? record.userLetters : [];
+
+  const inputType = q.qtype === "multiple" ? "checkbox" : "radio";
+
+  return `
+    <div class=\"option-list\">
+      ${(q.options || [])
+        .map((opt, idx) => {
+          const letter = letterAt(idx);
+          const checked = userLetters.includes(letter) ? "checked" : "";
+
+          let optionClass = "option-item";
+          if (record && Array.isArray(record.userLetters) && record.userLetters.length) {
+            if (correctLetters.includes(letter)) optionClass += " correct";
+            if (userLetters.includes(letter) && !correctLetters.includes(letter)) optionClass += " wrong";
+          }
+
+          return `
+            <label class=\"${optionClass}\">
+              <input type=\"${inputType}\" name=\"q-${escapeHtml(q.id)}\" value=\"${letter}\" data-qid=\"${escapeHtml(q.id)}\" ${checked} />
+              <span><strong>${letter}.</strong> ${highlightText(opt, tokens)}</span>
+            </label>
+          `;
+        })
+        .join("")}
+    </div>
+  `;
+}
+
+function renderObjectiveAnswerBox(q, record) {
+  if (!record || !Array.isArray(record.userLetters) || !record.userLetters.length) return "";
+  const correctLetters = deriveCorrectLetters(q);
+  const yourAnswer = formatObjectiveAnswerText(q, record.userLetters);
+  const stdAnswer = formatObjectiveAnswerText(q, correctLetters);
+  const verdict = record.correct ? "回答正确" : "回答错误";
+  const cls = record.correct ? "ok" : "bad";
+
+  return `
+    <div class=\"answer-box ${cls}\">
+      <div class=\"answer-grid\">
+        <div class=\"answer-key\">你的答案</div>
+        <div class=\"answer-value\">${escapeHtml(yourAnswer)}</div>
+        <div class=\"answer-key\">判定</div>
+        <div class=\"answer-value\">${verdict}</div>
+        <div class=\"answer-key\">正确答案</div>
+        <div class=\"answer-value\">${escapeHtml(stdAnswer)}</div>
+      </div>
+      ${q.explanation ? `<div class=\"answer-line\"><strong>解释</strong>：${escapeHtml(q.explanation)}</div>` : ""}
+    </div>
+  `;
+}
+
+function renderSubjectiveBlock(q, record, tokens = []) {
+  const text = record?.subjectiveText || "";
+  const shown = Boolean(record?.revealed);
+  const reference = getSubjectiveReference(q);
+
+  return `
+    <div class=\"subjective-box\">
+      <textarea data-input=\"subjective\" data-qid=\"${escapeHtml(q.id)}\" placeholder=\"先自行作答，再点击显示参考答案\">${escapeHtml(text)}</textarea>
+      <div class=\"tool-row\">
+        <button class=\"ghost-btn\" data-action=\"toggle-reference\" data-qid=\"${escapeHtml(q.id)}\">${shown ? "隐藏参考答案" : "显示参考答案"}</button>
+      </div>
+      ${
+        shown
+          ? `<div class=\"answer-box\">
+              <div class=\"answer-grid\">
+                <div class=\"answer-key\">你的作答</div>
+                <div class=\"answer-value\">${escapeHtml(text || "（未填写）")}</div>
+                <div class=\"answer-key\">参考答案</div>
+                <div class=\"answer-value\">${highlightText(reference, tokens).replace(/\n/g, "<br />")}</div>
+              </div>
+            </div>`
+          : ""
+      }
+    </div>
+  `;
+}
+
+function renderQuestionCard(q, tokens = []) {
+  const record = getRecord(q.id);
+  const autoJudge = isAutoJudgeObjective(q);
+
+  return `
+    <article class=\"question-card\" id=\"q-${escapeHtml(q.id)}\">
+      <div class=\"meta-line\">
+        <span class=\"meta-badge\">${highlightText(q.id, tokens)}</span>
+        <span class=\"meta-badge\">${highlightText(q.source, tokens)}</span>
+        <span class=\"meta-badge\">${TYPE_LABEL[q.qtype] || q.qtype}</span>
+        ${(q.tags || []).map((tag) => `<span class=\"meta-badge\">${highlightText(tag, tokens)}</span>`).join("")}
+      </div>
+      <h3 class=\"question-stem\">${highlightText(q.stem, tokens)}</h3>
+      ${
+        isObjective(q)
+          ? `
+            ${renderObjectiveOptions(q, record, tokens)}
+            <div class=\"tool-row\">
+              ${
+                autoJudge
+                  ? `<span class=\"hint inline-hint\">点击选项后自动判题</span>`
+                  : `<button class=\"solid-btn\" data-action=\"submit-objective\" data-qid=\"${escapeHtml(q.id)}\">提交答案</button>`
+              }
+              <button class=\"ghost-btn\" data-action=\"clear-answer\" data-qid=\"${escapeHtml(q.id)}\">清空重做</button>
+              <button class=\"ghost-btn\" data-action=\"go-knowledge\" data-tag=\"${escapeHtml((q.tags || ["综合"])[0])}\">看相关知识点</button>
+            </div>
+            ${renderObjectiveAnswerBox(q, record)}
+          `
+          : `
+            ${renderSubjectiveBlock(q, record, tokens)}
+            <div class=\"tool-row\">
+              <button class=\"ghost-btn\" data-action=\"go-knowledge\" data-tag=\"${escapeHtml((q.tags || ["综合"])[0])}\">看相关知识点</button>
+            </div>
+          `
+      }
+    </article>
+  `;
+}
+
+function renderQuizList() {
+  const filtered = getQuizFiltered();
+  const { query, tokens, loose } = state.cache.search.questions;
+  const status = $("#quizSearchStatus");
+  const totalPages = Math.max(1, Math.ceil(filtered.length / QUIZ_PAGE_SIZE));
+  if (state.ui.quizPage > totalPages) state.ui.quizPage = totalPages;
+  if (state.ui.quizPage < 1) state.ui.quizPage = 1;
+
+  const start = (state.ui.quizPage - 1) * QUIZ_PAGE_SIZE;
+  const pageItems = filtered.slice(start, start + QUIZ_PAGE_SIZE);
+
+  if (state.ui.quizShowAll) {
+    setHtml($("#quizPager"), `<div class=\"pager-info\">共 ${filtered.length} 题 · 全部显示</div>`);
+    setHtml($("#quizPagerBottom"), "");
+  } else {
+    renderPager($("#quizPager"), filtered.length, state.ui.quizPage);
+    renderPager($("#quizPagerBottom"), filtered.length, state.ui.quizPage);
+  }
+
+  if (status && !quizShardsLoaded()) {
+    status.textContent = "题库加载中…";
+  } else if (status) {
+    status.textContent = tokens.length
+      ? `检索“${query.join(" ")}”：匹配 ${filtered.length} 题（${loose ? "无完整匹配，按词片近似排序" : "按相关度排序"}）。`
+      : "输入关键词后会在题干/选项/解析中检索并排序。";
+  }
+
+  const list = $("#quizList");
+  if (!filtered.length) {
+    renderCardList(list, [["empty", `<div class=\"panel\"><p class=\"hint\">当前筛选下没有题目，建议重置筛选条件。</p></div>`]]);
+    return;
+  }
+
+  if (state.ui.quizShowAll) {
+    renderVirtualList(list, filtered, (q) => q.id, (q) => renderQuestionCard(q, tokens));
+  } else {
+    renderCardList(list, pageItems.map((q) => [q.id, renderQuestionCard(q, tokens)]));
+  }
+}
+
+function getDocPreviewPath(doc) {
+  return doc?.web || doc?.file || "";
+}
+
+function renderDocLibrary() {
+  const tokens = getSearchTokens(state.ui.docSearch);
+  const docs = getDocFiltered();
+  const cards = $("#docCards");
+  const status = $("#docSearchStatus");
+  if (!cards) return;
+
+  if (status) {
+    status.textContent = tokens.length
+      ? `检索“${tokens.join(" ")}”：匹配 ${docs.length} 份文稿。`
+      : "可按文稿名称快速检索。";
+  }
+
+  if (!docs.length) {
+    cards.innerHTML = `<p class=\"hint\">暂无在线文稿。</p>`;
+    return;
+  }
+
+  cards.innerHTML = docs
+    .map(
+      (doc) => {
+        const previewPath = getDocPreviewPath(doc);
+        return `
+      <article class=\"doc-card\">
+        <h3>${highlightText(doc.title, tokens)}</h3>
+        <p>${highlightText(doc.desc || "", tokens)}</p>
+        <div class=\"tool-row\">
+          <a class=\"solid-btn as-link\" href=\"${escapeHtml(previewPath)}\" target=\"_blank\" rel=\"noopener\">在线阅读</a>
+          ${doc.pdf ? `<a class=\"ghost-btn as-link\" href=\"${escapeHtml(doc.pdf)}\" target=\"_blank\" rel=\"noopener\">下载 PDF</a>` : ""}
+        </div>
+      </article>`;
+      }
+    )
+    .join("");
+}
+
+function renderProgress() {
+  const board = $("#progressBoard");
+  const wrongList = $("#wrongList");
+  if (!allQuestionsLoaded()) {
+    setHtml(board, `<p class=\"hint\">题库加载中…</p>`);
+    renderCardList(wrongList, []);
+    return;
+  }
+
+  const objectiveQs = state.data.questions.filter(isObjective);
+  const objectiveAnswered = objectiveQs.filter((q) => {
+    const rec = getRecord(q.id);
+    return rec && Array.isArray(rec.userLetters) && rec.userLetters.length;
+  });
+  const objectiveCorrect = objectiveAnswered.filter((q) => getRecord(q.id)?.correct === true).length;
+
+  const byType = {};
+  objectiveQs.forEach((q) => {
+    const type = q.qtype;
+    byType[type] ||= { total: 0, answered: 0, correct: 0 };
+    byType[type].total += 1;
+    const rec = getRecord(q.id);
+    if (rec && Array.isArray(rec.userLetters) && rec.userLetters.length) {
+      byType[type].answered += 1;
+      if (rec.correct === true) byType[type].correct += 1;
+    }
+  });
+
+  const subjectiveViewed = state.data.questions.filter((q) => !isObjective(q)).filter((q) => Boolean(getRecord(q.id)?.revealed)).length;
+
+  setHtml(board, [
+    `<article class=\"progress-card\"><h3>客观题完成度</h3><p>${objectiveAnswered.length}/${objectiveQs.length}</p></article>`,
+    `<article class=\"progress-card\"><h3>客观题正确率</h3><p>${toPercent(objectiveCorrect, objectiveAnswered.length)}</p></article>`,
+    `<article class=\"progress-card\"><h3>主观题已查看参考答案</h3><p>${subjectiveViewed}</p></article>`,
+    ...Object.entries(byType).map(
+      ([type, item]) =>
+        `<article class=\"progress-card\"><h3>${TYPE_LABEL[type] || type}</h3><p>${item.answered}/${item.total} · 正确率 ${toPercent(item.correct, item.answered)}</p></article>`
+    ),
+  ].join(""));
+
+  const wrongItems = objectiveQs.filter((q) => getRecord(q.id)?.correct === false);
+  if (!wrongItems.length) {
+    renderCardList(wrongList, [["empty", `<p class=\"hint\">当前没有错题，继续保持。</p>`]]);
+  } else {
+    renderCardList(
+      wrongList,
+      wrongItems.map((q) => {
+        const rec = getRecord(q.id);
+        const correct = formatObjectiveAnswerText(q, deriveCorrectLetters(q));
+        const yours = formatObjectiveAnswerText(q, rec.userLetters || []);
+        const html = `
+          <article class=\"wrong-item\">
+            <div class=\"meta-line\">
+              <span class=\"meta-badge\">${escapeHtml(q.id)}</span>
+              <span class=\"meta-badge\">${TYPE_LABEL[q.qtype] || q.qtype}</span>
+            </div>
+            <div>${escapeHtml(q.stem)}</div>
+            <div class=\"answer-grid\">
+              <div class=\"answer-key\">你的答案</div>
+              <div class=\"answer-value\">${escapeHtml(yours)}</div>
+              <div class=\"answer-key\">正确答案</div>
+              <div class=\"answer-value\">${escapeHtml(correct)}</div>
+            </div>
+            <div class=\"tool-row\">
+              <button class=\"ghost-btn\" data-action=\"jump-to-question\" data-qid=\"${escapeHtml(q.id)}\">去订正</button>
+              <button class=\"ghost-btn\" data-action=\"go-knowledge\" data-tag=\"${escapeHtml((q.tags || ["综合"])[0])}\">回看知识点</button>
+            </div>
+          </article>
+        `;
+        return [q.id, html];
+      })
+    );
+  }
+}
+
+function renderAll() {
+  renderMetaStats();
+  renderQuickTags();
+  renderKnowledgeTags();
+  renderKnowledgeList();
+  renderQuizFilterOptions();
+  renderQuizList();
+  renderDocLibrary();
+  renderProgress();
+}
+
+function bindTabEvents() {
+  $all(".tab").forEach((btn) => {
+    btn.addEventListener("click", () => setTab(btn.dataset.tab));
+  });
+  $all("[data-tab-trigger]").forEach((btn) => {
+    btn.addEventListener("click", () => setTab(btn.dataset.tabTrigger));
+  });
+}
+
+function bindKnowledgeEvents() {
+  $("#knowledgeSearch").addEventListener("input", (e) => {
+    state.ui.knowledgeSearch = e.target.value;
+    renderKnowledgeList();
+  });
+
+  $("#knowledgeClear").addEventListener("click", () => {
+    state.ui.knowledgeSearch = "";
+    $("#knowledgeSearch").value = "";
+    state.ui.knowledgeTag = "全部";
+    renderKnowledgeTags();
+    renderKnowledgeList();
+  });
+
+  $("#knowledgeTags").addEventListener("click", (e) => {
+    const btn = e.target.closest("[data-knowledge-tag]");
+    if (!btn) return;
+    state.ui.knowledgeTag = btn.dataset.knowledgeTag;
+    renderKnowledgeTags();
+    renderKnowledgeList();
+  });
+
+  $("#knowledgeList").addEventListener("click", (e) => {
+    const trigger = e.target.closest("[data-action='go-quiz-tag']");
+    if (!trigger) return;
+    const tag = trigger.dataset.tag || "";
+    state.ui.quizSearch = tag;
+    state.ui.quizPage = 1;
+    $("#quizSearch").value = tag;
+    setTab("quiz");
+    renderQuizList();
+  });
+}
+
+function bindSidebarEvents() {
+  $("#quickTags").addEventListener("click", (e) => {
+    const btn = e.target.closest("[data-quick-tag]");
+    if (!btn) return;
+    const tag = btn.dataset.quickTag;
+    state.ui.knowledgeTag = tag;
+    state.ui.knowledgeSearch = "";
+    $("#knowledgeSearch").value = "";
+    renderKnowledgeTags();
+    renderKnowledgeList();
+    setTab("knowledge");
+  });
+
+  $("#btnStartWrong").addEventListener("click", () => {
+    state.ui.quizWrongOnly = true;
+    state.ui.quizPage = 1;
+    $("#quizWrongOnly").checked = true;
+    setTab("quiz");
+    renderQuizList();
+  });
+
+  $("#btnResetProgress").addEventListener("click", () => {
+    const ok = window.confirm("确认清空所有练习记录吗？");
+    if (!ok) return;
+    resetProgress();
+    $("#quizWrongOnly").checked = false;
+    $("#quizSearch").value = state.ui.quizSearch;
+  });
+}
+
+function bindQuizFilterEvents() {
+  $("#quizSourceFilter").addEventListener("change", (e) => {
+    state.ui.quizSource = e.target.value;
+    state.ui.quizPage = 1;
+    requestShards(getNeededShards());
+    renderQuizList();
+  });
+
+  $("#quizTypeFilter").addEventListener("change", (e) => {
+    state.ui.quizType = e.target.value;
+    state.ui.quizPage = 1;
+    renderQuizList();
+  });
+
+  $("#quizSearch").addEventListener("input", (e) => {
+    state.ui.quizSearch = e.target.value;
+    state.ui.quizPage = 1;
+    renderQuizList();
+  });
+
+  $("#quizWrongOnly").addEventListener("change", (e) => {
+    state.ui.quizWrongOnly = Boolean(e.target.checked);
+    state.ui.quizPage = 1;
+    renderQuizList();
+  });
+
+  $("#quizShowAll").addEventListener("change", (e) => {
+    state.ui.quizShowAll = Boolean(e.target.checked);
+    state.ui.quizPage = 1;
+    renderQuizList();
+  });
+
+  $("#quizClearFilter").addEventListener("click", () => {
+    state.ui.quizSource = "全部来源";
+    state.ui.quizType = "全部题型";
+    state.ui.quizSearch = "";
+    state.ui.quizWrongOnly = false;
+    state.ui.quizPage = 1;
+    $("#quizSourceFilter").value = state.ui.quizSource;
+    $("#quizTypeFilter").value = state.ui.quizType;
+    $("#quizSearch").value = "";
+    $("#quizWrongOnly").checked = false;
+    renderQuizList();
+  });
+}
+
+function bindLibraryEvents() {
+  const search = $("#docSearch");
+  const clearBtn = $("#docSearchClear");
+  if (!search || !clearBtn) return;
+
+  search.addEventListener("input", (e) => {
+    state.ui.docSearch = e.target.value;
+    renderDocLibrary();
+  });
+
+  clearBtn.addEventListener("click", () => {
+    state.ui.docSearch = "";
+    search.value = "";
+    renderDocLibrary();
+  });
+}
+
+function gradeObjectiveQuestion(q, userLetters) {
+  const correctLetters = deriveCorrectLetters(q).sort();
+  const user = [...userLetters].sort();
+
+  if (q.qtype === "single" || q.qtype === "truefalse") {
+    return user.length === 1 && correctLetters.length === 1 && user[0] === correctLetters[0];
+  }
+
+  if (q.qtype === "multiple") {
+    if (user.length !== correctLetters.length) return false;
+    return user.every((letter, idx) => letter === correctLetters[idx]);
+  }
+
+  return false;
+}
+
+function commitObjectiveAnswer(q, checkedLetters) {
+  const correct = gradeObjectiveQuestion(q, checkedLetters);
+  upsertRecord(q.id, {
+    userLetters: checkedLetters,
+    correct,
+  });
+  renderMetaStats();
+  renderQuizList();
+  renderProgress();
+}
+
+function bindQuizActionEvents() {
+  const list = $("#quizList");
+
+  list.addEventListener("click", (e) => {
+    const pageBtn = e.target.closest(".page-btn");
+    if (pageBtn && pageBtn.dataset.page) {
+      state.ui.quizPage = Number(pageBtn.dataset.page);
+      renderQuizList();
+      return;
+    }
+
+    const trigger = e.target.closest("[data-action]");
+    if (!trigger) return;
+
+    const action = trigger.dataset.action;
+    const qid = trigger.dataset.qid;
+
+    if (action === "submit-objective") {
+      const q = state.data.questions.find((item) => item?.id === qid);
+      if (!q) return;
+      const card = trigger.closest(".question-card");
+      const checked = Array.from(card.querySelectorAll(`input[name='q-${CSS.escape(q.id)}']:checked`)).map((el) => el.value);
+      if (!checked.length) {
+        window.alert("请先选择答案后再提交。");
+        return;
+      }
+      commitObjectiveAnswer(q, checked);
+      return;
+    }
+
+    if (action === "clear-answer") {
+      if (!qid) return;
+      const rec = getRecord(qid);
+      if (!rec) return;
+      upsertRecord(qid, {
+        userLetters: [],
+        correct: null,
+      });
+      renderMetaStats();
+      renderQuizList();
+      renderProgress();
+      return;
+    }
+
+    if (action === "toggle-reference") {
+      const q = state.data.questions.find((item) => item?.id === qid);
+      if (!q) return;
+      const rec = getRecord(q.id) || {};
+      upsertRecord(q.id, {
+        subjectiveText: rec.subjectiveText || "",
+        revealed: !rec.revealed,
+      });
+      renderQuizList();
+      renderProgress();
+      return;
+    }
+
+    if (action === "go-knowledge") {
+      const tag = trigger.dataset.tag || "全部";
+      state.ui.knowledgeTag = tag;
+      state.ui.knowledgeSearch = "";
+      $("#knowledgeSearch").value = "";
+      renderKnowledgeTags();
+      renderKnowledgeList();
+      setTab("knowledge");
+      return;
+    }
+  });
+
+  // draft text autosave
+  list.addEventListener("input", (e) => {
+    const input = e.target.closest("textarea[data-input='subjective']");
+    if (!input) return;
+    const qid = input.dataset.qid;
+    const rec = getRecord(qid) || {};
+    upsertRecord(qid, {
+      ...rec,
+      subjectiveText: input.value,
+    });
+  });
+
+  // single / truefalse objective questions: auto judge when one option is chosen
+  list.addEventListener("change", (e) => {
+    const input = e.target.closest(".option-list input[data-qid]");
+    if (!input) return;
+
+    const qid = input.dataset.qid;
+    const q = state.data.questions.find((item) => item?.id === qid);
+    if (!q || !isAutoJudgeObjective(q)) return;
+
+    const card = input.closest(".question-card");
+    if (!card) return;
+    const checked = Array.from(card.querySelectorAll(`input[name='q-${CSS.escape(q.id)}']:checked`)).map((el) => el.value);
+    if (!checked.length) return;
+    commitObjectiveAnswer(q, checked);
+  });
+
+  const pagerTop = $("#quizPager");
+  const pagerBottom = $("#quizPagerBottom");
+  [pagerTop, pagerBottom].forEach((pager) => {
+    pager.addEventListener("click", (e) => {
+      const btn = e.target.closest(".page-btn");
+      if (!btn || !btn.dataset.page) return;
+      state.ui.quizPage = Number(btn.dataset.page);
+      renderQuizList();
+      window.scrollTo({ top: 0, behavior: "smooth" });
+    });
+  });
+}
+
+function bindProgressEvents() {
+  $("#wrongList").addEventListener("click", (e) => {
+    const trigger = e.target.closest("[data-action]");
+    if (!trigger) return;
+    const action = trigger.dataset.action;
+
+    if (action === "jump-to-question") {
+      const qid = trigger.dataset.qid;
+      if (!qid) return;
+      state.ui.quizSearch = qid;
+      state.ui.quizWrongOnly = false;
+      state.ui.quizPage = 1;
+      $("#quizSearch").value = qid;
+      $("#quizWrongOnly").checked = false;
+      setTab("quiz");
+      renderQuizList();
+      return;
+    }
+
+    if (action === "go-knowledge") {
+      const tag = trigger.dataset.tag || "全部";
+      state.ui.knowledgeTag = tag;
+      state.ui.knowledgeSearch = "";
+      $("#knowledgeSearch").value = "";
+      renderKnowledgeTags();
+      renderKnowledgeList();
+      setTab("knowledge");
+    }
+  });
+}
+
+function getQuestionShards() {
+  const source = state.ui.quizSource;
+  return state.manifest.questions.filter((shard) => source === "全部来源" || shard.source === source);
+}
+
+function getNeededShards() {
+  if (state.ui.tab === "knowledge") return [state.manifest.knowledge];
+  if (state.ui.tab === "quiz") return getQuestionShards();
+  if (state.ui.tab === "progress") return state.manifest.questions;
+  return [];
+}
+
+function isShardLoaded(shard) {
+  return state.shards.get(shard.file)?.loaded === true;
+}
+
+function allQuestionsLoaded() {
+  return state.manifest.questions.every(isShardLoaded);
+}
+
+function quizShardsLoaded() {
+  return getQuestionShards().every(isShardLoaded);
+}
+
+// Published file names carry a content hash, so the HTTP cache never goes stale.
+async function fetchJson(path) {
+  const res = await fetch(path);
+  if (!res.ok) throw new Error(`无法加载数据: ${path} ${res.status}`);
+  return res.json();
+}
+
+const WIRE_FORMAT = "compact-1";
+
+function decodeRows(rows, columns) {
+  return rows.map((row) => Object.fromEntries(columns.map((column, i) => [column, row[i]])));
+}
+
+// Expands a compact shard into the plain record shape; plain shards pass through.
+function decodeShard(payload) {
+  const { format, tables, columns, tags } = state.manifest;
+  if (!format) return payload;
+  if (format !== WIRE_FORMAT) throw new Error(`未知的数据格式: ${format}`);
+
+  if (payload.knowledge) {
+    return {
+      knowledge: decodeRows(payload.knowledge, columns.knowledge).map((item) => ({
+        ...item,
+        chapter: tables.chapters[item.chapter],
+        tags: item.tags.map((i) => tags[i]),
+      })),
+    };
+  }
+  return {
+    offset: payload.offset,
+    questions: decodeRows(payload.questions, columns.questions).map(({ correct, ...q }) => ({
+      ...q,
+      source: tables.sources[q.source],
+      qtype: tables.qtypes[q.qtype],
+      tags: q.tags.map((i) => tags[i]),
+      correctLetters: correct,
+    })),
+  };
+}
+
+function onShardLoaded(shard, payload) {
+  if (payload.knowledge) {
+    state.data.knowledge = payload.knowledge;
+    if (state.ready) renderKnowledgeList();
+    return;
+  }
+  payload.questions.forEach((q, i) => {
+    state.data.questions[payload.offset + i] = q;
+  });
+  if (!state.ready) return;
+  if (getQuestionShards().includes(shard)) renderQuizList();
+  if (allQuestionsLoaded()) {
+    renderMetaStats();
+    renderKnowledgeList();
+    renderProgress();
+  }
+}
+
+function loadShard(shard) {
+  let entry = state.shards.get(shard.file);
+  if (!entry) {
+    entry = { loaded: false };
+    entry.promise = fetchJson(new URL(shard.file, state.dataDir)).then((payload) => {
+      const decoded = decodeShard(payload);
+      entry.loaded = true;
+      onShardLoaded(shard, decoded);
+    });
+    state.shards.set(shard.file, entry);
+  }
+  return entry.promise;
+}
+
+function requestShards(shards) {
+  shards.forEach((shard) =>
+    loadShard(shard).catch((err) => {
+      state.shards.delete(shard.file);
+      console.error(err);
+    })
+  );
+}
+
+async function boot() {
+  const manifestUrl = new URL($('meta[name="data-manifest"]')?.content || DEFAULT_MANIFEST, document.baseURI);
+  state.dataDir = new URL(".", manifestUrl);
+  state.manifest = await fetchJson(manifestUrl);
+  state.data = {
+    meta: state.manifest.meta,
+    documents: state.manifest.documents,
+    knowledge: [],
+    // Sparse until every shard has arrived; slots follow the manifest offsets.
+    questions: new Array(state.manifest.meta.question_count),
+  };
+
+  loadProgress();
+  await Promise.all(getNeededShards().map(loadShard));
+  bindTabEvents();
+  bindSidebarEvents();
+  bindKnowledgeEvents();
+  bindQuizFilterEvents();
+  bindLibraryEvents();
+  bindQuizActionEvents();
+  bindProgressEvents();
+  window.addEventListener("scroll", scheduleWindowUpdate, { passive: true });
+  window.addEventListener("resize", scheduleWindowUpdate);
+
+  $("#knowledgeSearch").value = state.ui.knowledgeSearch;
+  $("#quizSearch").value = state.ui.quizSearch;
+  $("#docSearch").value = state.ui.docSearch;
+  $("#quizWrongOnly").checked = state.ui.quizWrongOnly;
+  $("#quizShowAll").checked = state.ui.quizShowAll;
+
+  state.ready = true;
+  renderAll();
+  requestShards([state.manifest.knowledge, ...state.manifest.questions]);
+  // Most visits never search: the index is fetched once a search box is used,
+  // and searches scan until it arrives.
+  ["#knowledgeSearch", "#quizSearch"].forEach((selector) => {
+    $(selector).addEventListener("focus", loadSearchIndex);
+    $(selector).addEventListener("input", loadSearchIndex);
+  });
+  if (state.ui.knowledgeSearch || state.ui.quizSearch) loadSearchIndex();
+  registerServiceWorker();
+}
+
+function registerServiceWorker() {
+  if (!("serviceWorker" in navigator)) return;
+  navigator.serviceWorker.register("sw.js").catch((err) => console.warn("service worker unavailable", err));
+}
+
+function loadSearchIndex() {
+  if (state.searchIndexRequest) return state.searchIndexRequest;
+  // Rankings are the same with or without the index, so nothing re-renders.
+  state.searchIndexRequest = fetchJson(new URL(state.manifest.index.file, state.dataDir))
+    .then((index) => {
+      state.searchIndex = index;
+    })
+    .catch((err) => {
+      console.warn("search index unavailable, using full scan", err);
+    });
+  return state.searchIndexRequest;
+}
+
+boot().catch((err) => {
+  console.error(err);
+  document.body.innerHTML = `
+    <main style="padding:24px; font-family: sans-serif;">
+      <h1>页面加载失败</h1>
+      <p>请检查 <code>docs/assets/data/</code> 下的数据文件是否存在且格式正确。</p>
+      <pre>${escapeHtml(String(err.message || err))}</pre>
+    </main>
+  `;
+});
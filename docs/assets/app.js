@@ -1,5 +1,12 @@
 const STORAGE_KEY = "sms-learning-progress-v1";
 const QUIZ_PAGE_SIZE = 10;
+// Windowed lists ("全部显示" in the quiz, long knowledge results) only keep the
+// cards within VIRTUAL_OVERSCAN px of the viewport in the DOM; unmeasured cards
+// are assumed VIRTUAL_ESTIMATE px tall.
+const KNOWLEDGE_VIRTUAL_MIN = 100;
+const VIRTUAL_OVERSCAN = 800;
+const VIRTUAL_ESTIMATE = 240;
+const VIRTUAL_MAX_CARDS = 60;
 
 const TYPE_LABEL = {
   single: "单选",
@@ -9,7 +16,37 @@ const TYPE_LABEL = {
   flash: "闪卡",
 };
 
+// Searchable text per field; names match the fields of assets/search-index.json.
+const SEARCH_FIELDS = {
+  knowledge: {
+    title: (item) => item.title,
+    chapter: (item) => item.chapter,
+    tags: (item) => (item.tags || []).join(" "),
+    content: (item) => item.content,
+  },
+  questions: {
+    id: (q) => q.id,
+    stem: (q) => q.stem,
+    options: (q) => (q.options || []).join(" "),
+    explanation: (q) => q.explanation || "",
+    tags: (q) => (q.tags || []).join(" "),
+    source: (q) => q.source,
+    type: (q) => TYPE_LABEL[q.qtype] || q.qtype,
+  },
+};
+
+// Field weights used until the search index has loaded (the index carries its own).
+const SEARCH_WEIGHTS = {
+  knowledge: [["title", 7], ["chapter", 3], ["tags", 4], ["content", 1]],
+  questions: [["id", 5], ["stem", 7], ["options", 5], ["explanation", 3], ["tags", 4], ["source", 2], ["type", 1]],
+};
+
+// Used when the page names no manifest; shards and the search index are
+// resolved against the directory of whichever manifest is loaded.
+const DEFAULT_MANIFEST = "assets/data/manifest.json";
+
 const state = {
+  manifest: null,
   data: null,
   ui: {
     tab: "knowledge",
@@ -20,13 +57,28 @@ const state = {
     quizSearch: "",
     docSearch: "",
     quizWrongOnly: false,
+    quizShowAll: false,
     quizPage: 1,
   },
   progress: {
     records: {},
   },
+  dataDir: null,
+  searchIndex: null,
+  searchIndexRequest: null,
+  shards: new Map(),
+  ready: false,
+  // Keyed views of the card lists, by container (see patchCards).
+  views: new Map(),
+  windowFrame: 0,
   cache: {
     allTags: [],
+    postings: { knowledge: new Map(), questions: new Map() },
+    gramKeys: { knowledge: null, questions: null },
+    search: {
+      knowledge: { query: [], tokens: [], loose: false },
+      questions: { query: [], tokens: [], loose: false },
+    },
   },
 };
 
@@ -69,7 +121,11 @@ function getSearchTokens(raw = "") {
 
 function scoreField(text = "", tokens = []) {
   if (!tokens.length) return 0;
-  const blob = normalize(text);
+  return scoreBlob(normalize(text), tokens);
+}
+
+// Same as scoreField for text that is already normalized.
+function scoreBlob(blob, tokens) {
   if (!blob) return 0;
 
   return tokens.reduce((score, token) => {
@@ -126,6 +182,8 @@ function parseAnswerLetters(answer) {
 }
 
 function deriveCorrectLetters(q) {
+  // Precomputed by the compact wire format; callers may sort the result.
+  if (q.correctLetters) return [...q.correctLetters];
   if (!q.options || !q.options.length) return [];
   if (q.qtype === "single" || q.qtype === "multiple") {
     const direct = parseAnswerLetters(q.answer);
@@ -189,20 +247,20 @@ function resetProgress() {
 
 function setTab(tabName) {
   state.ui.tab = tabName;
+  requestShards(getNeededShards());
   $all(".tab").forEach((btn) => {
     btn.classList.toggle("is-active", btn.dataset.tab === tabName);
   });
   $all(".tab-pane").forEach((pane) => {
     pane.classList.toggle("is-active", pane.dataset.pane === tabName);
   });
+  // Windowed lists rendered while hidden could not measure their cards.
+  scheduleWindowUpdate();
 }
 
 function getAllTags() {
   if (state.cache.allTags.length) return state.cache.allTags;
-  const tags = [];
-  state.data.knowledge.forEach((k) => tags.push(...(k.tags || [])));
-  state.data.questions.forEach((q) => tags.push(...(q.tags || [])));
-  state.cache.allTags = uniqueSorted(tags);
+  state.cache.allTags = uniqueSorted(state.manifest.tags);
   return state.cache.allTags;
 }
 
@@ -222,23 +280,97 @@ function formatKnowledgeContent(raw = "", tokens = []) {
   return `<p>${highlightText(lines.join("\n"), tokens).replace(/\n/g, "<br />")}</p>`;
 }
 
-function getKnowledgeFiltered() {
-  const tag = state.ui.knowledgeTag;
-  const tokens = getSearchTokens(state.ui.knowledgeSearch);
+function getPostings(kind, gram) {
+  const cache = state.cache.postings[kind];
+  if (cache.has(gram)) return cache.get(gram);
+  const deltas = state.searchIndex[kind].postings[gram] || [];
+  const postings = new Array(deltas.length);
+  let prev = 0;
+  deltas.forEach((delta, i) => {
+    prev += delta;
+    postings[i] = prev;
+  });
+  cache.set(gram, postings);
+  return postings;
+}
 
-  const scoped = state.data.knowledge
-    .map((item, index) => ({ item, index }))
-    .filter(({ item }) => tag === "全部" || (item.tags || []).includes(tag));
+function intersectSorted(a, b) {
+  const out = [];
+  let i = 0;
+  let j = 0;
+  while (i < a.length && j < b.length) {
+    if (a[i] === b[j]) {
+      out.push(a[i]);
+      i += 1;
+      j += 1;
+    } else if (a[i] < b[j]) {
+      i += 1;
+    } else {
+      j += 1;
+    }
+  }
+  return out;
+}
 
-  if (!tokens.length) return scoped.map(({ item }) => item);
+function getTokenPostings(kind, token) {
+  const chars = Array.from(token);
+  if (chars.length === 1) {
+    // Every occurrence of a character sits in a bigram or in a one-character run.
+    if (!state.cache.gramKeys[kind]) state.cache.gramKeys[kind] = Object.keys(state.searchIndex[kind].postings);
+    const merged = new Set();
+    state.cache.gramKeys[kind]
+      .filter((gram) => gram.includes(token))
+      .forEach((gram) => getPostings(kind, gram).forEach((p) => merged.add(p)));
+    return Array.from(merged);
+  }
 
-  return scoped
-    .map(({ item, index }) => {
-      const score =
-        scoreField(item.title, tokens) * 7 +
-        scoreField(item.chapter, tokens) * 3 +
-        scoreField((item.tags || []).join(" "), tokens) * 4 +
-        scoreField(item.content, tokens);
+  const grams = new Set();
+  for (let i = 0; i < chars.length - 1; i += 1) grams.add(chars[i] + chars[i + 1]);
+  const lists = Array.from(grams, (gram) => getPostings(kind, gram)).sort((a, b) => a.length - b.length);
+  return lists.reduce((acc, list) => (acc.length ? intersectSorted(acc, list) : acc));
+}
+
+// Items whose fields may contain a token, as index -> bitmask of those fields.
+function getSearchCandidates(kind, tokens) {
+  const section = state.searchIndex?.[kind];
+  if (!section || section.count !== state.data[kind].length) return null;
+
+  const width = section.fields.length;
+  // Fields without postings are scored on every item.
+  const scanned = (section.scan || []).reduce((mask, f) => mask | (1 << f), 0);
+  const candidates = new Map();
+  if (scanned) state.data[kind].forEach((_, index) => candidates.set(index, scanned));
+  tokens.forEach((token) => {
+    getTokenPostings(kind, token).forEach((posting) => {
+      const index = Math.floor(posting / width);
+      candidates.set(index, (candidates.get(index) || 0) | (1 << posting % width));
+    });
+  });
+  return candidates;
+}
+
+function rankSearch(kind, tokens, accept) {
+  const items = state.data[kind];
+  const getters = SEARCH_FIELDS[kind];
+  const candidates = getSearchCandidates(kind, tokens);
+  const fields = candidates ? state.searchIndex[kind].fields : SEARCH_WEIGHTS[kind];
+  const entries = candidates ? Array.from(candidates) : items.map((_, index) => [index, -1]);
+  // Normalized field text from the compact index; a missing entry means the raw text is already normalized.
+  const blobs = candidates ? state.searchIndex[kind].search : null;
+
+  const fieldScore = (item, index, name, f) => {
+    if (!blobs) return scoreField(getters[name](item), tokens);
+    return scoreBlob(blobs[index]?.[f] ?? getters[name](item), tokens);
+  };
+
+  return entries
+    .filter(([index]) => items[index] && accept(items[index]))
+    .map(([index, mask]) => {
+      const item = items[index];
+      const score = fields.reduce(
+        (sum, [name, weight], f) => (mask & (1 << f) ? sum + fieldScore(item, index, name, f) * weight : sum),
+        0
+      );
       return { item, index, score };
     })
     .filter((x) => x.score > 0)
@@ -246,42 +378,60 @@ function getKnowledgeFiltered() {
     .map(({ item }) => item);
 }
 
+// Splits long space-free tokens (typical for Chinese queries) into bigrams.
+function getLooseTokens(tokens) {
+  const loose = new Set();
+  let split = false;
+  tokens.forEach((token) => {
+    const chars = Array.from(token);
+    if (chars.length < 3) {
+      loose.add(token);
+      return;
+    }
+    split = true;
+    for (let i = 0; i < chars.length - 1; i += 1) loose.add(chars[i] + chars[i + 1]);
+  });
+  return split ? Array.from(loose) : [];
+}
+
+function searchItems(kind, raw, accept) {
+  const tokens = getSearchTokens(raw);
+  const search = state.cache.search[kind];
+  search.query = tokens;
+  search.tokens = tokens;
+  search.loose = false;
+  if (!tokens.length) return state.data[kind].filter(accept);
+
+  const ranked = rankSearch(kind, tokens, accept);
+  if (ranked.length) return ranked;
+
+  const loose = getLooseTokens(tokens);
+  if (!loose.length) return ranked;
+  search.tokens = loose;
+  search.loose = true;
+  return rankSearch(kind, loose, accept);
+}
+
+function getKnowledgeFiltered() {
+  const tag = state.ui.knowledgeTag;
+  return searchItems("knowledge", state.ui.knowledgeSearch, (item) => tag === "全部" || (item.tags || []).includes(tag));
+}
+
 function getQuizFiltered() {
   const source = state.ui.quizSource;
   const qtype = state.ui.quizType;
-  const tokens = getSearchTokens(state.ui.quizSearch);
-
-  const scoped = state.data.questions
-    .map((q, index) => ({ q, index }))
-    .filter(({ q }) => {
-      if (source !== "全部来源" && q.source !== source) return false;
-      if (qtype !== "全部题型" && q.qtype !== qtype) return false;
-
-      if (state.ui.quizWrongOnly) {
-        const rec = getRecord(q.id);
-        if (!rec || rec.correct !== false) return false;
-      }
 
-      return true;
-    });
+  return searchItems("questions", state.ui.quizSearch, (q) => {
+    if (source !== "全部来源" && q.source !== source) return false;
+    if (qtype !== "全部题型" && q.qtype !== qtype) return false;
 
-  if (!tokens.length) return scoped.map(({ q }) => q);
+    if (state.ui.quizWrongOnly) {
+      const rec = getRecord(q.id);
+      if (!rec || rec.correct !== false) return false;
+    }
 
-  return scoped
-    .map(({ q, index }) => {
-      const score =
-        scoreField(q.id, tokens) * 5 +
-        scoreField(q.stem, tokens) * 7 +
-        scoreField((q.options || []).join(" "), tokens) * 5 +
-        scoreField(q.explanation || "", tokens) * 3 +
-        scoreField((q.tags || []).join(" "), tokens) * 4 +
-        scoreField(q.source, tokens) * 2 +
-        scoreField(TYPE_LABEL[q.qtype] || q.qtype, tokens);
-      return { q, index, score };
-    })
-    .filter((x) => x.score > 0)
-    .sort((a, b) => b.score - a.score || a.index - b.index)
-    .map(({ q }) => q);
+    return true;
+  });
 }
 
 function getDocFiltered() {
@@ -318,7 +468,159 @@ function getSubjectiveReference(q) {
   return direct || fallback || "（暂无参考答案）";
 }
 
+function setHtml(el, html) {
+  // Small panels are rebuilt from strings; an identical string leaves the DOM alone.
+  const view = state.views.get(el);
+  if (view?.html === html) return;
+  el.innerHTML = html;
+  state.views.set(el, { ...view, html });
+}
+
+function getView(container) {
+  let view = state.views.get(container);
+  if (!view?.cards) {
+    view = { ...view, cards: new Map(), virtual: null };
+    state.views.set(container, view);
+  }
+  return view;
+}
+
+function createNode(html) {
+  const template = document.createElement("template");
+  template.innerHTML = html.trim();
+  return template.content.firstElementChild;
+}
+
+function patchCards(container, cards, start = container.firstChild, end = null) {
+  // Keyed update: cards are [key, html] pairs placed between start and end
+  // (exclusive). A card whose html is unchanged keeps its node, so answering
+  // one question rebuilds one card; the rest are only moved into order.
+  const view = getView(container);
+  const next = new Map();
+  let ref = start;
+  cards.forEach(([key, html]) => {
+    const entry = view.cards.get(key);
+    let kept = entry && entry.html === html ? entry : null;
+    // Never swap out a draft while it is being typed; it is rebuilt once it loses focus.
+    if (!kept && entry?.node.contains(document.activeElement) && document.activeElement.tagName === "TEXTAREA") kept = entry;
+    const node = kept ? kept.node : createNode(html);
+    if (entry && !kept) {
+      if (entry.node === ref) ref = ref.nextSibling;
+      entry.node.remove();
+    }
+    if (node === ref) ref = ref.nextSibling;
+    else container.insertBefore(node, ref);
+    next.set(key, kept || { html, node });
+  });
+  while (ref && ref !== end) {
+    const stale = ref;
+    ref = ref.nextSibling;
+    stale.remove();
+  }
+  view.cards = next;
+}
+
+function renderCardList(container, cards) {
+  const view = getView(container);
+  if (view.virtual) {
+    view.virtual = null;
+    container.classList.remove("is-virtual");
+  }
+  patchCards(container, cards);
+}
+
+function renderVirtualList(container, items, keyOf, render) {
+  // Windowed list: a top and a bottom spacer stand in for the cards outside
+  // the window, so the DOM size does not grow with the number of items.
+  const view = getView(container);
+  if (!view.virtual) {
+    const spacer = () => {
+      const el = document.createElement("div");
+      el.className = "virtual-spacer";
+      el.setAttribute("aria-hidden", "true");
+      return el;
+    };
+    view.virtual = { heights: new Map(), top: spacer(), bottom: spacer() };
+    container.classList.add("is-virtual");
+  }
+  Object.assign(view.virtual, { items, keyOf, render, range: null });
+  updateWindow(container);
+}
+
+function updateWindow(container, settle = true) {
+  const view = getView(container);
+  const virtual = view.virtual;
+  if (!virtual) return;
+  const { items, keyOf, heights, top, bottom } = virtual;
+  if (container.firstChild !== top) container.insertBefore(top, container.firstChild);
+  if (container.lastChild !== bottom) container.appendChild(bottom);
+
+  // Hidden lists (inactive tab) measure as zero; they render the first window.
+  const visible = container.offsetParent !== null;
+  const rect = container.getBoundingClientRect();
+  const viewTop = visible ? -rect.top - VIRTUAL_OVERSCAN : 0;
+  const viewBottom = visible ? window.innerHeight - rect.top + VIRTUAL_OVERSCAN : window.innerHeight;
+  const heightAt = (i) => heights.get(keyOf(items[i])) ?? VIRTUAL_ESTIMATE;
+
+  let offset = 0;
+  let first = 0;
+  while (first < items.length - 1 && offset + heightAt(first) < viewTop) offset += heightAt(first++);
+  const before = offset;
+  let last = first;
+  while (last < items.length && offset < viewBottom && last - first < VIRTUAL_MAX_CARDS) offset += heightAt(last++);
+  let after = 0;
+  for (let i = last; i < items.length; i += 1) after += heightAt(i);
+
+  if (virtual.measured && virtual.range && virtual.range[0] === first && virtual.range[1] === last) return;
+  virtual.range = [first, last];
+  virtual.measured = visible;
+  top.style.height = `${before}px`;
+  bottom.style.height = `${after}px`;
+  const windowItems = items.slice(first, last);
+  patchCards(
+    container,
+    windowItems.map((item) => [keyOf(item), virtual.render(item)]),
+    top.nextSibling,
+    bottom
+  );
+  if (!visible) return;
+
+  // Card heights (including the gap) from the distance to the next card.
+  let changed = false;
+  windowItems.forEach((item) => {
+    const key = keyOf(item);
+    const node = view.cards.get(key).node;
+    const height = node.nextSibling.getBoundingClientRect().top - node.getBoundingClientRect().top;
+    if (heights.get(key) !== height) {
+      heights.set(key, height);
+      changed = true;
+    }
+  });
+  if (changed && settle) {
+    virtual.range = null;
+    updateWindow(container, false);
+  }
+}
+
+function scheduleWindowUpdate() {
+  if (state.windowFrame) return;
+  state.windowFrame = requestAnimationFrame(() => {
+    state.windowFrame = 0;
+    state.views.forEach((view, container) => {
+      if (view.virtual) updateWindow(container);
+    });
+  });
+}
+
 function renderMetaStats() {
+  $("#statKnowledge").textContent = state.data.meta.knowledge_count;
+  $("#statQuestions").textContent = state.data.meta.question_count;
+  if (!allQuestionsLoaded()) {
+    $("#statAnswered").textContent = "…";
+    $("#statCorrectRate").textContent = "…";
+    return;
+  }
+
   const objective = state.data.questions.filter(isObjective);
   const answeredObjective = objective.filter((q) => {
     const rec = getRecord(q.id);
@@ -326,8 +628,6 @@ function renderMetaStats() {
   });
   const correct = answeredObjective.filter((q) => getRecord(q.id)?.correct === true).length;
 
-  $("#statKnowledge").textContent = state.data.meta.knowledge_count;
-  $("#statQuestions").textContent = state.data.meta.question_count;
   $("#statAnswered").textContent = `${answeredObjective.length}/${objective.length}`;
   $("#statCorrectRate").textContent = toPercent(correct, answeredObjective.length);
 }
@@ -353,18 +653,19 @@ function renderKnowledgeTags() {
 
 function countRelatedByTags(tags = []) {
   if (!tags.length) return 0;
+  if (!allQuestionsLoaded()) return state.manifest.related[tags.join("|")] ?? "…";
   return state.data.questions.filter((q) => (q.tags || []).some((tag) => tags.includes(tag))).length;
 }
 
 function renderKnowledgeList() {
   const list = $("#knowledgeList");
   const status = $("#knowledgeSearchStatus");
-  const tokens = getSearchTokens(state.ui.knowledgeSearch);
   const filtered = getKnowledgeFiltered();
+  const { query, tokens, loose } = state.cache.search.knowledge;
 
   if (status) {
     if (tokens.length) {
-      status.textContent = `检索“${tokens.join(" ")}”：匹配 ${filtered.length} 条（按相关度排序）。`;
+      status.textContent = `检索“${query.join(" ")}”：匹配 ${filtered.length} 条（${loose ? "无完整匹配，按词片近似排序" : "按相关度排序"}）。`;
     } else if (state.ui.knowledgeTag !== "全部") {
       status.textContent = `当前标签“${state.ui.knowledgeTag}”：共 ${filtered.length} 条。`;
     } else {
@@ -373,35 +674,40 @@ function renderKnowledgeList() {
   }
 
   if (!filtered.length) {
-    list.innerHTML = `<div class=\"panel\"><p class=\"hint\">没有匹配结果，建议清空筛选后重试。</p></div>`;
+    renderCardList(list, [["empty", `<div class=\"panel\"><p class=\"hint\">没有匹配结果，建议清空筛选后重试。</p></div>`]]);
     return;
   }
 
-  list.innerHTML = filtered
-    .map((item) => {
-      const relatedCount = countRelatedByTags(item.tags || []);
-      const primaryTag = (item.tags || [])[0] || "综合";
-      return `
-      <article class=\"knowledge-card\" id=\"k-${escapeHtml(item.id)}\">
-        <div class=\"meta-line\">
-          <span class=\"meta-badge\">${highlightText(item.chapter, tokens)}</span>
-          ${(item.tags || []).map((tag) => `<span class=\"meta-badge\">${highlightText(tag, tokens)}</span>`).join("")}
-        </div>
-        <h3>${highlightText(item.title, tokens)}</h3>
-        <div class=\"knowledge-content\">${formatKnowledgeContent(item.content, tokens)}</div>
-        <div class=\"tool-row\">
-          <button class=\"ghost-btn\" data-action=\"go-quiz-tag\" data-tag=\"${escapeHtml(primaryTag)}\">练习本主题题目（${relatedCount}）</button>
-        </div>
-      </article>`;
-    })
-    .join("");
+  const render = (item) => renderKnowledgeCard(item, tokens);
+  if (filtered.length >= KNOWLEDGE_VIRTUAL_MIN) {
+    renderVirtualList(list, filtered, (item) => item.id, render);
+  } else {
+    renderCardList(list, filtered.map((item) => [item.id, render(item)]));
+  }
+}
+
+function renderKnowledgeCard(item, tokens = []) {
+  const relatedCount = countRelatedByTags(item.tags || []);
+  const primaryTag = (item.tags || [])[0] || "综合";
+  return `
+    <article class=\"knowledge-card\" id=\"k-${escapeHtml(item.id)}\">
+      <div class=\"meta-line\">
+        <span class=\"meta-badge\">${highlightText(item.chapter, tokens)}</span>
+        ${(item.tags || []).map((tag) => `<span class=\"meta-badge\">${highlightText(tag, tokens)}</span>`).join("")}
+      </div>
+      <h3>${highlightText(item.title, tokens)}</h3>
+      <div class=\"knowledge-content\">${formatKnowledgeContent(item.content, tokens)}</div>
+      <div class=\"tool-row\">
+        <button class=\"ghost-btn\" data-action=\"go-quiz-tag\" data-tag=\"${escapeHtml(primaryTag)}\">练习本主题题目（${relatedCount}）</button>
+      </div>
+    </article>`;
 }
 
 function renderQuizFilterOptions() {
   const sourceSelect = $("#quizSourceFilter");
   const typeSelect = $("#quizTypeFilter");
 
-  const sources = uniqueSorted(state.data.questions.map((q) => q.source));
+  const sources = uniqueSorted(state.manifest.questions.map((shard) => shard.source));
   sourceSelect.innerHTML = [
     `<option value=\"全部来源\">全部来源</option>`,
     ...sources.map((source) => `<option value=\"${escapeHtml(source)}\">${escapeHtml(source)}</option>`),
@@ -430,7 +736,7 @@ function renderPager(container, total, page) {
   const totalPages = Math.max(1, Math.ceil(total / QUIZ_PAGE_SIZE));
   const pages = buildPageList(totalPages, page);
 
-  container.innerHTML = `
+  setHtml(container, `
     <div class=\"pager-info\">共 ${total} 题 · 第 ${page}/${totalPages} 页</div>
     <div class=\"page-buttons\">
       <button class=\"page-btn\" data-page=\"${Math.max(1, page - 1)}\" ${page === 1 ? "disabled" : ""}>上一页</button>
@@ -443,7 +749,7 @@ function renderPager(container, total, page) {
         .join("")}
       <button class=\"page-btn\" data-page=\"${Math.min(totalPages, page + 1)}\" ${page === totalPages ? "disabled" : ""}>下一页</button>
     </div>
-  `;
+  `);
 }
 
 function renderObjectiveOptions(q, record, tokens = []) {
@@ -568,7 +874,7 @@ function renderQuestionCard(q, tokens = []) {
 
 function renderQuizList() {
   const filtered = getQuizFiltered();
-  const tokens = getSearchTokens(state.ui.quizSearch);
+  const { query, tokens, loose } = state.cache.search.questions;
   const status = $("#quizSearchStatus");
   const totalPages = Math.max(1, Math.ceil(filtered.length / QUIZ_PAGE_SIZE));
   if (state.ui.quizPage > totalPages) state.ui.quizPage = totalPages;
@@ -577,22 +883,33 @@ function renderQuizList() {
   const start = (state.ui.quizPage - 1) * QUIZ_PAGE_SIZE;
   const pageItems = filtered.slice(start, start + QUIZ_PAGE_SIZE);
 
-  renderPager($("#quizPager"), filtered.length, state.ui.quizPage);
-  renderPager($("#quizPagerBottom"), filtered.length, state.ui.quizPage);
+  if (state.ui.quizShowAll) {
+    setHtml($("#quizPager"), `<div class=\"pager-info\">共 ${filtered.length} 题 · 全部显示</div>`);
+    setHtml($("#quizPagerBottom"), "");
+  } else {
+    renderPager($("#quizPager"), filtered.length, state.ui.quizPage);
+    renderPager($("#quizPagerBottom"), filtered.length, state.ui.quizPage);
+  }
 
-  if (status) {
+  if (status && !quizShardsLoaded()) {
+    status.textContent = "题库加载中…";
+  } else if (status) {
     status.textContent = tokens.length
-      ? `检索“${tokens.join(" ")}”：匹配 ${filtered.length} 题（按相关度排序）。`
+      ? `检索“${query.join(" ")}”：匹配 ${filtered.length} 题（${loose ? "无完整匹配，按词片近似排序" : "按相关度排序"}）。`
       : "输入关键词后会在题干/选项/解析中检索并排序。";
   }
 
   const list = $("#quizList");
-  if (!pageItems.length) {
-    list.innerHTML = `<div class=\"panel\"><p class=\"hint\">当前筛选下没有题目，建议重置筛选条件。</p></div>`;
+  if (!filtered.length) {
+    renderCardList(list, [["empty", `<div class=\"panel\"><p class=\"hint\">当前筛选下没有题目，建议重置筛选条件。</p></div>`]]);
     return;
   }
 
-  list.innerHTML = pageItems.map((q) => renderQuestionCard(q, tokens)).join("");
+  if (state.ui.quizShowAll) {
+    renderVirtualList(list, filtered, (q) => q.id, (q) => renderQuestionCard(q, tokens));
+  } else {
+    renderCardList(list, pageItems.map((q) => [q.id, renderQuestionCard(q, tokens)]));
+  }
 }
 
 function getDocPreviewPath(doc) {
@@ -627,6 +944,7 @@ function renderDocLibrary() {
         <p>${highlightText(doc.desc || "", tokens)}</p>
         <div class=\"tool-row\">
           <a class=\"solid-btn as-link\" href=\"${escapeHtml(previewPath)}\" target=\"_blank\" rel=\"noopener\">在线阅读</a>
+          ${doc.pdf ? `<a class=\"ghost-btn as-link\" href=\"${escapeHtml(doc.pdf)}\" target=\"_blank\" rel=\"noopener\">下载 PDF</a>` : ""}
         </div>
       </article>`;
       }
@@ -637,6 +955,11 @@ function renderDocLibrary() {
 function renderProgress() {
   const board = $("#progressBoard");
   const wrongList = $("#wrongList");
+  if (!allQuestionsLoaded()) {
+    setHtml(board, `<p class=\"hint\">题库加载中…</p>`);
+    renderCardList(wrongList, []);
+    return;
+  }
 
   const objectiveQs = state.data.questions.filter(isObjective);
   const objectiveAnswered = objectiveQs.filter((q) => {
@@ -659,7 +982,7 @@ function renderProgress() {
 
   const subjectiveViewed = state.data.questions.filter((q) => !isObjective(q)).filter((q) => Boolean(getRecord(q.id)?.revealed)).length;
 
-  board.innerHTML = [
+  setHtml(board, [
     `<article class=\"progress-card\"><h3>客观题完成度</h3><p>${objectiveAnswered.length}/${objectiveQs.length}</p></article>`,
     `<article class=\"progress-card\"><h3>客观题正确率</h3><p>${toPercent(objectiveCorrect, objectiveAnswered.length)}</p></article>`,
     `<article class=\"progress-card\"><h3>主观题已查看参考答案</h3><p>${subjectiveViewed}</p></article>`,
@@ -667,18 +990,19 @@ function renderProgress() {
       ([type, item]) =>
         `<article class=\"progress-card\"><h3>${TYPE_LABEL[type] || type}</h3><p>${item.answered}/${item.total} · 正确率 ${toPercent(item.correct, item.answered)}</p></article>`
     ),
-  ].join("");
+  ].join(""));
 
   const wrongItems = objectiveQs.filter((q) => getRecord(q.id)?.correct === false);
   if (!wrongItems.length) {
-    wrongList.innerHTML = `<p class=\"hint\">当前没有错题，继续保持。</p>`;
+    renderCardList(wrongList, [["empty", `<p class=\"hint\">当前没有错题，继续保持。</p>`]]);
   } else {
-    wrongList.innerHTML = wrongItems
-      .map((q) => {
+    renderCardList(
+      wrongList,
+      wrongItems.map((q) => {
         const rec = getRecord(q.id);
         const correct = formatObjectiveAnswerText(q, deriveCorrectLetters(q));
         const yours = formatObjectiveAnswerText(q, rec.userLetters || []);
-        return `
+        const html = `
           <article class=\"wrong-item\">
             <div class=\"meta-line\">
               <span class=\"meta-badge\">${escapeHtml(q.id)}</span>
@@ -697,8 +1021,9 @@ function renderProgress() {
             </div>
           </article>
         `;
+        return [q.id, html];
       })
-      .join("");
+    );
   }
 }
 
@@ -790,6 +1115,7 @@ function bindQuizFilterEvents() {
   $("#quizSourceFilter").addEventListener("change", (e) => {
     state.ui.quizSource = e.target.value;
     state.ui.quizPage = 1;
+    requestShards(getNeededShards());
     renderQuizList();
   });
 
@@ -811,6 +1137,12 @@ function bindQuizFilterEvents() {
     renderQuizList();
   });
 
+  $("#quizShowAll").addEventListener("change", (e) => {
+    state.ui.quizShowAll = Boolean(e.target.checked);
+    state.ui.quizPage = 1;
+    renderQuizList();
+  });
+
   $("#quizClearFilter").addEventListener("click", () => {
     state.ui.quizSource = "全部来源";
     state.ui.quizType = "全部题型";
@@ -887,7 +1219,7 @@ function bindQuizActionEvents() {
     const qid = trigger.dataset.qid;
 
     if (action === "submit-objective") {
-      const q = state.data.questions.find((item) => item.id === qid);
+      const q = state.data.questions.find((item) => item?.id === qid);
       if (!q) return;
       const card = trigger.closest(".question-card");
       const checked = Array.from(card.querySelectorAll(`input[name='q-${CSS.escape(q.id)}']:checked`)).map((el) => el.value);
@@ -914,7 +1246,7 @@ function bindQuizActionEvents() {
     }
 
     if (action === "toggle-reference") {
-      const q = state.data.questions.find((item) => item.id === qid);
+      const q = state.data.questions.find((item) => item?.id === qid);
       if (!q) return;
       const rec = getRecord(q.id) || {};
       upsertRecord(q.id, {
@@ -956,7 +1288,7 @@ function bindQuizActionEvents() {
     if (!input) return;
 
     const qid = input.dataset.qid;
-    const q = state.data.questions.find((item) => item.id === qid);
+    const q = state.data.questions.find((item) => item?.id === qid);
     if (!q || !isAutoJudgeObjective(q)) return;
 
     const card = input.closest(".question-card");
@@ -1010,12 +1342,125 @@ function bindProgressEvents() {
   });
 }
 
+function getQuestionShards() {
+  const source = state.ui.quizSource;
+  return state.manifest.questions.filter((shard) => source === "全部来源" || shard.source === source);
+}
+
+function getNeededShards() {
+  if (state.ui.tab === "knowledge") return [state.manifest.knowledge];
+  if (state.ui.tab === "quiz") return getQuestionShards();
+  if (state.ui.tab === "progress") return state.manifest.questions;
+  return [];
+}
+
+function isShardLoaded(shard) {
+  return state.shards.get(shard.file)?.loaded === true;
+}
+
+function allQuestionsLoaded() {
+  return state.manifest.questions.every(isShardLoaded);
+}
+
+function quizShardsLoaded() {
+  return getQuestionShards().every(isShardLoaded);
+}
+
+// Published file names carry a content hash, so the HTTP cache never goes stale.
+async function fetchJson(path) {
+  const res = await fetch(path);
+  if (!res.ok) throw new Error(`无法加载数据: ${path} ${res.status}`);
+  return res.json();
+}
+
+const WIRE_FORMAT = "compact-1";
+
+function decodeRows(rows, columns) {
+  return rows.map((row) => Object.fromEntries(columns.map((column, i) => [column, row[i]])));
+}
+
+// Expands a compact shard into the plain record shape; plain shards pass through.
+function decodeShard(payload) {
+  const { format, tables, columns, tags } = state.manifest;
+  if (!format) return payload;
+  if (format !== WIRE_FORMAT) throw new Error(`未知的数据格式: ${format}`);
+
+  if (payload.knowledge) {
+    return {
+      knowledge: decodeRows(payload.knowledge, columns.knowledge).map((item) => ({
+        ...item,
+        chapter: tables.chapters[item.chapter],
+        tags: item.tags.map((i) => tags[i]),
+      })),
+    };
+  }
+  return {
+    offset: payload.offset,
+    questions: decodeRows(payload.questions, columns.questions).map(({ correct, ...q }) => ({
+      ...q,
+      source: tables.sources[q.source],
+      qtype: tables.qtypes[q.qtype],
+      tags: q.tags.map((i) => tags[i]),
+      correctLetters: correct,
+    })),
+  };
+}
+
+function onShardLoaded(shard, payload) {
+  if (payload.knowledge) {
+    state.data.knowledge = payload.knowledge;
+    if (state.ready) renderKnowledgeList();
+    return;
+  }
+  payload.questions.forEach((q, i) => {
+    state.data.questions[payload.offset + i] = q;
+  });
+  if (!state.ready) return;
+  if (getQuestionShards().includes(shard)) renderQuizList();
+  if (allQuestionsLoaded()) {
+    renderMetaStats();
+    renderKnowledgeList();
+    renderProgress();
+  }
+}
+
+function loadShard(shard) {
+  let entry = state.shards.get(shard.file);
+  if (!entry) {
+    entry = { loaded: false };
+    entry.promise = fetchJson(new URL(shard.file, state.dataDir)).then((payload) => {
+      const decoded = decodeShard(payload);
+      entry.loaded = true;
+      onShardLoaded(shard, decoded);
+    });
+    state.shards.set(shard.file, entry);
+  }
+  return entry.promise;
+}
+
+function requestShards(shards) {
+  shards.forEach((shard) =>
+    loadShard(shard).catch((err) => {
+      state.shards.delete(shard.file);
+      console.error(err);
+    })
+  );
+}
+
 async function boot() {
-  const res = await fetch("assets/data.json", { cache: "no-store" });
-  if (!res.ok) throw new Error(`无法加载数据: ${res.status}`);
-  state.data = await res.json();
+  const manifestUrl = new URL($('meta[name="data-manifest"]')?.content || DEFAULT_MANIFEST, document.baseURI);
+  state.dataDir = new URL(".", manifestUrl);
+  state.manifest = await fetchJson(manifestUrl);
+  state.data = {
+    meta: state.manifest.meta,
+    documents: state.manifest.documents,
+    knowledge: [],
+    // Sparse until every shard has arrived; slots follow the manifest offsets.
+    questions: new Array(state.manifest.meta.question_count),
+  };
 
   loadProgress();
+  await Promise.all(getNeededShards().map(loadShard));
   bindTabEvents();
   bindSidebarEvents();
   bindKnowledgeEvents();
@@ -1023,13 +1468,44 @@ async function boot() {
   bindLibraryEvents();
   bindQuizActionEvents();
   bindProgressEvents();
+  window.addEventListener("scroll", scheduleWindowUpdate, { passive: true });
+  window.addEventListener("resize", scheduleWindowUpdate);
 
   $("#knowledgeSearch").value = state.ui.knowledgeSearch;
   $("#quizSearch").value = state.ui.quizSearch;
   $("#docSearch").value = state.ui.docSearch;
   $("#quizWrongOnly").checked = state.ui.quizWrongOnly;
+  $("#quizShowAll").checked = state.ui.quizShowAll;
 
+  state.ready = true;
   renderAll();
+  requestShards([state.manifest.knowledge, ...state.manifest.questions]);
+  // Most visits never search: the index is fetched once a search box is used,
+  // and searches scan until it arrives.
+  ["#knowledgeSearch", "#quizSearch"].forEach((selector) => {
+    $(selector).addEventListener("focus", loadSearchIndex);
+    $(selector).addEventListener("input", loadSearchIndex);
+  });
+  if (state.ui.knowledgeSearch || state.ui.quizSearch) loadSearchIndex();
+  registerServiceWorker();
+}
+
+function registerServiceWorker() {
+  if (!("serviceWorker" in navigator)) return;
+  navigator.serviceWorker.register("sw.js").catch((err) => console.warn("service worker unavailable", err));
+}
+
+function loadSearchIndex() {
+  if (state.searchIndexRequest) return state.searchIndexRequest;
+  // Rankings are the same with or without the index, so nothing re-renders.
+  state.searchIndexRequest = fetchJson(new URL(state.manifest.index.file, state.dataDir))
+    .then((index) => {
+      state.searchIndex = index;
+    })
+    .catch((err) => {
+      console.warn("search index unavailable, using full scan", err);
+    });
+  return state.searchIndexRequest;
 }
 
 boot().catch((err) => {
@@ -1037,7 +1513,7 @@ boot().catch((err) => {
   document.body.innerHTML = `
     <main style="padding:24px; font-family: sans-serif;">
       <h1>页面加载失败</h1>
-      <p>请检查 <code>docs/assets/data.json</code> 是否存在且格式正确。</p>
+      <p>请检查 <code>docs/assets/data/</code> 下的数据文件是否存在且格式正确。</p>
       <pre>${escapeHtml(String(err.message || err))}</pre>
     </main>
   `;
@@ -0,0 +1,447 @@
+(() => {
+  const setupTocDrawer = () => {
+    const btn = document.getElementById("tocFloatBtn");
+    const drawer = document.getElementById("tocDrawer");
+    if (!btn || !drawer) return;
+
+    const closeDrawer = () => {
+      drawer.hidden = true;
+      btn.setAttribute("aria-expanded", "false");
+      document.body.classList.remove("toc-open");
+    };
+
+    const openDrawer = () => {
+      drawer.hidden = false;
+      btn.setAttribute("aria-expanded", "true");
+      document.body.classList.add("toc-open");
+    };
+
+    btn.addEventListener("click", () => {
+      if (drawer.hidden) openDrawer();
+      else closeDrawer();
+    });
+
+    drawer.addEventListener("click", (event) => {
+      const closeBtn = event.target.closest("[data-action='close-toc']");
+      if (closeBtn) {
+        closeDrawer();
+        return;
+      }
+      const tocLink = event.target.closest("a[href^='#']");
+      if (tocLink) closeDrawer();
+    });
+
+    document.addEventListener("keydown", (event) => {
+      if (event.key === "Escape") closeDrawer();
+    });
+  };
+
+  // Chunked readers hold the first chunk inline and an empty section with a
+  // data-src for each further chunk. Chunks are inserted in order, so every
+  // chunk above a loaded one is loaded too and new content never lands above
+  // the reader's position. A page that is not chunked is one loaded chunk.
+  const setupChunks = (root) => {
+    const sections = root ? Array.from(root.querySelectorAll(".doc-chunk")) : [];
+    const chunks = sections.length ? sections : root ? [root] : [];
+    const requests = new Map();
+    const listeners = new Set();
+
+    const isLoaded = (index) => !chunks[index].dataset.src;
+
+    const request = (index) => {
+      if (isLoaded(index)) return Promise.resolve(null);
+      if (!requests.has(index)) {
+        const pending = fetch(chunks[index].dataset.src)
+          .then((res) => {
+            if (!res.ok) throw new Error(`HTTP ${res.status}`);
+            return res.text();
+          })
+          .catch((err) => {
+            requests.delete(index);
+            throw err;
+          });
+        requests.set(index, pending);
+      }
+      return requests.get(index);
+    };
+
+    const loadThrough = async (index) => {
+      const last = Math.min(index, chunks.length - 1);
+      const texts = await Promise.all(chunks.slice(0, last + 1).map((_, i) => request(i)));
+      for (let i = 0; i <= last; i += 1) {
+        if (isLoaded(i)) continue;
+        chunks[i].innerHTML = texts[i];
+        chunks[i].removeAttribute("data-src");
+        listeners.forEach((listener) => listener(i));
+      }
+    };
+
+    const chunkOf = (id) =>
+      chunks.findIndex((chunk) => (chunk.dataset.anchors || "").split(" ").includes(id));
+
+    // Scrolls to an anchor, loading its chunk first; false if the browser can
+    // handle it (or nobody can).
+    const goTo = (id) => {
+      if (!id || document.getElementById(id)) return false;
+      const index = chunkOf(id);
+      if (index < 0) return false;
+      loadThrough(index)
+        .then(() => {
+          const target = document.getElementById(id);
+          if (target) target.scrollIntoView();
+        })
+        .catch((err) => console.warn("chunk unavailable", err));
+      return true;
+    };
+
+    const pending = chunks.filter((chunk) => chunk.dataset.src);
+    if (pending.length) {
+      if ("IntersectionObserver" in window) {
+        const observer = new IntersectionObserver(
+          (entries) => {
+            entries.forEach((entry) => {
+              if (!entry.isIntersecting) return;
+              observer.unobserve(entry.target);
+              loadThrough(chunks.indexOf(entry.target)).catch((err) => {
+                console.warn("chunk unavailable", err);
+                observer.observe(entry.target);
+              });
+            });
+          },
+          { rootMargin: "1200px 0px" }
+        );
+        pending.forEach((chunk) => observer.observe(chunk));
+      } else {
+        loadThrough(chunks.length - 1).catch((err) => console.warn("chunk unavailable", err));
+      }
+
+      document.addEventListener("click", (event) => {
+        const link = event.target.closest("a[href^='#']");
+        if (!link) return;
+        const href = link.getAttribute("href");
+        if (goTo(decodeURIComponent(href.slice(1)))) {
+          event.preventDefault();
+          history.pushState(null, "", href);
+        }
+      });
+      window.addEventListener("hashchange", () => goTo(decodeURIComponent(location.hash.slice(1))));
+      goTo(decodeURIComponent(location.hash.slice(1)));
+    }
+
+    return {
+      count: chunks.length,
+      section: (index) => chunks[index],
+      isLoaded,
+      loadThrough,
+      onLoad: (listener) => {
+        listeners.add(listener);
+        return () => listeners.delete(listener);
+      },
+    };
+  };
+
+  // Must match SEARCH_BLOCK_RE in tools/build_web_docs.py.
+  const SEARCH_BLOCKS = "h1,h2,h3,p,li,pre";
+
+  // Lowercase without changing the length, like fold_case() at build time.
+  const foldCase = (text) =>
+    Array.from(text, (ch) => {
+      const lower = ch.toLowerCase();
+      return Array.from(lower).length === 1 ? lower : ch;
+    }).join("");
+
+  const createMark = (text) => {
+    const mark = document.createElement("mark");
+    mark.className = "doc-search-hit";
+    mark.textContent = text;
+    return mark;
+  };
+
+  const setupDocSearch = (root, chunks) => {
+    const input = document.getElementById("docSearchInput");
+    const runBtn = document.getElementById("docSearchRun");
+    const prevBtn = document.getElementById("docSearchPrev");
+    const nextBtn = document.getElementById("docSearchNext");
+    const clearBtn = document.getElementById("docSearchClear");
+    const meta = document.getElementById("docSearchMeta");
+    if (!root || !input || !runBtn || !prevBtn || !nextBtn || !clearBtn || !meta) return;
+
+    // A result set knows its hit count, returns the <mark> of a hit (marking
+    // it up first if needed) and removes its markup again.
+    const NO_RESULTS = { count: 0, markAt: () => null, clear: () => {} };
+    let results = NO_RESULTS;
+    let activeIndex = -1;
+    let activeMark = null;
+    let searchRun = 0;
+    let indexPromise = null;
+
+    const escapeRegExp = (text) => String(text).replace(/[.*+?^$()|[\]\\{}]/g, "\\$&");
+    const updateMeta = () => {
+      meta.textContent = `${results.count ? activeIndex + 1 : 0}/${results.count}`;
+    };
+
+    // Search blocks of a loaded chunk, in document order.
+    const chunkBlocks = new Map();
+    const blocksOf = (chunk) => {
+      if (!chunkBlocks.has(chunk)) {
+        chunkBlocks.set(chunk, Array.from(chunks.section(chunk).querySelectorAll(SEARCH_BLOCKS)));
+      }
+      return chunkBlocks.get(chunk);
+    };
+
+    const loadIndex = () => {
+      if (!indexPromise) {
+        const url = root.dataset.searchIndex;
+        indexPromise = (url ? fetch(url).then((res) => (res.ok ? res.json() : null)) : Promise.resolve(null))
+          .then((data) => {
+            if (!data || !Array.isArray(data.offsets) || !Array.isArray(data.chunks)) return null;
+            const starts = data.chunks;
+            // An index from another build cannot be mapped onto this page.
+            if (starts.length !== chunks.count) return null;
+            for (let chunk = 0; chunk < chunks.count; chunk += 1) {
+              const end = chunk + 1 < starts.length ? starts[chunk + 1] : data.offsets.length;
+              if (chunks.isLoaded(chunk) && blocksOf(chunk).length !== end - starts[chunk]) return null;
+            }
+            return { text: data.text, offsets: data.offsets, starts };
+          })
+          .catch(() => null);
+      }
+      return indexPromise;
+    };
+
+    const blockAt = (offsets, position) => {
+      let lo = 0;
+      let hi = offsets.length - 1;
+      while (lo < hi) {
+        const mid = (lo + hi + 1) >> 1;
+        if (offsets[mid] <= position) lo = mid;
+        else hi = mid - 1;
+      }
+      return lo;
+    };
+
+    const searchIndex = (index, keyword) => {
+      const needle = foldCase(keyword);
+      const hits = [];
+      const hitsByBlock = new Map();
+      for (let pos = index.text.indexOf(needle); pos >= 0; pos = index.text.indexOf(needle, pos + needle.length)) {
+        const block = blockAt(index.offsets, pos);
+        if (!hitsByBlock.has(block)) hitsByBlock.set(block, []);
+        hitsByBlock.get(block).push(hits.length);
+        hits.push({ block, start: pos - index.offsets[block] });
+      }
+
+      const chunkOfBlock = (block) => blockAt(index.starts, block);
+      const elementOf = (block) => {
+        const chunk = chunkOfBlock(block);
+        return blocksOf(chunk)[block - index.starts[chunk]];
+      };
+
+      const marked = new Map();
+      let observer = null;
+      const markBlock = (block) => {
+        if (marked.has(block)) return marked.get(block);
+        const el = elementOf(block);
+        const text = el.textContent || "";
+        const frag = document.createDocumentFragment();
+        const marks = new Map();
+        let last = 0;
+        hitsByBlock.get(block).forEach((hit) => {
+          const { start } = hits[hit];
+          if (start > last) frag.appendChild(document.createTextNode(text.slice(last, start)));
+          const mark = createMark(text.slice(start, start + needle.length));
+          marks.set(hit, mark);
+          frag.appendChild(mark);
+          last = start + needle.length;
+        });
+        if (last < text.length) frag.appendChild(document.createTextNode(text.slice(last)));
+        el.replaceChildren(frag);
+        if (observer) observer.unobserve(el);
+        const entry = { text, marks };
+        marked.set(block, entry);
+        return entry;
+      };
+
+      // Only blocks that scroll into view (or hold the active hit) are marked
+      // up; blocks of chunks that are not loaded yet join when they load.
+      let stopWatching = () => {};
+      if (hits.length && "IntersectionObserver" in window) {
+        const blockOf = new Map();
+        observer = new IntersectionObserver(
+          (entries) => {
+            entries.forEach((entry) => {
+              if (entry.isIntersecting) markBlock(blockOf.get(entry.target));
+            });
+          },
+          { rootMargin: "200px 0px" }
+        );
+        const watchChunk = (chunk) => {
+          hitsByBlock.forEach((_, block) => {
+            if (chunkOfBlock(block) !== chunk) return;
+            const el = elementOf(block);
+            blockOf.set(el, block);
+            observer.observe(el);
+          });
+        };
+        for (let chunk = 0; chunk < chunks.count; chunk += 1) {
+          if (chunks.isLoaded(chunk)) watchChunk(chunk);
+        }
+        stopWatching = chunks.onLoad(watchChunk);
+      }
+
+      return {
+        count: hits.length,
+        markAt: async (hit) => {
+          const { block } = hits[hit];
+          await chunks.loadThrough(chunkOfBlock(block));
+          return markBlock(block).marks.get(hit);
+        },
+        clear: () => {
+          stopWatching();
+          if (observer) observer.disconnect();
+          marked.forEach(({ text }, block) => {
+            elementOf(block).textContent = text;
+          });
+        },
+      };
+    };
+
+    // Fallback when the index cannot be loaded (e.g. pages opened from disk).
+    const searchDom = (keyword) => {
+      const regex = new RegExp(escapeRegExp(keyword), "gi");
+      const walker = document.createTreeWalker(root, NodeFilter.SHOW_TEXT, {
+        acceptNode(node) {
+          if (!node.nodeValue || !node.nodeValue.trim()) return NodeFilter.FILTER_REJECT;
+          const parent = node.parentElement;
+          if (!parent) return NodeFilter.FILTER_REJECT;
+          if (parent.closest("script,style,mark")) return NodeFilter.FILTER_REJECT;
+          return NodeFilter.FILTER_ACCEPT;
+        },
+      });
+
+      const textNodes = [];
+      while (walker.nextNode()) {
+        textNodes.push(walker.currentNode);
+      }
+
+      textNodes.forEach((node) => {
+        const text = node.nodeValue || "";
+        regex.lastIndex = 0;
+        if (!regex.test(text)) return;
+        regex.lastIndex = 0;
+
+        const frag = document.createDocumentFragment();
+        let last = 0;
+        text.replace(regex, (match, offset) => {
+          if (offset > last) {
+            frag.appendChild(document.createTextNode(text.slice(last, offset)));
+          }
+          frag.appendChild(createMark(match));
+          last = offset + match.length;
+          return match;
+        });
+        if (last < text.length) {
+          frag.appendChild(document.createTextNode(text.slice(last)));
+        }
+        node.replaceWith(frag);
+      });
+
+      const marks = Array.from(root.querySelectorAll("mark.doc-search-hit"));
+      return {
+        count: marks.length,
+        markAt: (hit) => marks[hit],
+        clear: () => {
+          marks.forEach((mark) => mark.replaceWith(document.createTextNode(mark.textContent || "")));
+          root.normalize();
+        },
+      };
+    };
+
+    const clearMarks = () => {
+      searchRun += 1;
+      results.clear();
+      results = NO_RESULTS;
+      activeIndex = -1;
+      activeMark = null;
+      updateMeta();
+    };
+
+    const setActive = async (index) => {
+      if (!results.count) {
+        activeIndex = -1;
+        updateMeta();
+        return;
+      }
+      const current = results;
+      const next = ((index % current.count) + current.count) % current.count;
+      const mark = await Promise.resolve(current.markAt(next)).catch((err) => {
+        console.warn("chunk unavailable", err);
+        return null;
+      });
+      if (!mark || current !== results) return;
+      if (activeMark) activeMark.classList.remove("doc-search-hit-active");
+      activeIndex = next;
+      activeMark = mark;
+      activeMark.classList.add("doc-search-hit-active");
+      activeMark.scrollIntoView({ behavior: "smooth", block: "center" });
+      updateMeta();
+    };
+
+    const runSearch = async () => {
+      const keyword = input.value.trim();
+      clearMarks();
+      if (!keyword) return;
+
+      const run = searchRun;
+      const index = await loadIndex();
+      // Without the index every chunk has to be in the page to be searched.
+      if (!index) await chunks.loadThrough(chunks.count - 1).catch((err) => console.warn("chunk unavailable", err));
+      // A newer search or a clear started while loading.
+      if (run !== searchRun) return;
+      results = index ? searchIndex(index, keyword) : searchDom(keyword);
+      if (results.count) setActive(0);
+      else updateMeta();
+    };
+
+    runBtn.addEventListener("click", runSearch);
+    prevBtn.addEventListener("click", () => {
+      if (!results.count) {
+        runSearch();
+        return;
+      }
+      setActive(activeIndex - 1);
+    });
+    nextBtn.addEventListener("click", () => {
+      if (!results.count) {
+        runSearch();
+        return;
+      }
+      setActive(activeIndex + 1);
+    });
+    clearBtn.addEventListener("click", () => {
+      input.value = "";
+      clearMarks();
+      input.focus();
+    });
+    input.addEventListener("focus", loadIndex, { once: true });
+    input.addEventListener("keydown", (event) => {
+      if (event.key === "Enter") {
+        event.preventDefault();
+        runSearch();
+      }
+    });
+    input.addEventListener("input", () => {
+      if (!input.value.trim()) clearMarks();
+    });
+
+    updateMeta();
+  };
+
+  const root = document.querySelector(".doc-content");
+  setupTocDrawer();
+  setupDocSearch(root, setupChunks(root));
+
+  if ("serviceWorker" in navigator) {
+    navigator.serviceWorker.register("../sw.js").catch((err) => console.warn("service worker unavailable", err));
+  }
+})();
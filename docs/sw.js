@@ -0,0 +1,111 @@
+// Generated by tools/build_assets.py; do not edit.
+const VERSION = "2c32cdd96e";
+const PRECACHE = [
+  "index.html",
+  "readers/doc-1.html",
+  "readers/doc-3.html",
+  "assets/app.54c2437b3a.js",
+  "assets/data/knowledge.476f765b56.json",
+  "assets/data/manifest.8ba88262db.json",
+  "assets/data/questions-a.dff1bd45e8.json",
+  "assets/data/questions-b.2592d34412.json",
+  "assets/data/questions-c.8a687e0b78.json",
+  "assets/data/questions-d.654d32ce88.json",
+  "assets/data/questions-e.6e1a008034.json",
+  "assets/data/questions-f.1806a540f6.json",
+  "assets/reader.1deba1ccfc.css",
+  "assets/reader.62dbb7c777.js",
+  "assets/styles.e2f2eea1c4.css",
+  "readers/doc-1.search.5290dda893.json",
+  "readers/doc-3.search.fd110355b6.json",
+  "readers/parts/doc-1-1.afc1b22630.html",
+  "readers/parts/doc-1-2.e5c918dcbf.html"
+];
+// Current files that are fetched when first needed and kept once fetched.
+const ON_DEMAND = [
+  "assets/data/search-index.b6d4b67c5f.json"
+];
+// The data directories of all courses, relative to the scope.
+const DATA_DIRS = ["assets/data/"];
+const PRECACHE_NAME = `sms-precache-${VERSION}`;
+const RUNTIME_NAME = "sms-runtime";
+const FONT_HOSTS = ["fonts.googleapis.com", "fonts.gstatic.com"];
+
+self.addEventListener("install", (event) => {
+  event.waitUntil(
+    caches.open(PRECACHE_NAME).then((cache) => cache.addAll(PRECACHE.map((url) => new Request(url, { cache: "reload" }))))
+  );
+});
+
+self.addEventListener("activate", (event) => {
+  event.waitUntil(
+    (async () => {
+      const keys = await caches.keys();
+      await Promise.all(
+        keys.filter((key) => key.startsWith("sms-precache-") && key !== PRECACHE_NAME).map((key) => caches.delete(key))
+      );
+      // Data responses of earlier versions are no longer referenced.
+      const current = new Set([...PRECACHE, ...ON_DEMAND].map((url) => new URL(url, self.registration.scope).href));
+      const runtime = await caches.open(RUNTIME_NAME);
+      const requests = await runtime.keys();
+      await Promise.all(
+        requests
+          .filter((request) => isData(new URL(request.url)) && !current.has(request.url))
+          .map((request) => runtime.delete(request))
+      );
+      await self.clients.claim();
+    })()
+  );
+});
+
+function staleWhileRevalidate(event) {
+  const { request } = event;
+  const network = fetch(request).then(async (response) => {
+    if (response.ok || response.type === "opaque") {
+      const cache = await caches.open(RUNTIME_NAME);
+      await cache.put(request, response.clone());
+    }
+    return response;
+  });
+  event.waitUntil(network.catch(() => undefined));
+  return caches.match(request).then((cached) => cached || network);
+}
+
+function isData(url) {
+  const scope = new URL(self.registration.scope).pathname;
+  return DATA_DIRS.some((dir) => url.pathname.startsWith(scope + dir));
+}
+
+async function precacheFirst(request, url) {
+  const cache = await caches.open(PRECACHE_NAME);
+  const key = url.pathname.endsWith("/") ? new URL("index.html", url).href : request;
+  const cached = await cache.match(key, { ignoreSearch: true });
+  if (cached) return cached;
+  try {
+    return await fetch(request);
+  } catch (err) {
+    // Offline navigation to a page outside the precache lands on the start page.
+    const fallback = request.mode === "navigate" ? await cache.match("index.html") : null;
+    if (fallback) return fallback;
+    throw err;
+  }
+}
+
+self.addEventListener("fetch", (event) => {
+  const { request } = event;
+  if (request.method !== "GET") return;
+  const url = new URL(request.url);
+
+  if (FONT_HOSTS.includes(url.hostname)) {
+    event.respondWith(staleWhileRevalidate(event));
+    return;
+  }
+  const scope = new URL(self.registration.scope);
+  if (url.origin !== scope.origin || !url.pathname.startsWith(scope.pathname)) return;
+
+  if (isData(url)) {
+    event.respondWith(staleWhileRevalidate(event));
+    return;
+  }
+  event.respondWith(precacheFirst(request, url));
+});
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import build_web_data
+import build_web_docs
+import tex_clean
+import tex_ir
+from bench_corpus import KNOWLEDGE_NAME, PRACTICE_NAME, SyntheticCourse, bundled_layout, synthetic_course
+from build_cache import CACHE_DIR
+
+# Times the parsing stages of build_web_data.py and build_web_docs.py on
+# synthetic courses (see bench_corpus.py) and compares them with a saved
+# baseline. Timings are machine-specific, so the baseline lives in the build
+# cache unless --baseline points elsewhere.
+
+DEFAULT_BASELINE = CACHE_DIR / "bench-baseline.json"
+# Differences below this many seconds are timer noise at small scales.
+NOISE_FLOOR = 0.005
+
+Stage = Tuple[Callable[[], object], int]
+
+
+def best_of(fn: Callable[[], object], rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def peak_memory(fn: Callable[[], object]) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def size_of(texts: List[str]) -> int:
+    return sum(len(text.encode("utf-8")) for text in texts)
+
+
+def record_clean_inputs(course: SyntheticCourse) -> List[str]:
+    inputs: List[str] = []
+
+    def recording_clean_tex(s: str) -> str:
+        inputs.append(s)
+        return tex_clean.clean_tex(s)
+
+    build_web_data.clean_tex = recording_clean_tex
+    try:
+        build_web_data.scan_question_bank(course.files[PRACTICE_NAME])
+        build_web_data.parse_knowledge(course.files[KNOWLEDGE_NAME])
+    finally:
+        build_web_data.clean_tex = tex_clean.clean_tex
+    return inputs
+
+
+def check_course(course: SyntheticCourse) -> None:
+    found = build_web_data.scan_question_bank(course.files[PRACTICE_NAME])
+    counts = {key: len(items) for key, items in found.items()}
+    if counts != course.questions:
+        raise SystemExit(f"x{course.scale}: parsed {counts}, generated {course.questions}")
+    if not build_web_data.parse_knowledge(course.files[KNOWLEDGE_NAME]):
+        raise SystemExit(f"x{course.scale}: no knowledge points parsed")
+
+
+def stages(course: SyntheticCourse) -> Dict[str, Stage]:
+    practice = course.files[PRACTICE_NAME]
+    practice_document = tex_ir.parse_document(practice)
+    clean_inputs = record_clean_inputs(course)
+    docs = list(course.files.items())
+    # The docs stages run on the output of the stage before them.
+    bodies = [tex_ir.extract_document_body(text) for _, text in docs]
+    preprocessed = [tex_ir.preprocess(text) for _, text in docs]
+    documents = [tex_ir.parse_document(text) for _, text in docs]
+    return {
+        "clean_tex": (lambda: [tex_clean.clean_tex(s) for s in clean_inputs], size_of(clean_inputs)),
+        "question_bank": (lambda: build_web_data.question_bank(practice_document), size_of([practice])),
+        "scan_question_bank": (lambda: build_web_data.scan_question_bank(practice), size_of([practice])),
+        "parse_knowledge": (
+            lambda: build_web_data.parse_knowledge(course.files[KNOWLEDGE_NAME]),
+            size_of([course.files[KNOWLEDGE_NAME]]),
+        ),
+        "convert_longtable_blocks": (
+            lambda: [tex_ir.convert_longtable_blocks(body, tex_ir.QuestionRows()) for body in bodies],
+            size_of(bodies),
+        ),
+        "preprocess": (
+            lambda: [tex_ir.preprocess(text) for _, text in docs],
+            size_of([text for _, text in docs]),
+        ),
+        "parse_blocks": (
+            lambda: [list(tex_ir.parse_blocks(text.splitlines())) for text in preprocessed],
+            size_of(preprocessed),
+        ),
+        "render_html": (
+            lambda: [build_web_docs.parse_to_html(document, build_web_docs.SRC_DIR) for document in documents],
+            size_of(preprocessed),
+        ),
+    }
+
+
+def is_slower(seconds: float, saved: float, tolerance: float) -> bool:
+    return seconds - saved > NOISE_FLOOR and seconds > saved * (1 + tolerance)
+
+
+def measure(
+    scale: int, seed: int, rounds: int, layout: Dict, saved: Dict[str, Dict[str, float]], tolerance: float
+) -> Dict[str, Dict[str, float]]:
+    course = synthetic_course(scale, seed, layout)
+    check_course(course)
+    corpus = size_of(list(course.files.values()))
+    print(f"x{scale}: {corpus / 1_000_000:.2f} MB, {sum(course.questions.values())} questions")
+    results = {}
+    for name, (fn, size) in stages(course).items():
+        seconds = best_of(fn, rounds)
+        if name in saved and is_slower(seconds, saved[name]["seconds"], tolerance):
+            # Retime before reporting; a busy machine can slow one batch of rounds.
+            seconds = min(seconds, best_of(fn, rounds * 2))
+        peak = peak_memory(fn)
+        results[name] = {"bytes": size, "seconds": seconds, "mb_per_s": size / 1_000_000 / seconds, "peak_mb": peak / 1_000_000}
+        print(f"  {name:<26} {seconds * 1000:10.2f} ms {size / 1_000_000 / seconds:8.2f} MB/s  peak {peak / 1_000_000:8.2f} MB")
+    return results
+
+
+def regressions(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    found = []
+    for scale, stage_results in results.items():
+        for name, current in stage_results.items():
+            saved = baseline.get("results", {}).get(scale, {}).get(name)
+            if saved is None:
+                continue
+            if is_slower(current["seconds"], saved["seconds"], tolerance):
+                found.append(
+                    f"x{scale} {name}: {saved['seconds'] * 1000:.2f} ms -> {current['seconds'] * 1000:.2f} ms"
+                    f" (+{current['seconds'] / saved['seconds'] - 1:.0%})"
+                )
+            if current["peak_mb"] > saved["peak_mb"] * (1 + tolerance) + 1:
+                found.append(f"x{scale} {name}: peak {saved['peak_mb']:.2f} MB -> {current['peak_mb']:.2f} MB")
+    return found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the build stages on synthetic courses.")
+    parser.add_argument("--scales", default="1,10", help="comma-separated multiples of the bundled course, e.g. 1,10,100,1000")
+    parser.add_argument("--rounds", type=int, default=5, help="timing rounds per stage (best is reported)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="baseline JSON to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results to --baseline instead of comparing")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown / memory growth (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    baseline = {}
+    if not args.save_baseline and args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    layout = bundled_layout()
+    results = {}
+    for scale in args.scales.split(","):
+        saved = baseline.get("results", {}).get(scale, {})
+        results[scale] = measure(int(scale), args.seed, args.rounds, layout, saved, args.tolerance)
+
+    if args.save_baseline:
+        data = {"version": 1, "python": platform.python_version(), "seed": args.seed, "results": results}
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+        print(f"Wrote {args.baseline}")
+        return
+    if not baseline:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one")
+        return
+    found = regressions(results, baseline, args.tolerance)
+    if found:
+        raise SystemExit("Regressions against the baseline:\n  " + "\n  ".join(found))
+    print(f"Within {args.tolerance:.0%} of {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
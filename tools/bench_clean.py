@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import re
+import time
+from typing import Callable, List, Tuple
+
+import build_web_data
+import build_web_docs
+import tex_clean
+import tex_ir
+
+
+# Reference implementations: the chained re.sub cleaners that tex_clean replaced.
+def legacy_clean_tex(s: str) -> str:
+    s = s.replace("\\n", "\n")
+    s = s.replace("\\%", "%")
+    s = s.replace("\\#", "#")
+    s = s.replace("\\_", "_")
+    s = re.sub(r"\\texttt\{([^{}]*)\}", r"\1", s)
+    s = re.sub(r"\\mystrong\{([^{}]*)\}", r"\1", s)
+    s = re.sub(r"\\textbf\{([^{}]*)\}", r"\1", s)
+    s = re.sub(r"\\chapter\{([^{}]*)\}", r"\1", s)
+    s = re.sub(r"\\section\{([^{}]*)\}", r"\1", s)
+    s = s.replace("$\\leq67$", "≤67")
+    s = s.replace("$\\leq 67$", "≤67")
+    s = s.replace("$>67$", ">67")
+    s = s.replace("$\\Rightarrow$", "=>")
+    s = re.sub(r"\\begin\{[^}]+\}", "", s)
+    s = re.sub(r"\\end\{[^}]+\}", "", s)
+    s = re.sub(r"\\item\s*", "- ", s)
+    s = re.sub(r"\\par", "\n", s)
+    s = re.sub(r"\\[a-zA-Z]+", "", s)
+    s = s.replace("{", "").replace("}", "")
+    s = re.sub(r"\s*\$\$\s*", " → ", s)
+    s = re.sub(r"\$([^$]+)\$", r"\1", s)
+    s = s.replace("=>", "→")
+    s = re.sub(r"\s+", " ", s)
+    return s.strip()
+
+
+def legacy_clean_math(expr: str) -> str:
+    s = expr
+    s = s.replace(r"\leq", "≤")
+    s = s.replace(r"\geq", "≥")
+    s = s.replace(r"\Rightarrow", "=>")
+    s = s.replace(r"\rightarrow", "→")
+    s = s.replace(r"\leftarrow", "←")
+    s = s.replace(r"\%", "%")
+    s = s.replace("{", "").replace("}", "")
+    s = re.sub(r"\\[a-zA-Z]+", "", s)
+    s = re.sub(r"\s+", " ", s)
+    return s.strip()
+
+
+def legacy_clean_inline(text: str, collapse_whitespace: bool = True) -> str:
+    s = text
+    s = s.replace("\\%", "%")
+    s = s.replace("\\#", "#")
+    s = s.replace("\\_", "_")
+    s = s.replace("\\&", "&")
+    s = s.replace("~", " ")
+    s = s.replace("\\par", " ")
+    s = s.replace("\\\\", " ")
+
+    s = re.sub(r"\\ansline\{([^{}]*)\}", r"答案：\1", s)
+    s = re.sub(r"\\expline\{([^{}]*)\}", r"解释：\1", s)
+    s = re.sub(r"\\coverline\{([^{}]*)\}", r"\1", s)
+
+    wrappers = ["textbf", "mystrong", "texttt", "ansbadge", "emph", "underline"]
+    changed = True
+    while changed:
+        changed = False
+        for cmd in wrappers:
+            pattern = rf"\\{cmd}\{{([^{{}}]*)\}}"
+            new = re.sub(pattern, r"\1", s)
+            if new != s:
+                s = new
+                changed = True
+
+    s = re.sub(r"\$([^$]+)\$", lambda m: legacy_clean_math(m.group(1)), s)
+
+    s = re.sub(r"\\vspace\*?\{[^{}]*\}", " ", s)
+    s = re.sub(r"\\fontsize\{[^{}]*\}\{[^{}]*\}", " ", s)
+    s = re.sub(r"\\color\{[^{}]*\}", " ", s)
+
+    s = re.sub(r"\\[a-zA-Z]+\*?(?:\[[^\]]*\])?", " ", s)
+    s = s.replace("{", "").replace("}", "")
+
+    if collapse_whitespace:
+        s = re.sub(r"\s+", " ", s)
+    return s.strip()
+
+
+def record_inputs() -> Tuple[List[str], List[Tuple[str, bool]]]:
+    tex_inputs: List[str] = []
+    inline_inputs: List[Tuple[str, bool]] = []
+
+    def recording_clean_tex(s: str) -> str:
+        tex_inputs.append(s)
+        return tex_clean.clean_tex(s)
+
+    def recording_clean_inline(text: str, collapse_whitespace: bool = True) -> str:
+        inline_inputs.append((text, collapse_whitespace))
+        return tex_clean.clean_inline(text, collapse_whitespace)
+
+    build_web_data.clean_tex = recording_clean_tex
+    tex_ir.clean_inline = recording_clean_inline
+    try:
+        practice_tex = (build_web_data.SRC / "practice_with_brain_science.tex").read_text(encoding="utf-8")
+        knowledge_tex = (build_web_data.SRC / "knowledge_points_full.tex").read_text(encoding="utf-8")
+        build_web_data.scan_question_bank(practice_tex)
+        build_web_data.parse_knowledge(knowledge_tex)
+        for spec in build_web_docs.DOC_SPECS:
+            tex_ir.parse_document(build_web_docs.read_tex(spec.source_path))
+    finally:
+        build_web_data.clean_tex = tex_clean.clean_tex
+        tex_ir.clean_inline = tex_clean.clean_inline
+    return tex_inputs, inline_inputs
+
+
+def best_of(fn: Callable[[], object], rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def report(label: str, legacy: float, current: float, size: int) -> None:
+    mb = size / 1_000_000
+    print(
+        f"{label:<24} legacy {legacy * 1000:9.2f} ms ({mb / legacy:6.2f} MB/s)"
+        f" | tex_clean {current * 1000:9.2f} ms ({mb / current:6.2f} MB/s) | x{legacy / current:.2f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark tex_clean against the legacy re.sub chains.")
+    parser.add_argument("--rounds", type=int, default=5, help="timing rounds per case (best is reported)")
+    parser.add_argument("--scale", type=int, default=50, help="join factor for the long-string cases")
+    args = parser.parse_args()
+
+    tex_inputs, inline_inputs = record_inputs()
+
+    mismatches = sum(legacy_clean_tex(s) != tex_clean.clean_tex(s) for s in tex_inputs)
+    mismatches += sum(legacy_clean_inline(s, c) != tex_clean.clean_inline(s, c) for s, c in inline_inputs)
+    print(f"Recorded {len(tex_inputs)} clean_tex and {len(inline_inputs)} clean_inline calls; mismatches: {mismatches}")
+    if mismatches:
+        raise SystemExit("tex_clean output differs from the legacy cleaners")
+
+    tex_size = sum(len(s.encode("utf-8")) for s in tex_inputs)
+    inline_size = sum(len(s.encode("utf-8")) for s, _ in inline_inputs)
+    report(
+        "clean_tex (calls)",
+        best_of(lambda: [legacy_clean_tex(s) for s in tex_inputs], args.rounds),
+        best_of(lambda: [tex_clean.clean_tex(s) for s in tex_inputs], args.rounds),
+        tex_size,
+    )
+    report(
+        "clean_inline (calls)",
+        best_of(lambda: [legacy_clean_inline(s, c) for s, c in inline_inputs], args.rounds),
+        best_of(lambda: [tex_clean.clean_inline(s, c) for s, c in inline_inputs], args.rounds),
+        inline_size,
+    )
+
+    long_tex = "\n".join(tex_inputs) * args.scale
+    long_inline = " ".join(s for s, _ in inline_inputs) * args.scale
+    report(
+        f"clean_tex (x{args.scale} blob)",
+        best_of(lambda: legacy_clean_tex(long_tex), args.rounds),
+        best_of(lambda: tex_clean.clean_tex(long_tex), args.rounds),
+        len(long_tex.encode("utf-8")),
+    )
+    report(
+        f"clean_inline (x{args.scale} blob)",
+        best_of(lambda: legacy_clean_inline(long_inline), args.rounds),
+        best_of(lambda: tex_clean.clean_inline(long_inline), args.rounds),
+        len(long_inline.encode("utf-8")),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import random
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import build_web_data
+
+# Synthetic course sources in the dialect of output/src, for benchmarking the
+# build tools at sizes the bundled course does not reach. At scale 1 the
+# practice bank has the bundled number of rows per A–F卷 chapter and the two
+# books have the bundled number of chapters and sections at roughly the
+# bundled size; scale N multiplies all of them by N.
+
+PRACTICE_NAME = "practice_with_brain_science.tex"
+KNOWLEDGE_NAME = "knowledge_points_full.tex"
+ORIGINAL_NAME = "original_complete.tex"
+
+PREAMBLE = "\\documentclass[UTF8,12pt,openany]{ctexbook}\n\\usepackage{../style/sms_training_style}\n\n\\begin{document}\n"
+CHAPTER_TITLES = {
+    "A卷": "A卷：单项选择题（题答对照，左题右答）",
+    "B卷": "B卷：多项选择题（题答对照，左题右答）",
+    "C卷": "C卷：判断改错题（题答对照，左题右答）",
+    "D卷": "D卷：场景题与计算题（题答对照，左题右答）",
+    "E卷": "E卷：闪卡快问快答（题答对照）",
+    "F卷": "F卷：扩展消息类型专题（USSD/二进制短信/闪信）",
+}
+WORDS = [
+    "企业短信", "签名", "子端口", "主码号", "模板", "报备", "退订口径", "营销", "通道", "回执",
+    "状态报告", "成功率", "投诉", "黑名单", "频控", "计费", "长短信", "拆分", "国际短信", "落地",
+    "三网合一", "携号转网", "接口协议", "压测", "点测", "风控", "会员", "引流信息", "运营商", "对账",
+]
+# "@" stands for the word a snippet wraps.
+MARKUP = [
+    "\\texttt{【签名】}", "$\\leq 67$", "$>67$", "$\\rightarrow$", "100\\%", "\\mystrong{@}",
+    "\\textbf{@}", "\\texttt{@}", "$\\lceil126/67\\rceil=2$", "SP\\_ID",
+]
+LETTERS = "ABCD"
+
+
+@dataclass
+class SyntheticCourse:
+    scale: int
+    files: Dict[str, str]
+    questions: Dict[str, int]
+    sections: Dict[str, int]
+
+
+class Writer:
+    def __init__(self, seed: int) -> None:
+        self.rng = random.Random(seed)
+
+    def phrase(self, low: int, high: int) -> str:
+        parts = []
+        for _ in range(self.rng.randint(low, high)):
+            word = self.rng.choice(WORDS)
+            if self.rng.random() < 0.12:
+                word = self.rng.choice(MARKUP).replace("@", word)
+            parts.append(word)
+        return "".join(parts)
+
+    def sentence(self, low: int = 4, high: int = 12) -> str:
+        return self.phrase(low, high) + "。"
+
+    def paragraph(self) -> str:
+        return "".join(self.sentence() for _ in range(self.rng.randint(1, 4)))
+
+    def items(self, env: str) -> str:
+        rows = [f"  \\item \\mystrong{{{self.phrase(1, 2)}}}：{self.sentence()}" for _ in range(self.rng.randint(2, 5))]
+        return f"\\begin{{{env}}}\n" + "\n".join(rows) + f"\n\\end{{{env}}}"
+
+    def box(self, env: str) -> str:
+        return f"\\begin{{{env}}}\n" + "\n".join(self.sentence() for _ in range(self.rng.randint(1, 3))) + f"\n\\end{{{env}}}"
+
+    def table(self) -> str:
+        columns = self.rng.randint(2, 4)
+        spec = "".join(f"P{{0.{self.rng.randint(14, 40)}\\textwidth}}" for _ in range(columns))
+        header = " & ".join(f"\\mystrong{{{self.phrase(1, 2)}}}" for _ in range(columns))
+        rows = [" & ".join(self.phrase(1, 6) for _ in range(columns)) + " \\\\" for _ in range(self.rng.randint(2, 6))]
+        return (
+            f"\\begin{{longtable}}{{{spec}}}\n\\toprule\n{header} \\\\\n\\midrule\n"
+            + "\n".join(rows)
+            + "\n\\bottomrule\n\\end{longtable}"
+        )
+
+    def block(self) -> str:
+        roll = self.rng.random()
+        if roll < 0.4:
+            return self.paragraph()
+        if roll < 0.55:
+            return self.items("itemize")
+        if roll < 0.65:
+            return self.items("enumerate")
+        if roll < 0.75:
+            return self.box("keybox")
+        if roll < 0.82:
+            return self.box("riskbox")
+        return self.table()
+
+    def choice_row(self, n: int, multi: bool) -> str:
+        options = "".join(f"\\par \\textbf{{{letter}.}} {self.phrase(1, 3)}" for letter in LETTERS)
+        if multi:
+            answer = "".join(sorted(self.rng.sample(LETTERS, self.rng.randint(2, 4))))
+        else:
+            answer = self.rng.choice(LETTERS)
+        return f"\\textbf{{{n}.}} {self.phrase(3, 9)}：{options} & \\ansline{{{answer}}}\\par \\expline{{{self.sentence()}}} \\\\"
+
+    def plain_row(self, n: int, qtype: str) -> str:
+        if qtype == "truefalse":
+            verdict = self.rng.choice(["对", "错"])
+            return f"\\textbf{{{n}.}} “{self.sentence()}”（对/错，并改错） & {verdict}。{self.sentence()} \\\\"
+        if qtype == "flash":
+            return f"\\textbf{{{n}.}} {self.phrase(2, 5)}？ & {self.phrase(1, 3)}。 \\\\"
+        return f"\\textbf{{{n}.}} {self.paragraph()} & {self.paragraph()} \\\\"
+
+
+def rows_table(rows: List[str]) -> str:
+    return "\\begin{longtable}{P{0.64\\textwidth}P{0.3\\textwidth}}\n\\toprule\n" + "\n\\midrule\n".join(rows) + "\n\\bottomrule\n\\end{longtable}"
+
+
+def practice_tex(writer: Writer, counts: Dict[str, int]) -> str:
+    out = [PREAMBLE, "\\chapter{使用说明与复习节奏}", writer.items("itemize"), writer.table()]
+    for key, spec in build_web_data.QUESTION_CHAPTERS.items():
+        out.append(f"\\chapter{{{CHAPTER_TITLES[key]}}}")
+        multi = spec.qtype == "multiple"
+        if spec.qtype in build_web_data.CHOICE_TYPES:
+            out.append(rows_table([writer.choice_row(n, multi) for n in range(1, counts[key] + 1)]))
+        elif spec.qtype == "short":
+            # Numbering restarts in the second table, as in the bundled D卷.
+            half = counts[key] // 2
+            out.append("\\section{场景题}")
+            out.append(rows_table([writer.plain_row(n, spec.qtype) for n in range(1, half + 1)]))
+            out.append("\\section{计算题}")
+            out.append(rows_table([writer.plain_row(n, spec.qtype) for n in range(1, counts[key] - half + 1)]))
+        else:
+            out.append(rows_table([writer.plain_row(n, spec.qtype) for n in range(1, counts[key] + 1)]))
+    out += ["\\chapter{修订说明与版本记录}", writer.table(), "\\end{document}\n"]
+    return "\n\n".join(out)
+
+
+def book_tex(writer: Writer, chapters: int, sections: int, size: int) -> str:
+    # Sections are spread evenly over the chapters and filled with blocks
+    # until the book reaches roughly `size` bytes.
+    out = [PREAMBLE, "\\begin{titlepage}\n" + writer.box("keybox") + "\n\\end{titlepage}", "\\tableofcontents\n\\clearpage"]
+    emitted = 0
+    written = 0
+    for chapter in range(chapters):
+        out.append(f"\\chapter{{{writer.phrase(2, 4)}（{chapter + 1}）}}")
+        target = sections * (chapter + 1) // chapters
+        while emitted < target:
+            emitted += 1
+            out.append(f"\\section{{{writer.phrase(1, 3)}（{emitted}）}}")
+            block = writer.block()
+            while True:
+                written += len(block.encode("utf-8"))
+                out.append(block)
+                if written >= size * emitted // sections:
+                    break
+                block = writer.block()
+    out.append("\\end{document}\n")
+    return "\n\n".join(out)
+
+
+def bundled_layout() -> Dict[str, Dict[str, int]]:
+    practice = (build_web_data.SRC / PRACTICE_NAME).read_text(encoding="utf-8")
+    layout = {"questions": {key: len(items) for key, items in build_web_data.scan_question_bank(practice).items()}}
+    for name in (KNOWLEDGE_NAME, ORIGINAL_NAME):
+        path = build_web_data.SRC / name
+        text = path.read_text(encoding="utf-8")
+        layout[name] = {
+            "chapters": len(re.findall(r"\\chapter\{", text)),
+            "sections": len(re.findall(r"\\section\{", text)),
+            "size": path.stat().st_size,
+        }
+    return layout
+
+
+def synthetic_course(scale: int, seed: int = 0, layout: Optional[Dict[str, Dict[str, int]]] = None) -> SyntheticCourse:
+    layout = layout or bundled_layout()
+    writer = Writer(seed)
+    questions = {key: count * scale for key, count in layout["questions"].items()}
+    files = {PRACTICE_NAME: practice_tex(writer, questions)}
+    sections = {}
+    for name in (KNOWLEDGE_NAME, ORIGINAL_NAME):
+        spec = layout[name]
+        sections[name] = spec["sections"] * scale
+        files[name] = book_tex(writer, spec["chapters"] * scale, sections[name], spec["size"] * scale)
+    return SyntheticCourse(scale=scale, files=files, questions=questions, sections=sections)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write a synthetic course in the output/src dialect.")
+    parser.add_argument("--scale", type=int, default=10, help="multiple of the bundled course size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, required=True, help="directory for the generated .tex files")
+    args = parser.parse_args()
+
+    course = synthetic_course(args.scale, args.seed)
+    args.out.mkdir(parents=True, exist_ok=True)
+    for name, text in course.files.items():
+        (args.out / name).write_text(text, encoding="utf-8")
+        print(f"Wrote {args.out / name} ({len(text.encode('utf-8')) / 1_000_000:.2f} MB)")
+    print(f"Questions: {sum(course.questions.values())}; sections: {sum(course.sections.values())}")
+
+
+if __name__ == "__main__":
+    main()
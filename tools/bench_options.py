@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import string
+import time
+from typing import List, Tuple
+
+import build_web_data
+
+LABELS = string.ascii_uppercase[:8]
+
+
+# Reference implementation: the per-label regex search that split_options replaced.
+def legacy_split_options(qraw: str) -> Tuple[str, List[str]]:
+    qraw = qraw.strip()
+    stem = qraw
+    options = []
+    m = re.search(r"(.*?)\\par\s*\\textbf\{A\.\}", qraw, re.S)
+    if m:
+        stem = m.group(1).strip()
+        for label in ["A", "B", "C", "D"]:
+            mm = re.search(
+                rf"\\textbf\{{{label}\.\}}\s*(.*?)(?=\\par\s*\\textbf\{{[A-D]\.\}}|$)",
+                qraw,
+                re.S,
+            )
+            options.append(mm.group(1) if mm else "")
+    return stem, options
+
+
+def synthetic_bank(count: int, max_options: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    words = ["短信", "签名", "模板", "退订", "营销", "通道", "报备", "\\texttt{【签名】}", "$\\leq 67$", "回执"]
+    bank = []
+    for n in range(count):
+        stem = f"{n}. " + "".join(rng.choice(words) for _ in range(rng.randint(4, 12))) + "？"
+        options = [
+            f"\\par \\textbf{{{label}.}} " + "".join(rng.choice(words) for _ in range(rng.randint(1, 4)))
+            for label in LABELS[: rng.randint(2, max_options)]
+        ]
+        bank.append(stem + "".join(options))
+    return bank
+
+
+def best_of(fn, rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark split_options against the per-label regex search.")
+    parser.add_argument("--count", type=int, default=50_000, help="synthetic questions in the bank")
+    parser.add_argument("--rounds", type=int, default=3, help="timing rounds per case (best is reported)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    abcd = synthetic_bank(args.count, 4, args.seed)
+    wide = synthetic_bank(args.count, len(LABELS), args.seed)
+
+    # The legacy search always yields four slots and keeps trailing spaces;
+    # compare what both produce for A-D banks once whitespace is normalized.
+    mismatches = 0
+    for qraw in abcd:
+        stem, options = build_web_data.split_options(qraw)
+        legacy_stem, legacy_options = legacy_split_options(qraw)
+        options += [""] * (4 - len(options))
+        if stem != legacy_stem or [o.strip() for o in options] != [o.strip() for o in legacy_options]:
+            mismatches += 1
+    print(f"Synthetic bank: {args.count} questions (A-D); mismatches: {mismatches}")
+    if mismatches:
+        raise SystemExit("split_options output differs from the per-label search")
+
+    counts = [len(build_web_data.split_options(q)[1]) for q in wide]
+    print(f"Wide bank: {args.count} questions, {min(counts)}-{max(counts)} options (labels {LABELS[0]}-{LABELS[-1]})")
+
+    legacy = best_of(lambda: [legacy_split_options(q) for q in abcd], args.rounds)
+    current = best_of(lambda: [build_web_data.split_options(q) for q in abcd], args.rounds)
+    print(f"A-D bank    legacy {legacy * 1000:9.2f} ms | split_options {current * 1000:9.2f} ms | x{legacy / current:.2f}")
+    current = best_of(lambda: [build_web_data.split_options(q) for q in wide], args.rounds)
+    print(f"A-H bank    split_options {current * 1000:9.2f} ms ({args.count / current:,.0f} questions/s)")
+
+
+if __name__ == "__main__":
+    main()
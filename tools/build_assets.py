@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+from urllib.parse import quote
+
+from build_cache import write_if_changed
+from courses import COURSES, Course
+from fingerprint import DOCS, HASHED_NAME_RE, content_hash, file_hash, hashed_name, reference_re
+
+# Publishes content-hashed copies of the site assets and data shards, points
+# index.html and the readers at them, records the mapping in
+# docs/assets/asset-manifest.json and generates the service worker docs/sw.js.
+# Run after build_web_data.py, build_web_docs.py and sync_pdfs.py. Every
+# course in tools/courses.json is published; the service worker precaches
+# the course index.html shows (the first) and fetches the others on demand.
+
+STATIC_ASSETS = ["assets/styles.css", "assets/app.js", "assets/reader.css", "assets/reader.js"]
+ASSET_MANIFEST = DOCS / "assets" / "asset-manifest.json"
+READERS_DIR = "readers"
+PARTS_DIR = f"{READERS_DIR}/parts"
+# Directories that hold published copies; stale hashed files there are removed.
+PUBLISH_DIRS = list(dict.fromkeys(["assets", *(course.data_dir for course in COURSES), READERS_DIR, PARTS_DIR]))
+SERVICE_WORKER = DOCS / "sw.js"
+
+# __VERSION__, __PRECACHE__, __ON_DEMAND__ and __DATA_DIRS__ are filled in by
+# write_service_worker. Precached files are served cache-first from the
+# versioned cache (their names or the cache version change with their
+# content), data is stale-while-revalidate, and web fonts are kept in the
+# runtime cache for offline reading.
+SW_TEMPLATE = """// Generated by tools/build_assets.py; do not edit.
+const VERSION = "__VERSION__";
+const PRECACHE = __PRECACHE__;
+// Current files that are fetched when first needed and kept once fetched.
+const ON_DEMAND = __ON_DEMAND__;
+// The data directories of all courses, relative to the scope.
+const DATA_DIRS = __DATA_DIRS__;
+const PRECACHE_NAME = `sms-precache-${VERSION}`;
+const RUNTIME_NAME = "sms-runtime";
+const FONT_HOSTS = ["fonts.googleapis.com", "fonts.gstatic.com"];
+
+self.addEventListener("install", (event) => {
+  event.waitUntil(
+    caches.open(PRECACHE_NAME).then((cache) => cache.addAll(PRECACHE.map((url) => new Request(url, { cache: "reload" }))))
+  );
+});
+
+self.addEventListener("activate", (event) => {
+  event.waitUntil(
+    (async () => {
+      const keys = await caches.keys();
+      await Promise.all(
+        keys.filter((key) => key.startsWith("sms-precache-") && key !== PRECACHE_NAME).map((key) => caches.delete(key))
+      );
+      // Data responses of earlier versions are no longer referenced.
+      const current = new Set([...PRECACHE, ...ON_DEMAND].map((url) => new URL(url, self.registration.scope).href));
+      const runtime = await caches.open(RUNTIME_NAME);
+      const requests = await runtime.keys();
+      await Promise.all(
+        requests
+          .filter((request) => isData(new URL(request.url)) && !current.has(request.url))
+          .map((request) => runtime.delete(request))
+      );
+      await self.clients.claim();
+    })()
+  );
+});
+
+function staleWhileRevalidate(event) {
+  const { request } = event;
+  const network = fetch(request).then(async (response) => {
+    if (response.ok || response.type === "opaque") {
+      const cache = await caches.open(RUNTIME_NAME);
+      await cache.put(request, response.clone());
+    }
+    return response;
+  });
+  event.waitUntil(network.catch(() => undefined));
+  return caches.match(request).then((cached) => cached || network);
+}
+
+function isData(url) {
+  const scope = new URL(self.registration.scope).pathname;
+  return DATA_DIRS.some((dir) => url.pathname.startsWith(scope + dir));
+}
+
+async function precacheFirst(request, url) {
+  const cache = await caches.open(PRECACHE_NAME);
+  const key = url.pathname.endsWith("/") ? new URL("index.html", url).href : request;
+  const cached = await cache.match(key, { ignoreSearch: true });
+  if (cached) return cached;
+  try {
+    return await fetch(request);
+  } catch (err) {
+    // Offline navigation to a page outside the precache lands on the start page.
+    const fallback = request.mode === "navigate" ? await cache.match("index.html") : null;
+    if (fallback) return fallback;
+    throw err;
+  }
+}
+
+self.addEventListener("fetch", (event) => {
+  const { request } = event;
+  if (request.method !== "GET") return;
+  const url = new URL(request.url);
+
+  if (FONT_HOSTS.includes(url.hostname)) {
+    event.respondWith(staleWhileRevalidate(event));
+    return;
+  }
+  const scope = new URL(self.registration.scope);
+  if (url.origin !== scope.origin || !url.pathname.startsWith(scope.pathname)) return;
+
+  if (isData(url)) {
+    event.respondWith(staleWhileRevalidate(event));
+    return;
+  }
+  event.respondWith(precacheFirst(request, url));
+});
+"""
+
+
+def write_bytes_if_changed(path: Path, data: bytes) -> bool:
+    if path.exists() and path.read_bytes() == data:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return True
+
+
+def publish(rel: str, data: bytes, published: Dict[str, str]) -> str:
+    target = hashed_name(rel, data)
+    if write_bytes_if_changed(DOCS / target, data):
+        print(f"Published {target}")
+    published[rel] = target
+    return target
+
+
+def course_pdfs(course: Course) -> List[str]:
+    # Delivered PDFs keep their names (they are large and committed); links
+    # to them carry ?v=<content hash> instead.
+    return sorted(path.relative_to(DOCS).as_posix() for path in course.files_path.glob("*.pdf"))
+
+
+def file_entries() -> Dict[str, Dict]:
+    names = sorted({rel for course in COURSES for rel in course_pdfs(course)})
+    return {rel: {"size": (DOCS / rel).stat().st_size, "hash": file_hash(DOCS / rel)} for rel in names}
+
+
+def publish_data(course: Course, published: Dict[str, str], files: Dict[str, Dict]) -> str:
+    # Returns the published search index, which app.js only fetches for searching.
+    manifest_rel = f"{course.data_dir}/manifest.json"
+    manifest = json.loads((DOCS / manifest_rel).read_text(encoding="utf-8"))
+    for doc in manifest["documents"]:
+        entry = files.get(doc.get("pdf", ""))
+        if entry is not None:
+            doc["pdf"] = f"{doc['pdf']}?v={entry['hash']}"
+    index_rel = f"{course.data_dir}/{manifest['index']['file']}"
+    entries = [manifest["knowledge"], *manifest["questions"], manifest["index"]]
+    for entry in entries:
+        rel = f"{course.data_dir}/{entry['file']}"
+        target = publish(rel, (DOCS / rel).read_bytes(), published)
+        entry["file"] = Path(target).name
+    # The published copy is what browsers load, so it is minified whatever the
+    # source's wire format.
+    text = json.dumps(manifest, ensure_ascii=False, separators=(",", ":"))
+    publish(manifest_rel, text.encode("utf-8"), published)
+    return published[index_rel]
+
+
+def rewrite_references(path: Path, published: Dict[str, str]) -> None:
+    text = path.read_text(encoding="utf-8")
+    for rel, target in published.items():
+        text = reference_re(rel).sub(target, text)
+    if write_if_changed(path, text):
+        print(f"Rewrote {path}")
+
+
+def remove_stale(published: Dict[str, str]) -> List[Path]:
+    current = {DOCS / target for target in published.values()}
+    removed = []
+    for directory in PUBLISH_DIRS:
+        if not (DOCS / directory).is_dir():
+            continue
+        for path in sorted((DOCS / directory).iterdir()):
+            if path.is_file() and HASHED_NAME_RE.search(path.name) and path not in current:
+                path.unlink()
+                removed.append(path)
+    return removed
+
+
+def other_course_prefixes() -> List[str]:
+    # Outputs of the courses index.html does not show.
+    prefixes = []
+    for course in COURSES[1:]:
+        prefixes += [f"{course.data_dir}/", f"{course.files_dir}/"]
+        for doc in course.readers():
+            stem = Path(doc.reader).stem
+            prefixes += [f"{READERS_DIR}/{stem}.", f"{PARTS_DIR}/{stem}-"]
+    return prefixes
+
+
+def precache_list(published: Dict[str, str], include_pdfs: bool, on_demand: Set[str]) -> List[str]:
+    # on_demand files are left to the runtime cache once something fetches them.
+    pages = ["index.html", *(path.relative_to(DOCS).as_posix() for path in sorted((DOCS / READERS_DIR).glob("*.html")))]
+    files = course_pdfs(COURSES[0]) if include_pdfs else []
+    prefixes = tuple(other_course_prefixes())
+    entries = [*pages, *sorted(set(published.values()) - on_demand), *files]
+    return [entry for entry in entries if not entry.startswith(prefixes)]
+
+
+def write_service_worker(entries: List[str], on_demand: Set[str]) -> None:
+    # Hashed names already encode their content; everything else is hashed here.
+    chunks = []
+    for entry in entries:
+        chunks.append(entry.encode("utf-8"))
+        if not HASHED_NAME_RE.search(entry):
+            chunks.append(content_hash((DOCS / entry).read_bytes()).encode("ascii"))
+    version = content_hash(b"\0".join(chunks))
+    urls = [quote(entry) for entry in entries]
+    data_dirs = [quote(f"{course.data_dir}/") for course in COURSES]
+    text = (
+        SW_TEMPLATE.replace("__VERSION__", version)
+        .replace("__PRECACHE__", json.dumps(urls, indent=2))
+        .replace("__ON_DEMAND__", json.dumps([quote(entry) for entry in sorted(on_demand)], indent=2))
+        .replace("__DATA_DIRS__", json.dumps(data_dirs))
+    )
+    if write_if_changed(SERVICE_WORKER, text):
+        print(f"Wrote {SERVICE_WORKER} (cache {version}, {len(urls)} entries)")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Fingerprint docs/ assets and data and rewrite references to them.")
+    parser.add_argument("--precache-pdfs", action="store_true", help="also precache the PDFs of the first course for offline use")
+    args = parser.parse_args(argv)
+
+    published: Dict[str, str] = {}
+    files = file_entries()
+    for rel in STATIC_ASSETS:
+        publish(rel, (DOCS / rel).read_bytes(), published)
+    search_indexes = {publish_data(course, published, files) for course in COURSES}
+    # Reader search indexes and chunks, referenced by build_web_docs.py under
+    # the names published here.
+    readers = [*(DOCS / READERS_DIR).glob("*.search.json"), *(DOCS / PARTS_DIR).glob("*.html")]
+    for path in sorted(readers):
+        if not HASHED_NAME_RE.search(path.name):
+            publish(path.relative_to(DOCS).as_posix(), path.read_bytes(), published)
+
+    rewrite_references(DOCS / "index.html", published)
+    for reader in sorted((DOCS / "readers").glob("*.html")):
+        rewrite_references(reader, published)
+
+    for path in remove_stale(published):
+        print(f"Removed {path}")
+    data = {"version": 1, "assets": dict(sorted(published.items())), "files": files}
+    if write_if_changed(ASSET_MANIFEST, json.dumps(data, ensure_ascii=False, indent=2)):
+        print(f"Wrote {ASSET_MANIFEST}")
+    write_service_worker(precache_list(published, args.precache_pdfs, search_indexes), search_indexes)
+    print(f"Assets: {len(published)} published")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import filecmp
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable
+
+ROOT = Path(__file__).resolve().parents[1]
+CACHE_DIR = ROOT / ".build-cache"
+
+
+def digest_bytes(*chunks: bytes) -> str:
+    h = hashlib.sha256()
+    for chunk in chunks:
+        h.update(len(chunk).to_bytes(8, "big"))
+        h.update(chunk)
+    return h.hexdigest()
+
+
+def digest_text(*texts: str) -> str:
+    return digest_bytes(*(t.encode("utf-8") for t in texts))
+
+
+def digest_json(obj: object) -> str:
+    return digest_text(json.dumps(obj, ensure_ascii=False, sort_keys=True))
+
+
+def digest_files(paths: Iterable[Path]) -> str:
+    chunks = []
+    for path in paths:
+        name = path.relative_to(ROOT).as_posix() if path.is_relative_to(ROOT) else str(path)
+        chunks.append(name.encode("utf-8"))
+        chunks.append(path.read_bytes() if path.exists() else b"\0missing")
+    return digest_bytes(*chunks)
+
+
+def write_if_changed(path: Path, text: str) -> bool:
+    data = text.encode("utf-8")
+    if path.exists() and path.read_bytes() == data:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return True
+
+
+def replace_if_changed(source: Path, path: Path) -> bool:
+    # Moves a freshly written file into place unless path already holds the
+    # same bytes, in which case source is discarded and path left untouched.
+    if path.exists() and filecmp.cmp(source, path, shallow=False):
+        source.unlink()
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(source, path)
+    return True
+
+
+class BuildCache:
+    def __init__(self, name: str, version: str, force: bool = False) -> None:
+        self.path = CACHE_DIR / f"{name}.json"
+        self.version = version
+        self.force = force
+        self.hits = 0
+        self.misses = 0
+        self.entries: Dict[str, Dict[str, str]] = {}
+        if self.path.exists():
+            try:
+                stored = json.loads(self.path.read_text(encoding="utf-8"))
+            except ValueError:
+                stored = {}
+            if stored.get("version") == version:
+                self.entries = stored.get("entries", {})
+
+    def is_fresh(self, key: str, inputs_digest: str, output: Path) -> bool:
+        entry = self.entries.get(key)
+        fresh = (
+            not self.force
+            and entry is not None
+            and entry.get("inputs") == inputs_digest
+            and output.exists()
+            and digest_files([output]) == entry.get("output")
+        )
+        if fresh:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return fresh
+
+    def record(self, key: str, inputs_digest: str, output: Path) -> None:
+        self.entries[key] = {"inputs": inputs_digest, "output": digest_files([output])}
+
+    def save(self) -> None:
+        data = {"version": self.version, "entries": self.entries}
+        write_if_changed(self.path, json.dumps(data, ensure_ascii=False, indent=2, sort_keys=True))
+
+    def summary(self) -> str:
+        mode = " (forced)" if self.force else ""
+        return f"Cache{mode}: {self.hits} hit(s), {self.misses} miss(es)"
+
+
+def code_version(parser_version: str, modules: Iterable[Path]) -> str:
+    return f"{parser_version}:{digest_files(modules)[:16]}"
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from build_cache import CACHE_DIR, BuildCache, code_version, digest_files, digest_text
+from courses import COURSES
+from tex_ir import VERBATIM_INPUT_RE, strip_comments
+
+# Compiles the course PDFs with latexmk (replaces the serial loop that
+# output/scripts/build_all.sh used to run). Each document's inputs are read
+# from its source: \input/\include files, local packages such as
+# style/sms_training_style.sty (searched recursively), \VerbatimInput files
+# and \includegraphics images. Only documents whose inputs changed since
+# their last successful build are compiled, in parallel, each in its own
+# output directory under .build-cache/pdf/ so aux files never clash and
+# latexmk can rerun incrementally. Results are copied to their delivery
+# names in the course's pdf_dir (output/pdf/ for the first course; see
+# tools/courses.json).
+
+ROOT = Path(__file__).resolve().parents[1]
+WORK_DIR = CACHE_DIR / "pdf"
+LATEXMK = ["latexmk", "-xelatex", "-interaction=nonstopmode", "-halt-on-error"]
+
+# Bump when the build changes in ways the code digest cannot see.
+BUILD_VERSION = "1"
+INPUT_RE = re.compile(r"\\(?:input|include)\{([^}]*)\}")
+PACKAGE_RE = re.compile(r"\\(?:usepackage|RequirePackage)(?:\[[^\]]*\])?\{([^}]*)\}")
+GRAPHICS_RE = re.compile(r"\\includegraphics(?:\[[^\]]*\])?\{([^}]*)\}")
+GRAPHICS_SUFFIXES = ["", ".pdf", ".png", ".jpg", ".jpeg", ".eps"]
+
+# Names of earlier releases and raw latexmk outputs; removed from the PDF dirs.
+LEGACY_NAMES = [
+    "01-完整原文-企业短信培训.pdf",
+    "03-题库-脑科学训练版-企业短信培训.pdf",
+    "03-题库-脑科学学习版-企业短信培训.pdf",
+]
+ARTIFACT_SUFFIXES = {".aux", ".log", ".fls", ".fdb_latexmk", ".out", ".toc", ".xdv"}
+
+
+@dataclass(frozen=True)
+class PdfSpec:
+    source_name: str
+    delivery_name: str
+    course: str = ""
+    src: str = "output/src"
+    pdf_dir: str = "output/pdf"
+
+    @property
+    def source_path(self) -> Path:
+        return ROOT / self.src / self.source_name
+
+    @property
+    def pdf_path(self) -> Path:
+        return ROOT / self.pdf_dir / self.delivery_name
+
+    @property
+    def key(self) -> str:
+        return f"{self.pdf_dir}/{self.delivery_name}"
+
+
+PDF_SPECS = [
+    PdfSpec(doc.source, doc.pdf, course.id, course.src, course.pdf_dir)
+    for course in COURSES
+    for doc in course.documents
+    if doc.pdf
+]
+
+
+def with_suffix(base: Path, name: str, suffix: str) -> Path:
+    path = base / name
+    return path if path.suffix else path.with_name(path.name + suffix)
+
+
+def tex_inputs(source: Path) -> List[Path]:
+    # TeX resolves relative names against the directory latexmk -cd enters,
+    # i.e. that of the main file, also inside \input files and packages.
+    base = source.parent
+    found: Dict[Path, None] = {}
+    pending = [source]
+    while pending:
+        path = pending.pop()
+        if path in found:
+            continue
+        found[path] = None
+        if not path.exists() or path.suffix not in (".tex", ".sty"):
+            continue
+        text = strip_comments(path.read_text(encoding="utf-8"))
+        for name in INPUT_RE.findall(text):
+            pending.append(with_suffix(base, name.strip(), ".tex").resolve())
+        for names in PACKAGE_RE.findall(text):
+            for name in names.split(","):
+                package = with_suffix(base, name.strip(), ".sty").resolve()
+                # Anything not next to the sources is an installed package.
+                if package.exists():
+                    pending.append(package)
+        for name in VERBATIM_INPUT_RE.findall(text):
+            found[(base / name.strip()).resolve()] = None
+        for name in GRAPHICS_RE.findall(text):
+            candidates = [(base / (name.strip() + suffix)).resolve() for suffix in GRAPHICS_SUFFIXES]
+            found[next((c for c in candidates if c.is_file()), candidates[0])] = None
+    return sorted(found)
+
+
+def inputs_digest(inputs: List[Path]) -> str:
+    return digest_text(digest_files(inputs), " ".join(LATEXMK))
+
+
+def build_env(inputs: List[Path]) -> Dict[str, str]:
+    # Dates the PDF by its newest input rather than by the clock, so that an
+    # unchanged document rebuilds to the same bytes (sync_pdfs.py then leaves
+    # it alone).
+    stamps = [int(path.stat().st_mtime) for path in inputs if path.exists()]
+    env = dict(os.environ)
+    if stamps and "SOURCE_DATE_EPOCH" not in env:
+        env["SOURCE_DATE_EPOCH"] = str(max(stamps))
+    env.setdefault("FORCE_SOURCE_DATE", "1")
+    return env
+
+
+def compile_pdf(spec: PdfSpec, inputs: List[Path]) -> Tuple[bool, float, str]:
+    # Returns success, wall time and the tail of the latexmk output.
+    work = WORK_DIR / spec.course / Path(spec.source_name).stem
+    work.mkdir(parents=True, exist_ok=True)
+    command = [*LATEXMK, f"-output-directory={work}", "-cd", str(spec.source_path)]
+    t0 = time.perf_counter()
+    result = subprocess.run(command, capture_output=True, text=True, errors="replace", env=build_env(inputs))
+    elapsed = time.perf_counter() - t0
+    log = "\n".join((result.stdout + result.stderr).splitlines()[-30:])
+    built = work / f"{Path(spec.source_name).stem}.pdf"
+    if result.returncode != 0 or not built.exists():
+        return False, elapsed, log
+    spec.pdf_path.parent.mkdir(parents=True, exist_ok=True)
+    staging = spec.pdf_path.with_name(f".{spec.delivery_name}.tmp")
+    shutil.copyfile(built, staging)
+    os.replace(staging, spec.pdf_path)
+    return True, elapsed, log
+
+
+def clean_pdf_dir(pdf_dir: Path, specs: List[PdfSpec]) -> List[Path]:
+    removed = []
+    raw = {f"{Path(spec.source_name).stem}.pdf" for spec in specs}
+    for path in sorted(pdf_dir.iterdir()) if pdf_dir.is_dir() else []:
+        if path.is_file() and (path.name in LEGACY_NAMES or path.name in raw or path.suffix in ARTIFACT_SUFFIXES):
+            path.unlink()
+            removed.append(path)
+    return removed
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compile the PDFs of the courses in tools/courses.json whose sources changed, in parallel.")
+    parser.add_argument("documents", nargs="*", help="source names to consider (default: all), e.g. knowledge_points_full.tex")
+    parser.add_argument("--course", action="append", help="only consider the documents of this course id (repeatable; default: all)")
+    parser.add_argument("--force", action="store_true", help="rebuild even if the inputs are unchanged")
+    parser.add_argument("-j", "--jobs", type=int, default=0, help="parallel latexmk runs (0 = one per CPU, default)")
+    parser.add_argument("--dry-run", action="store_true", help="list the stale documents and their inputs without building")
+    args = parser.parse_args(argv)
+
+    unknown_courses = set(args.course or []) - {course.id for course in COURSES}
+    if unknown_courses:
+        raise SystemExit(f"Unknown course(s): {', '.join(sorted(unknown_courses))}")
+    candidates = [spec for spec in PDF_SPECS if not args.course or spec.course in args.course]
+    unknown = set(args.documents) - {spec.source_name for spec in candidates}
+    if unknown:
+        raise SystemExit(f"Unknown document(s): {', '.join(sorted(unknown))}")
+    specs = [spec for spec in candidates if not args.documents or spec.source_name in args.documents]
+
+    cache = BuildCache("build_pdfs", code_version(BUILD_VERSION, [Path(__file__)]), force=args.force)
+    inputs = {spec.key: tex_inputs(spec.source_path) for spec in specs}
+    digests = {key: inputs_digest(paths) for key, paths in inputs.items()}
+    stale = [spec for spec in specs if not cache.is_fresh(spec.key, digests[spec.key], spec.pdf_path)]
+
+    for spec in specs:
+        if spec not in stale:
+            print(f"Cached {spec.pdf_path}")
+    if args.dry_run:
+        for spec in stale:
+            names = ", ".join(path.relative_to(ROOT).as_posix() if path.is_relative_to(ROOT) else str(path) for path in inputs[spec.key])
+            print(f"Stale {spec.key}: {names}")
+        return
+    if stale and shutil.which(LATEXMK[0]) is None:
+        raise SystemExit(f"{LATEXMK[0]} not found; install TeX Live (xelatex + latexmk) to build {len(stale)} PDF(s)")
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    failed: Set[str] = set()
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(stale)))) as pool:
+        futures = {spec.key: pool.submit(compile_pdf, spec, inputs[spec.key]) for spec in stale}
+        # Reported in PDF_SPECS order so the log does not depend on scheduling.
+        for spec in stale:
+            ok, elapsed, log = futures[spec.key].result()
+            if ok:
+                print(f"Built {spec.pdf_path} in {elapsed:.1f}s")
+                cache.record(spec.key, digests[spec.key], spec.pdf_path)
+            else:
+                print(f"Failed {spec.key} after {elapsed:.1f}s:\n{log}", file=sys.stderr)
+                failed.add(spec.key)
+    cache.save()
+
+    for pdf_dir in sorted({spec.pdf_path.parent for spec in PDF_SPECS}):
+        for path in clean_pdf_dir(pdf_dir, [spec for spec in PDF_SPECS if spec.pdf_path.parent == pdf_dir]):
+            print(f"Removed {path}")
+    print(f"{cache.summary()}; {len(stale) - len(failed)} built in {time.perf_counter() - t0:.1f}s")
+    if failed:
+        raise SystemExit(f"{len(failed)} PDF(s) failed: {', '.join(sorted(failed))}")
+
+
+if __name__ == "__main__":
+    main()
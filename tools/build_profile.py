@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import cProfile
+import functools
+import inspect
+import json
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from build_cache import CACHE_DIR
+
+# Stage timing for the build tools (--profile). Nothing is patched unless
+# profiling is enabled, so a normal build pays only for the document() calls.
+#
+# instrument() replaces module (or class) attributes with wrappers that
+# record calls, wall time and bytes in/out under the current document.
+# Generator stages are timed per item they produce. Wrapped stages nest, so
+# each stage also gets its self time: its time minus that of the wrapped
+# stages it called. Bytes in is the largest argument (str and bytes by
+# length in UTF-8, paths by file size); bytes out is the size of the result
+# or, for generators, of every item (tuples count their largest member).
+
+DEFAULT_DOCUMENT = "(build)"
+
+
+@dataclass
+class StageStats:
+    calls: int = 0
+    seconds: float = 0.0
+    self_seconds: float = 0.0
+    bytes_in: int = 0
+    bytes_out: int = 0
+
+
+def value_size(value: object) -> int:
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, Path):
+        return value.stat().st_size if value.is_file() else 0
+    if isinstance(value, tuple):
+        return max((value_size(v) for v in value), default=0)
+    if isinstance(value, list) and value and isinstance(value[0], str):
+        return sum(value_size(v) for v in value)
+    return 0
+
+
+class Profiler:
+    def __init__(self) -> None:
+        self.enabled = False
+        self.current = DEFAULT_DOCUMENT
+        self.stats: Dict[Tuple[str, str], StageStats] = {}
+        self.walls: Dict[str, float] = {}
+        # Time spent in wrapped stages called from the open ones.
+        self.children: List[float] = []
+        self.started = time.perf_counter()
+
+    def enable(self) -> None:
+        self.enabled = True
+        self.started = time.perf_counter()
+
+    def instrument(self, owner: object, names: List[str], prefix: str = "") -> None:
+        if not self.enabled:
+            return
+        for name in names:
+            setattr(owner, name, self.wrap(prefix + name, getattr(owner, name)))
+
+    def entry(self, stage: str) -> StageStats:
+        key = (self.current, stage)
+        if key not in self.stats:
+            self.stats[key] = StageStats()
+        return self.stats[key]
+
+    def timed(self, stage: str, call: Callable[[], object]) -> object:
+        self.children.append(0.0)
+        t0 = time.perf_counter()
+        try:
+            result = call()
+        finally:
+            elapsed = time.perf_counter() - t0
+            child = self.children.pop()
+            if self.children:
+                self.children[-1] += elapsed
+            entry = self.entry(stage)
+            entry.seconds += elapsed
+            entry.self_seconds += elapsed - child
+        entry.bytes_out += value_size(result)
+        return result
+
+    def wrap(self, stage: str, fn: Callable) -> Callable:
+        if inspect.isgeneratorfunction(fn):
+
+            @functools.wraps(fn)
+            def generator(*args, **kwargs):
+                entry = self.entry(stage)
+                entry.calls += 1
+                entry.bytes_in += max(map(value_size, args), default=0)
+                items = fn(*args, **kwargs)
+                done = object()
+                while True:
+                    item = self.timed(stage, lambda: next(items, done))
+                    if item is done:
+                        return
+                    yield item
+
+            return generator
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            entry = self.entry(stage)
+            entry.calls += 1
+            entry.bytes_in += max(map(value_size, args), default=0)
+            return self.timed(stage, lambda: fn(*args, **kwargs))
+
+        return wrapper
+
+    def document(self, name: str):
+        if not self.enabled:
+            return nullcontext()
+        return self.tracking(name)
+
+    @contextmanager
+    def tracking(self, name: str) -> Iterator[None]:
+        outer = self.current
+        self.current = name
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.walls[name] = self.walls.get(name, 0.0) + time.perf_counter() - t0
+            self.current = outer
+
+    def report(self, tool: str) -> Dict:
+        stages: Dict[str, StageStats] = {}
+        documents: Dict[str, Dict] = {}
+        for (document, stage), entry in self.stats.items():
+            total = stages.setdefault(stage, StageStats())
+            for key, value in asdict(entry).items():
+                setattr(total, key, getattr(total, key) + value)
+            doc = documents.setdefault(document, {"wall_seconds": self.walls.get(document), "stages": {}})
+            doc["stages"][stage] = asdict(entry)
+
+        def by_self_time(items: Dict) -> Dict:
+            return dict(sorted(items.items(), key=lambda kv: -kv[1]["self_seconds"]))
+
+        for doc in documents.values():
+            doc["stages"] = by_self_time(doc["stages"])
+        return {
+            "version": 1,
+            "tool": tool,
+            "wall_seconds": time.perf_counter() - self.started,
+            "stages": by_self_time({name: asdict(total) for name, total in stages.items()}),
+            "documents": documents,
+        }
+
+    def write_report(self, tool: str, path: Path, top: int = 8) -> None:
+        report = self.report(tool)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"Profile: {path} ({report['wall_seconds']:.2f}s wall)")
+        for name, entry in list(report["stages"].items())[:top]:
+            print(
+                f"  {name:<28} {entry['self_seconds'] * 1000:10.1f} ms self {entry['seconds'] * 1000:10.1f} ms total"
+                f" {entry['calls']:8d} calls {entry['bytes_in'] / 1_000_000:8.2f} MB in {entry['bytes_out'] / 1_000_000:8.2f} MB out"
+            )
+
+
+PROFILER = Profiler()
+
+
+def default_report(tool: str) -> Path:
+    return CACHE_DIR / f"profile-{tool}.json"
+
+
+@contextmanager
+def profiling(tool: str, report: Optional[Path], pstats_path: Optional[Path]) -> Iterator[None]:
+    # Runs the build under cProfile when pstats_path is set and writes the
+    # stage report when report is set.
+    profile = cProfile.Profile() if pstats_path else None
+    if profile is not None:
+        profile.enable()
+    try:
+        yield
+    finally:
+        if profile is not None:
+            profile.disable()
+            pstats_path.parent.mkdir(parents=True, exist_ok=True)
+            profile.dump_stats(str(pstats_path))
+            print(f"cProfile stats: {pstats_path} (python3 -m pstats {pstats_path})")
+        if report is not None:
+            PROFILER.write_report(tool, report)
@@ -1,15 +1,67 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import argparse
+import io
 import json
+import os
 import re
-from dataclasses import dataclass, asdict
+import sys
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import redirect_stdout
+from dataclasses import dataclass, asdict, field
 from pathlib import Path
-from typing import List, Dict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import tex_clean
+import tex_ir
+import search_index
+import topic_match
+import wire_format
+from build_cache import BuildCache, code_version, digest_files, digest_json, digest_text, write_if_changed
+from build_profile import PROFILER, default_report, profiling
+from courses import COURSES, ChapterSpec, Course
+from fingerprint import HASHED_NAME_RE
+from search_index import build_search_index
+from tex_clean import clean_tex
+from tex_ir import Document, Question, load_document, parse_document
+from topic_match import load_taxonomy
+from wire_format import encode_site
 
 ROOT = Path(__file__).resolve().parents[1]
-SRC = ROOT / "output" / "src"
-OUT = ROOT / "docs" / "assets" / "data.json"
+MANIFEST_NAME = "manifest.json"
+KNOWLEDGE_SHARD = "knowledge.json"
+INDEX_NAME = "search-index.json"
+
+# Bump when the parse output changes for reasons the code digest cannot see.
+PARSER_VERSION = "1"
+# Paths of the course index.html shows (the first in courses.json), for
+# watch.py and the benchmarks; the build itself iterates over COURSES.
+COURSE = COURSES[0]
+SRC = COURSE.src_path
+DATA_DIR = COURSE.data_path
+PRACTICE_SOURCE = COURSE.practice_source
+KNOWLEDGE_SOURCE = COURSE.knowledge_source
+QUESTION_CHAPTERS = COURSE.question_chapters
+# Shared by all courses.
+TAXONOMY = Path(__file__).resolve().parent / "topic_taxonomy.json"
+TOPICS = load_taxonomy(TAXONOMY)
+# Functions timed by --profile, as named in the report, besides those of
+# tex_ir.PROFILE_STAGES.
+PROFILE_STAGES = [
+    "question_bank",
+    "question_from_row",
+    "split_options",
+    "parse_knowledge",
+    "clean_tex",
+    "normalize_knowledge_content",
+    "tag_fields",
+    "build_data",
+    "build_shards",
+    "build_search_index",
+    "encode_site",
+    "write_if_changed",
+]
 
 
 @dataclass
@@ -19,6 +71,7 @@ class KnowledgeItem:
     title: str
     content: str
     tags: List[str]
+    tag_hits: Dict[str, List[str]] = field(default_factory=dict)
 
 
 @dataclass
@@ -31,33 +84,7 @@ class QuestionItem:
     answer: str
     explanation: str
     tags: List[str]
-
-
-def clean_tex(s: str) -> str:
-    s = s.replace("\\n", "\n")
-    s = s.replace("\\%", "%")
-    s = s.replace("\\#", "#")
-    s = s.replace("\\_", "_")
-    s = re.sub(r"\\texttt\{([^{}]*)\}", r"\1", s)
-    s = re.sub(r"\\mystrong\{([^{}]*)\}", r"\1", s)
-    s = re.sub(r"\\textbf\{([^{}]*)\}", r"\1", s)
-    s = re.sub(r"\\chapter\{([^{}]*)\}", r"\1", s)
-    s = re.sub(r"\\section\{([^{}]*)\}", r"\1", s)
-    s = s.replace("$\\leq67$", "≤67")
-    s = s.replace("$\\leq 67$", "≤67")
-    s = s.replace("$>67$", ">67")
-    s = s.replace("$\\Rightarrow$", "=>")
-    s = re.sub(r"\\begin\{[^}]+\}", "", s)
-    s = re.sub(r"\\end\{[^}]+\}", "", s)
-    s = re.sub(r"\\item\s*", "- ", s)
-    s = re.sub(r"\\par", "\n", s)
-    s = re.sub(r"\\[a-zA-Z]+", "", s)
-    s = s.replace("{", "").replace("}", "")
-    s = re.sub(r"\s*\$\$\s*", " → ", s)
-    s = re.sub(r"\$([^$]+)\$", r"\1", s)
-    s = s.replace("=>", "→")
-    s = re.sub(r"\s+", " ", s)
-    return s.strip()
+    tag_hits: Dict[str, List[str]] = field(default_factory=dict)
 
 
 def normalize_knowledge_content(raw: str) -> str:
@@ -73,18 +100,9 @@ def normalize_knowledge_content(raw: str) -> str:
     return "\n".join(lines)
 
 
-def topic_tags(text: str) -> List[str]:
-    mapping = [
-        ("计费结算", ["计费", "67", "140", "返还", "账单", "分片"]),
-        ("签名码号", ["签名", "子端口", "码号", "三网", "落地"]),
-        ("回执状态", ["回执", "未知", "状态", "MO", "MT"]),
-        ("风控合规", ["黑名单", "白名单", "关键词", "投诉", "频控", "退订"]),
-        ("产品形态", ["富媒体", "阅信", "5G", "语音", "闪信", "USSD", "二进制"]),
-        ("国际短信", ["国际", "Sender ID", "回填", "DND", "SMPP"]),
-        ("接入交付", ["压测", "QPS", "上线", "自服务", "接口", "私有化"]),
-    ]
-    tags = [name for name, keys in mapping if any(k.lower() in text.lower() for k in keys)]
-    return tags or ["综合"]
+def tag_fields(text: str) -> Dict[str, object]:
+    hits = TOPICS.hits(text)
+    return {"tags": list(hits) or [TOPICS.fallback], "tag_hits": hits}
 
 
 def slugify(s: str) -> str:
@@ -92,121 +110,108 @@ def slugify(s: str) -> str:
     return s[:64] if s else "item"
 
 
-def extract_chapter_segment(tex: str, chapter_starts: Dict[str, int], key: str) -> str:
-    order = sorted([(k, v) for k, v in chapter_starts.items() if v is not None], key=lambda x: x[1])
-    pos = dict(order)
-    start = pos[key]
-    next_positions = [v for k, v in order if v > start]
-    end = min(next_positions) if next_positions else len(tex)
-    return tex[start:end]
-
+CHOICE_TYPES = ("single", "multiple")
+
+CHOICE_ROW_RE = re.compile(r"\s*(.*?)\s*&\s*\\ansline\{([A-Z]+)\}\\par\s*\\expline\{(.*?)\}\s*\\\\", re.S)
+PLAIN_ROW_RE = re.compile(r"\s*(.*?)\s*&\s*(.*?)\\\\", re.S)
+# "\par \textbf{A.}" style option markers; any capital letter is a label.
+OPTION_MARK_RE = re.compile(r"\\par\s*\\textbf\{([A-Z])\.\}\s*")
+
+
+def split_options(qraw: str) -> Tuple[str, List[str]]:
+    # One scan over the option markers: the stem ends at the "A." marker and
+    # each option runs to the next marker. Without an "A." there are no options.
+    qraw = qraw.strip()
+    marks = list(OPTION_MARK_RE.finditer(qraw))
+    first = next((i for i, m in enumerate(marks) if m.group(1) == "A"), None)
+    if first is None:
+        return qraw, []
+    marks = marks[first:]
+    options = [qraw[m.end() : nxt.start()] for m, nxt in zip(marks, marks[1:])]
+    options.append(qraw[marks[-1].end() :])
+    return qraw[: marks[0].start()].strip(), options
+
+
+def build_question(source: str, spec: ChapterSpec, n: str, fields: Tuple[str, ...]) -> Optional[QuestionItem]:
+    if spec.qtype in CHOICE_TYPES:
+        qraw, ans, exp = fields
+        stem, raw_options = split_options(qraw)
+        options = [clean_tex(o) for o in raw_options]
+        return QuestionItem(
+            id=f"{spec.id_prefix}-{n}",
+            source=source,
+            qtype=spec.qtype,
+            stem=clean_tex(stem),
+            options=options,
+            answer=ans,
+            explanation=clean_tex(exp),
+            **tag_fields(stem + " " + exp),
+        )
 
-def parse_choices(seg: str, source: str, multi: bool = False) -> List[QuestionItem]:
-    pat = re.compile(
-        r"\\textbf\{(\d+)\.\}\s*(.*?)\s*&\s*\\ansline\{([A-D]+)\}\\par\s*\\expline\{(.*?)\}\s*\\\\",
-        re.S,
+    q = clean_tex(fields[0])
+    a = clean_tex(fields[1])
+    if not q:
+        return None
+    truefalse = spec.qtype == "truefalse"
+    return QuestionItem(
+        id=f"{spec.id_prefix}-{n}",
+        source=source,
+        qtype=spec.qtype,
+        stem=q,
+        options=["对", "错"] if truefalse else [],
+        answer=("对" if a.startswith("对") else "错") if truefalse else "",
+        explanation=a,
+        **tag_fields(q + " " + a),
     )
-    out = []
-    for n, qraw, ans, exp in pat.findall(seg):
-        qraw = qraw.strip()
-        stem = qraw
-        options = []
-        # parse A/B/C/D
-        m = re.search(r"(.*?)\\par\s*\\textbf\{A\.\}", qraw, re.S)
-        if m:
-            stem = m.group(1).strip()
-            for label in ["A", "B", "C", "D"]:
-                mm = re.search(
-                    rf"\\textbf\{{{label}\.\}}\s*(.*?)(?=\\par\s*\\textbf\{{[A-D]\.\}}|$)",
-                    qraw,
-                    re.S,
-                )
-                options.append(clean_tex(mm.group(1)) if mm else "")
-        out.append(
-            QuestionItem(
-                id=f"{source}-{n}",
-                source=source,
-                qtype="multiple" if multi else "single",
-                stem=clean_tex(stem),
-                options=options,
-                answer=ans,
-                explanation=clean_tex(exp),
-                tags=topic_tags(stem + " " + exp),
-            )
-        )
-    return out
 
 
-def parse_judge(seg: str) -> List[QuestionItem]:
-    pat = re.compile(r"\\textbf\{(\d+)\.\}\s*(.*?)\s*&\s*(.*?)\\\\", re.S)
-    out = []
-    for n, qraw, ans in pat.findall(seg):
-        q = clean_tex(qraw)
-        a = clean_tex(ans)
-        if not q:
+def question_from_row(source: str, spec: ChapterSpec, n: str, tex: str) -> Optional[QuestionItem]:
+    # tex is a table row after its "\textbf{n.}" label, without the closing "\\".
+    row_re = CHOICE_ROW_RE if spec.qtype in CHOICE_TYPES else PLAIN_ROW_RE
+    m = row_re.match(tex + "\\\\")
+    return build_question(source, spec, n, m.groups()) if m is not None else None
+
+
+def chapter_key(title: str, registry: Dict[str, ChapterSpec]) -> Optional[str]:
+    # The longest registered prefix, so a short key never shadows a longer one.
+    return next((key for key in sorted(registry, key=len, reverse=True) if title.startswith(key)), None)
+
+
+def question_bank(
+    document: Document, registry: Dict[str, ChapterSpec] = QUESTION_CHAPTERS
+) -> Dict[str, List[QuestionItem]]:
+    # The question rows of the parsed source, by chapter. A registered chapter
+    # runs until the next registered one, so rows under an unregistered
+    # chapter belong to the registered chapter before it.
+    segments: List[Optional[Tuple[int, str]]] = []
+    segment: Optional[Tuple[int, str]] = None
+    for index, title in enumerate(document.chapters):
+        key = chapter_key(title, registry)
+        if key is not None:
+            segment = (index, key)
+        segments.append(segment)
+
+    found: Dict[str, List[QuestionItem]] = {key: [] for key in registry}
+    seen: Dict[Tuple[int, str], int] = {}
+    for block in document.blocks:
+        if not isinstance(block, Question) or block.chapter < 0 or segments[block.chapter] is None:
             continue
-        out.append(
-            QuestionItem(
-                id=f"C-{n}",
-                source="C卷",
-                qtype="truefalse",
-                stem=q,
-                options=["对", "错"],
-                answer="对" if a.startswith("对") else "错",
-                explanation=a,
-                tags=topic_tags(q + " " + a),
-            )
-        )
-    return out
-
-
-def parse_short(seg: str, source: str) -> List[QuestionItem]:
-    pat = re.compile(r"\\textbf\{(\d+)\.\}\s*(.*?)\s*&\s*(.*?)\\\\", re.S)
-    out = []
-    seen = {}
-    for n, qraw, ans in pat.findall(seg):
-        q = clean_tex(qraw)
-        a = clean_tex(ans)
-        if not q:
+        start, key = segments[block.chapter]
+        item = question_from_row(key, registry[key], block.number, block.tex)
+        if item is None:
             continue
-        seen[n] = seen.get(n, 0) + 1
-        suffix = f"-{seen[n]}" if seen[n] > 1 else ""
-        out.append(
-            QuestionItem(
-                id=f"{source}-{n}{suffix}",
-                source=source,
-                qtype="short",
-                stem=q,
-                options=[],
-                answer="",
-                explanation=a,
-                tags=topic_tags(q + " " + a),
-            )
-        )
-    return out
+        # Numbering restarts in sub-sections (e.g. D卷 场景题/计算题); keep ids unique.
+        count = seen[(start, block.number)] = seen.get((start, block.number), 0) + 1
+        if count > 1:
+            item.id = f"{item.id}-{count}"
+        found[key].append(item)
+    return found
 
 
-def parse_flash(seg: str) -> List[QuestionItem]:
-    pat = re.compile(r"\\textbf\{(\d+)\.\}\s*(.*?)\s*&\s*(.*?)\\\\", re.S)
-    out = []
-    for n, qraw, ans in pat.findall(seg):
-        q = clean_tex(qraw)
-        a = clean_tex(ans)
-        if not q:
-            continue
-        out.append(
-            QuestionItem(
-                id=f"E-{n}",
-                source="E卷",
-                qtype="flash",
-                stem=q,
-                options=[],
-                answer="",
-                explanation=a,
-                tags=topic_tags(q + " " + a),
-            )
-        )
-    return out
+def scan_question_bank(
+    tex: str, registry: Dict[str, ChapterSpec] = QUESTION_CHAPTERS
+) -> Dict[str, List[QuestionItem]]:
+    return question_bank(parse_document(tex), registry)
 
 
 def parse_knowledge(tex: str) -> List[KnowledgeItem]:
@@ -238,7 +243,7 @@ def parse_knowledge(tex: str) -> List[KnowledgeItem]:
                     chapter=chap_title,
                     title=sec_title,
                     content=content,
-                    tags=topic_tags(sec_title + " " + content),
+                    **tag_fields(sec_title + " " + content),
                 )
             )
     # Deduplicate by id
@@ -248,62 +253,256 @@ def parse_knowledge(tex: str) -> List[KnowledgeItem]:
     return list(uniq.values())
 
 
-def main() -> None:
-    practice_tex = (SRC / "practice_with_brain_science.tex").read_text(encoding="utf-8")
-    knowledge_tex = (SRC / "knowledge_points_full.tex").read_text(encoding="utf-8")
-
-    ch_starts = {k: (m.start() if (m := re.search(rf"\\chapter\{{{re.escape(k)}", practice_tex)) else None) for k in ["A卷", "B卷", "C卷", "D卷", "E卷", "F卷"]}
-
-    segA = extract_chapter_segment(practice_tex, ch_starts, "A卷")
-    segB = extract_chapter_segment(practice_tex, ch_starts, "B卷")
-    segC = extract_chapter_segment(practice_tex, ch_starts, "C卷")
-    segD = extract_chapter_segment(practice_tex, ch_starts, "D卷")
-    segE = extract_chapter_segment(practice_tex, ch_starts, "E卷")
-    segF = extract_chapter_segment(practice_tex, ch_starts, "F卷")
-
-    questions: List[QuestionItem] = []
-    questions += parse_choices(segA, "A卷", multi=False)
-    questions += parse_choices(segB, "B卷", multi=True)
-    questions += parse_judge(segC)
-    questions += parse_short(segD, "D卷")
-    questions += parse_flash(segE)
-    questions += parse_choices(segF, "F卷", multi=False)
-
-    knowledge = parse_knowledge(knowledge_tex)
-
-    docs = [
-        {
-            "id": "doc-1",
-            "title": "企业短信培训学习手册（专业文稿版）",
-            "desc": "完整学习主线，适合系统阅读与阶段复习。",
-            "web": "readers/doc-1.html",
-            "pdf": "files/01-企业短信培训学习手册-专业文稿版.pdf",
-        },
-        {
-            "id": "doc-3",
-            "title": "题库（学习测评版）",
-            "desc": "覆盖单选、多选、判断、场景、闪卡与扩展消息类型专题。",
-            "web": "readers/doc-3.html",
-            "pdf": "files/03-企业短信培训题库-学习测评版.pdf",
-        },
-    ]
+def public_fields(item: object) -> Dict:
+    data = asdict(item)
+    del data["tag_hits"]
+    return data
+
+
+def parse_practice(course: Course = COURSE, force: bool = False) -> List[QuestionItem]:
+    # The reader of the same source renders from the same parse.
+    with PROFILER.document(course.practice_source.name):
+        bank = question_bank(load_document(course.practice_source, force), course.question_chapters)
+    return [q for key in course.question_chapters for q in bank[key]]
+
+
+def parse_knowledge_source(course: Course = COURSE) -> List[KnowledgeItem]:
+    with PROFILER.document(course.knowledge_source.name):
+        return parse_knowledge(course.knowledge_source.read_text(encoding="utf-8"))
+
+
+def tag_report(knowledge: List[KnowledgeItem], questions: List[QuestionItem]) -> Dict:
+    # Matched keywords per tag, for auditing the taxonomy without rescanning.
+    return {
+        "knowledge": {k.id: k.tag_hits for k in knowledge},
+        "questions": {q.id: q.tag_hits for q in questions},
+    }
+
+
+def course_documents(course: Course) -> List[Dict]:
+    # The document cards of the site: every document with a reader.
+    documents = []
+    for doc in course.readers():
+        entry = {"id": doc.id, "title": doc.title, "desc": doc.desc, "web": f"readers/{doc.reader}"}
+        if doc.pdf:
+            entry["pdf"] = f"{course.files_dir}/{doc.pdf}"
+        documents.append(entry)
+    return documents
+
 
-    data = {
+def build_data(course: Course, knowledge: List[KnowledgeItem], questions: List[QuestionItem]) -> Dict:
+    return {
         "meta": {
-            "title": "企业短信学习站",
-            "version": "web-v1.0",
+            "title": course.title,
+            "version": course.version,
             "knowledge_count": len(knowledge),
             "question_count": len(questions),
         },
-        "documents": docs,
-        "knowledge": [asdict(k) for k in knowledge],
-        "questions": [asdict(q) for q in questions],
+        "documents": course_documents(course),
+        "knowledge": [public_fields(k) for k in knowledge],
+        "questions": [public_fields(q) for q in questions],
     }
 
-    OUT.parent.mkdir(parents=True, exist_ok=True)
-    OUT.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
-    print(f"Wrote {OUT}")
-    print(f"Knowledge: {len(knowledge)} | Questions: {len(questions)}")
+
+def question_shard(spec: ChapterSpec) -> str:
+    return f"questions-{spec.shard}.json"
+
+
+def site_files(course: Course) -> List[str]:
+    shards = [question_shard(spec) for spec in course.question_chapters.values()]
+    return [MANIFEST_NAME, KNOWLEDGE_SHARD, *shards, INDEX_NAME]
+
+
+def build_shards(course: Course, data: Dict) -> Dict[str, Dict]:
+    # A small manifest plus one knowledge shard and one question shard per
+    # source; app.js renders from the manifest and fetches shards on demand.
+    questions = data["questions"]
+    tags: Dict[str, None] = {}
+    for item in data["knowledge"] + questions:
+        tags.update(dict.fromkeys(item["tags"]))
+
+    related: Dict[str, int] = {}
+    for item in data["knowledge"]:
+        wanted = set(item["tags"])
+        related["|".join(item["tags"])] = sum(1 for q in questions if wanted.intersection(q["tags"]))
+
+    shards: Dict[str, Dict] = {KNOWLEDGE_SHARD: {"knowledge": data["knowledge"]}}
+    sources = []
+    offset = 0
+    for source, spec in course.question_chapters.items():
+        chunk = [q for q in questions if q["source"] == source]
+        qtypes: Dict[str, int] = {}
+        for q in chunk:
+            qtypes[q["qtype"]] = qtypes.get(q["qtype"], 0) + 1
+        name = question_shard(spec)
+        sources.append({"source": source, "file": name, "offset": offset, "count": len(chunk), "qtypes": qtypes})
+        shards[name] = {"source": source, "offset": offset, "questions": chunk}
+        offset += len(chunk)
+
+    manifest = {
+        "meta": data["meta"],
+        "documents": data["documents"],
+        "tags": list(tags),
+        "knowledge": {"file": KNOWLEDGE_SHARD, "count": len(data["knowledge"])},
+        "questions": sources,
+        "index": {"file": INDEX_NAME},
+        "related": related,
+    }
+    return {MANIFEST_NAME: manifest, **shards}
+
+
+def remove_stale_files(directory: Path, keep: Iterable[str]) -> None:
+    # Published name.<hash>.json copies belong to build_assets.py, which
+    # removes the ones that are no longer referenced.
+    for path in sorted(directory.glob("*.json")):
+        if path.name not in keep and not HASHED_NAME_RE.search(path.name):
+            path.unlink()
+            print(f"Removed {path}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build the sharded site data of every course in tools/courses.json from its tex sources.")
+    parser.add_argument("--force", action="store_true", help="ignore the build cache and rebuild everything")
+    parser.add_argument(
+        "--wire",
+        choices=["compact", "pretty"],
+        default="compact",
+        help="shard encoding: minified with interned tables and precomputed fields (default), or indented records",
+    )
+    parser.add_argument("--course", action="append", help="build only this course id (repeatable; default: all)")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="build stale courses in N worker processes (0 = one per CPU, default 1)",
+    )
+    parser.add_argument("--tag-report", type=Path, help="also write the matched topic keywords per item to this JSON file (one course)")
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        type=Path,
+        const=default_report("build_web_data"),
+        help="time each stage and write a JSON report (default .build-cache/profile-build_web_data.json)",
+    )
+    parser.add_argument("--profile-pstats", type=Path, help="also run under cProfile and dump pstats to this file")
+    args = parser.parse_args(argv)
+    args.jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    if args.profile or args.profile_pstats or args.tag_report:
+        # Stages are only timed, and items only kept, in this process.
+        args.jobs = 1
+    if args.profile:
+        PROFILER.enable()
+        PROFILER.instrument(sys.modules[__name__], PROFILE_STAGES)
+        PROFILER.instrument(tex_ir, tex_ir.PROFILE_STAGES)
+    with profiling("build_web_data", args.profile, args.profile_pstats):
+        build(args)
+
+
+def select_courses(ids: Optional[List[str]]) -> List[Course]:
+    known = {course.id for course in COURSES}
+    unknown = set(ids or []) - known
+    if unknown:
+        raise SystemExit(f"Unknown course(s): {', '.join(sorted(unknown))}; known: {', '.join(sorted(known))}")
+    return [course for course in COURSES if not ids or course.id in ids]
+
+
+def open_cache(force: bool = False) -> BuildCache:
+    return BuildCache(
+        "build_web_data",
+        code_version(PARSER_VERSION, [Path(__file__), Path(tex_clean.__file__), Path(tex_ir.__file__), Path(topic_match.__file__), Path(search_index.__file__), Path(wire_format.__file__)]),
+        force=force,
+    )
+
+
+def site_inputs(course: Course, wire: str) -> str:
+    sources = digest_files([course.practice_source, course.knowledge_source, TAXONOMY])
+    return digest_text(sources, digest_json(asdict(course)), wire)
+
+
+def site_outputs(course: Course) -> List[Tuple[str, Path]]:
+    outputs = [course.data_path / name for name in site_files(course)]
+    return [(out.relative_to(ROOT).as_posix(), out) for out in outputs]
+
+
+def write_site(course: Course, knowledge: List[KnowledgeItem], questions: List[QuestionItem], wire: str) -> Dict:
+    data = build_data(course, knowledge, questions)
+    files = build_shards(course, data)
+    files[INDEX_NAME] = build_search_index(data)
+    compact = wire == "compact"
+    if compact:
+        files = encode_site(files, MANIFEST_NAME, KNOWLEDGE_SHARD, INDEX_NAME)
+    for name, payload in files.items():
+        out = course.data_path / name
+        if compact or name == INDEX_NAME:
+            text = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+        else:
+            text = json.dumps(payload, ensure_ascii=False, indent=2)
+        changed = write_if_changed(out, text)
+        print(f"{'Wrote' if changed else 'Unchanged'} {out}")
+    remove_stale_files(course.data_path, files)
+    return data
+
+
+def build_course(course: Course, wire: str, force: bool) -> str:
+    # Returns the log, which the parent prints in course order.
+    log = io.StringIO()
+    with redirect_stdout(log):
+        data = write_site(course, parse_knowledge_source(course), parse_practice(course, force), wire)
+        print(f"Knowledge: {data['meta']['knowledge_count']} | Questions: {data['meta']['question_count']}")
+    return log.getvalue()
+
+
+def build(args: argparse.Namespace) -> None:
+    courses = select_courses(args.course)
+    if args.tag_report and len(courses) != 1:
+        raise SystemExit("--tag-report needs a single course; pass --course")
+    cache = open_cache(args.force)
+    inputs = {course.id: site_inputs(course, args.wire) for course in courses}
+    stale = [
+        course
+        for course in courses
+        if args.tag_report or not all([cache.is_fresh(key, inputs[course.id], out) for key, out in site_outputs(course)])
+    ]
+
+    pool = ProcessPoolExecutor(max_workers=min(args.jobs, len(stale))) if args.jobs > 1 and len(stale) > 1 else None
+    futures: Dict[str, Future[str]] = {}
+    if pool is not None:
+        futures = {course.id: pool.submit(build_course, course, args.wire, args.force) for course in stale}
+    failed: List[str] = []
+    try:
+        # Consumed in courses.json order so the log does not depend on scheduling.
+        for course in courses:
+            if course not in stale:
+                print(f"Cached {course.data_path} ({len(site_outputs(course))} files)")
+                continue
+            if args.tag_report:
+                knowledge, questions = parse_knowledge_source(course), parse_practice(course, args.force)
+                data = write_site(course, knowledge, questions, args.wire)
+                report = tag_report(knowledge, questions)
+                write_if_changed(args.tag_report, json.dumps(report, ensure_ascii=False, indent=2))
+                print(f"Tag report: {args.tag_report}")
+                print(f"Knowledge: {data['meta']['knowledge_count']} | Questions: {data['meta']['question_count']}")
+            else:
+                future = futures.get(course.id)
+                try:
+                    log = future.result() if future is not None else build_course(course, args.wire, args.force)
+                except Exception as exc:
+                    print(f"Failed {course.id}: {type(exc).__name__}: {exc}", file=sys.stderr)
+                    failed.append(course.id)
+                    continue
+                print(log, end="")
+            for key, out in site_outputs(course):
+                cache.record(key, inputs[course.id], out)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    tex_ir.prune_documents(course.practice_source for course in stale)
+    cache.save()
+    print(cache.summary())
+    if failed:
+        raise SystemExit(f"{len(failed)} course(s) failed: {', '.join(failed)}")
 
 
 if __name__ == "__main__":
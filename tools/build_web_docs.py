@@ -1,14 +1,73 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import argparse
 import html
+import json
+import os
 import re
-from dataclasses import dataclass
+import shutil
+import sys
+import tempfile
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass
 from pathlib import Path
+from typing import Iterable, Iterator, TextIO
+
+import tex_clean
+import tex_ir
+import fingerprint
+from build_cache import BuildCache, code_version, digest_files, digest_json, digest_text, replace_if_changed
+from build_profile import PROFILER, default_report, profiling
+from courses import COURSES
+from fingerprint import DOCS, HASHED_NAME_RE, asset_url, file_hash, with_hash
+from tex_ir import (
+    Callout,
+    Document,
+    Heading,
+    ListBlock,
+    Paragraph,
+    Question,
+    TableItem,
+    TableRow,
+    Verbatim,
+    load_document,
+    strip_comments,
+    verbatim_input_paths,
+)
 
 ROOT = Path(__file__).resolve().parents[1]
-SRC_DIR = ROOT / "output" / "src"
+# Sources of the course index.html shows, for the benchmarks.
+SRC_DIR = COURSES[0].src_path
 OUT_DIR = ROOT / "docs" / "readers"
+# Lazily loaded chunks of chunked readers.
+PARTS_DIR = OUT_DIR / "parts"
+READER_CSS = "assets/reader.css"
+# TOC drawer, in-page search and service worker registration shared by all readers.
+READER_JS = "assets/reader.js"
+
+# Bump when the rendered pages change for reasons the code digest cannot see.
+PARSER_VERSION = "1"
+# Leaf blocks of a rendered body, in document order. reader.js enumerates the
+# same elements with querySelectorAll("h1,h2,h3,p,li,pre") to resolve block ids.
+SEARCH_BLOCK_RE = re.compile(r"<(h[1-3]|p|li|pre)\b[^>]*>(.*?)</\1>", re.S)
+CHUNK_HEADING_RE = re.compile(r"<h[12] id=\"")
+HEADING_ID_RE = re.compile(r"<h[1-3] id=\"([^\"]+)\"")
+PART_SRC_RE = re.compile(r"data-src=\"parts/([^\"]+)\"")
+# Functions timed by --profile, as named in the report, besides those of
+# tex_ir.PROFILE_STAGES; BodyWriter methods are reported as "BodyWriter.<name>".
+PROFILE_STAGES = [
+    "read_tex",
+    "verbatim_lines",
+    "html_events",
+    "event_html",
+    "build_toc_html",
+    "build_mobile_toc_html",
+    "write_page",
+    "file_hash",
+    "replace_if_changed",
+]
+PROFILE_METHODS = ["write", "close", "write_index"]
 
 
 @dataclass(frozen=True)
@@ -17,21 +76,37 @@ class DocSpec:
     title: str
     source_name: str
     output_name: str
+    # Split the page at H1/H2 headings into chunks of about this many bytes,
+    # loaded on demand; 0 renders a single page.
+    chunk_size: int = 0
+    course: str = ""
+    # Source directory, relative to the repository root.
+    src: str = "output/src"
+
+    @property
+    def source_path(self) -> Path:
+        return ROOT / self.src / self.source_name
+
 
+@dataclass
+class RenderedDoc:
+    changed: bool
+    parts: list[str]
 
+
+# One reader per course document that has one (see tools/courses.json).
 DOC_SPECS = [
     DocSpec(
-        doc_id="doc-1",
-        title="企业短信培训学习手册（专业文稿版）",
-        source_name="original_complete.tex",
-        output_name="doc-1.html",
-    ),
-    DocSpec(
-        doc_id="doc-3",
-        title="题库（学习测评版）",
-        source_name="practice_with_brain_science.tex",
-        output_name="doc-3.html",
-    ),
+        doc_id=doc.id,
+        title=doc.title,
+        source_name=doc.source,
+        output_name=doc.reader,
+        chunk_size=doc.chunk_size,
+        course=course.id,
+        src=course.src,
+    )
+    for course in COURSES
+    for doc in course.readers()
 ]
 
 
@@ -39,369 +114,89 @@ def read_tex(source_path: Path) -> str:
     return source_path.read_text(encoding="utf-8")
 
 
-def strip_comments(text: str) -> str:
-    return re.sub(r"(?<!\\)%[^\n]*", "", text)
-
-
-def extract_document_body(text: str) -> str:
-    begin = re.search(r"\\begin\{document\}", text)
-    end = re.search(r"\\end\{document\}", text)
-    if begin and end and begin.end() < end.start():
-        return text[begin.end() : end.start()]
-    return text
-
-
-def remove_braced_command(text: str, command: str) -> str:
-    token = f"\\{command}" + "{"
-    cursor = 0
-    parts = []
-
-    while True:
-        start = text.find(token, cursor)
-        if start < 0:
-            parts.append(text[cursor:])
-            break
-
-        parts.append(text[cursor:start])
-        i = start + len(token)
-        depth = 1
-
-        while i < len(text) and depth > 0:
-            if text[i] == "{":
-                depth += 1
-            elif text[i] == "}":
-                depth -= 1
-            i += 1
-
-        cursor = i
-
-    return "".join(parts)
-
-
-def clean_math(expr: str) -> str:
-    s = expr
-    s = s.replace(r"\leq", "≤")
-    s = s.replace(r"\geq", "≥")
-    s = s.replace(r"\Rightarrow", "=>")
-    s = s.replace(r"\rightarrow", "→")
-    s = s.replace(r"\leftarrow", "←")
-    s = s.replace(r"\%", "%")
-    s = s.replace("{", "").replace("}", "")
-    s = re.sub(r"\\[a-zA-Z]+", "", s)
-    s = re.sub(r"\s+", " ", s)
-    return s.strip()
-
-
-def clean_inline(text: str, collapse_whitespace: bool = True) -> str:
-    s = text
-    s = s.replace("\\%", "%")
-    s = s.replace("\\#", "#")
-    s = s.replace("\\_", "_")
-    s = s.replace("\\&", "&")
-    s = s.replace("~", " ")
-    s = s.replace("\\par", " ")
-    s = s.replace("\\\\", " ")
-
-    s = re.sub(r"\\ansline\{([^{}]*)\}", r"答案：\1", s)
-    s = re.sub(r"\\expline\{([^{}]*)\}", r"解释：\1", s)
-    s = re.sub(r"\\coverline\{([^{}]*)\}", r"\1", s)
-
-    wrappers = ["textbf", "mystrong", "texttt", "ansbadge", "emph", "underline"]
-    changed = True
-    while changed:
-        changed = False
-        for cmd in wrappers:
-            pattern = rf"\\{cmd}\{{([^{{}}]*)\}}"
-            new = re.sub(pattern, r"\1", s)
-            if new != s:
-                s = new
-                changed = True
-
-    s = re.sub(r"\$([^$]+)\$", lambda m: clean_math(m.group(1)), s)
-
-    s = re.sub(r"\\vspace\*?\{[^{}]*\}", " ", s)
-    s = re.sub(r"\\fontsize\{[^{}]*\}\{[^{}]*\}", " ", s)
-    s = re.sub(r"\\color\{[^{}]*\}", " ", s)
-
-    s = re.sub(r"\\[a-zA-Z]+\*?(?:\[[^\]]*\])?", " ", s)
-    s = s.replace("{", "").replace("}", "")
-
-    if collapse_whitespace:
-        s = re.sub(r"\s+", " ", s)
-    return s.strip()
-
-
-def expand_verbatim_input(text: str, source_path: Path) -> str:
-    pattern = re.compile(r"\\VerbatimInput(?:\[[^\]]*\])?\{([^}]*)\}")
-
-    def repl(match: re.Match[str]) -> str:
-        rel_path = match.group(1).strip()
-        raw_path = (source_path.parent / rel_path).resolve()
-        if not raw_path.exists():
-            missing = f"引用文件缺失：{rel_path}"
-            return f"\n[[PRE_START]]\n{missing}\n[[PRE_END]]\n"
-        content = raw_path.read_text(encoding="utf-8")
-        return f"\n[[PRE_START]]\n{content.rstrip()}\n[[PRE_END]]\n"
-
-    return pattern.sub(repl, text)
-
-
-def convert_longtable_blocks(text: str) -> str:
-    pattern = re.compile(r"\\begin\{longtable\}\{[^\n]*\}(.*?)\\end\{longtable\}", re.S)
-
-    def repl(match: re.Match[str]) -> str:
-        block = match.group(1)
-        block = re.sub(r"\\(?:toprule|midrule|bottomrule|hline)", "", block)
-
-        rows = []
-        for raw_row in re.split(r"\\\\", block):
-            row = raw_row.strip()
-            if not row:
-                continue
-            cells = [clean_inline(cell) for cell in row.split("&")]
-            cells = [cell for cell in cells if cell]
-            if not cells:
-                continue
-
-            if len(cells) == 1:
-                rows.append(f"[[TABLE_ITEM]] {cells[0]}")
-                continue
-
-            left = cells[0]
-            right = "；".join(cells[1:])
-            rows.append(f"[[TABLE_ROW]] {left} || {right}")
-
-        if not rows:
-            return "\n"
-        return "\n" + "\n".join(rows) + "\n"
-
-    return pattern.sub(repl, text)
-
-
-def preprocess(text: str, source_path: Path) -> str:
-    content = extract_document_body(text)
-    content = strip_comments(content)
-    content = expand_verbatim_input(content, source_path)
-    content = remove_braced_command(content, "hypersetup")
-    content = convert_longtable_blocks(content)
-
-    content = re.sub(r"\\chapter\{([^{}]*)\}", lambda m: f"\n[[H1]] {clean_inline(m.group(1))}\n", content)
-    content = re.sub(r"\\section\{([^{}]*)\}", lambda m: f"\n[[H2]] {clean_inline(m.group(1))}\n", content)
-    content = re.sub(r"\\subsection\{([^{}]*)\}", lambda m: f"\n[[H3]] {clean_inline(m.group(1))}\n", content)
-
-    block_replacements = {
-        r"\begin{itemize}": "\n[[UL_START]]\n",
-        r"\end{itemize}": "\n[[UL_END]]\n",
-        r"\begin{enumerate}": "\n[[OL_START]]\n",
-        r"\end{enumerate}": "\n[[OL_END]]\n",
-        r"\begin{keybox}": "\n[[CALLOUT_START]]\n",
-        r"\end{keybox}": "\n[[CALLOUT_END]]\n",
-        r"\begin{riskbox}": "\n[[CALLOUT_START]]\n",
-        r"\end{riskbox}": "\n[[CALLOUT_END]]\n",
-        r"\begin{titlepage}": "\n",
-        r"\end{titlepage}": "\n",
-        r"\tableofcontents": "\n",
-        r"\clearpage": "\n",
-        r"\newpage": "\n",
-        r"\vfill": "\n",
-        r"\centering": "\n",
-    }
-    for src, dst in block_replacements.items():
-        content = content.replace(src, dst)
-
-    content = re.sub(r"\\item\s*", "\n[[ITEM]] ", content)
-    content = re.sub(r"\\vspace\*?\{[^{}]*\}", "\n", content)
-
-    content = re.sub(r"\\begin\{[^}]+\}", "\n", content)
-    content = re.sub(r"\\end\{[^}]+\}", "\n", content)
-
-    content = content.replace("\\\\", "\n")
-    content = content.replace("\\par", "\n")
-
-    return content
-
-
-def make_slug(text: str, used: set[str]) -> str:
-    slug = re.sub(r"[^a-zA-Z0-9\u4e00-\u9fff]+", "-", text).strip("-").lower()
-    if not slug:
-        slug = "section"
-    base = slug
-    i = 2
-    while slug in used:
-        slug = f"{base}-{i}"
-        i += 1
-    used.add(slug)
-    return slug
-
-
-def parse_to_html(content: str) -> tuple[str, list[tuple[int, str, str]]]:
-    lines = content.splitlines()
-
-    parts: list[str] = []
-    toc: list[tuple[int, str, str]] = []
-    used_ids: set[str] = set()
-
-    paragraph_chunks: list[str] = []
-    list_mode: str | None = None
-    list_items: list[str] = []
-    callout_depth = 0
-
-    pre_mode = False
-    pre_lines: list[str] = []
-
-    def flush_paragraph() -> None:
-        nonlocal paragraph_chunks
-        if not paragraph_chunks:
-            return
-        text = clean_inline(" ".join(paragraph_chunks))
-        paragraph_chunks = []
-        if text:
-            parts.append(f"<p>{html.escape(text)}</p>")
-
-    def flush_list() -> None:
-        nonlocal list_mode, list_items
-        if not list_mode:
-            list_items = []
-            return
-        cleaned = [clean_inline(item) for item in list_items]
-        cleaned = [item for item in cleaned if item]
-        if cleaned:
-            tag = "ol" if list_mode == "ol" else "ul"
-            li_html = "".join(f"<li>{html.escape(item)}</li>" for item in cleaned)
-            parts.append(f"<{tag}>{li_html}</{tag}>")
-        list_mode = None
-        list_items = []
-
-    for raw_line in lines:
-        stripped = raw_line.strip()
-
-        if pre_mode:
-            if stripped == "[[PRE_END]]":
-                pre_mode = False
-                pre_text = "\n".join(pre_lines)
-                pre_lines = []
-                parts.append(f"<pre>{html.escape(pre_text)}</pre>")
+def verbatim_lines(path: Path) -> Iterator[str]:
+    # The lines of path.read_text().rstrip(), read one at a time. Blank lines
+    # are held back until more text follows, since rstrip drops trailing ones.
+    last: str | None = None
+    blank: list[str] = []
+    with path.open(encoding="utf-8", newline="") as handle:
+        for raw_line in handle:
+            for line in raw_line.splitlines():
+                if not line.strip():
+                    blank.append(line)
+                    continue
+                if last is not None:
+                    yield last
+                yield from blank
+                blank = []
+                last = line
+    yield "" if last is None else last.rstrip()
+
+
+def html_events(document: Document, source_dir: Path, toc: list[tuple[int, str, str]]) -> Iterator[tuple[str, str]]:
+    # Yields ("part", html) for every top-level block and, for a <pre>, one
+    # "pre_start", a "pre_line" per line of text and one "pre_end"; headings
+    # are appended to toc as they are reached.
+    for block in document.blocks:
+        if isinstance(block, Question):
+            block = block.row
+        if isinstance(block, Heading):
+            toc.append((block.level, block.title, block.anchor))
+            tag = f"h{block.level}"
+            yield "part", f'<{tag} id="{block.anchor}">{html.escape(block.title)}</{tag}>'
+        elif isinstance(block, Paragraph):
+            yield "part", f"<p>{html.escape(block.text)}</p>"
+        elif isinstance(block, ListBlock):
+            tag = "ol" if block.ordered else "ul"
+            li_html = "".join(f"<li>{html.escape(item)}</li>" for item in block.items)
+            yield "part", f"<{tag}>{li_html}</{tag}>"
+        elif isinstance(block, Callout):
+            yield "part", '<aside class="callout">' if block.opening else "</aside>"
+        elif isinstance(block, TableItem):
+            yield "part", f'<p class="table-item">{html.escape(block.text)}</p>'
+        elif isinstance(block, TableRow):
+            yield "part", (
+                "<div class=\"table-row\">"
+                f"<p class=\"table-key\">{html.escape(block.key)}</p>"
+                f"<p class=\"table-value\">{html.escape(block.value)}</p>"
+                "</div>"
+            )
+        elif isinstance(block, Verbatim):
+            # Files pulled in with \VerbatimInput are streamed line by line.
+            yield "pre_start", ""
+            path = (source_dir / block.path).resolve()
+            if path.exists():
+                for line in verbatim_lines(path):
+                    yield "pre_line", line
             else:
-                pre_lines.append(raw_line.rstrip("\n"))
-            continue
-
-        if not stripped:
-            if list_mode:
-                continue
-            flush_paragraph()
-            flush_list()
-            continue
-
-        if stripped == "[[PRE_START]]":
-            flush_paragraph()
-            flush_list()
-            pre_mode = True
-            pre_lines = []
-            continue
-
-        if stripped == "[[CALLOUT_START]]":
-            flush_paragraph()
-            flush_list()
-            parts.append('<aside class="callout">')
-            callout_depth += 1
-            continue
-
-        if stripped == "[[CALLOUT_END]]":
-            flush_paragraph()
-            flush_list()
-            if callout_depth > 0:
-                parts.append("</aside>")
-                callout_depth -= 1
-            continue
-
-        if stripped == "[[UL_START]]":
-            flush_paragraph()
-            flush_list()
-            list_mode = "ul"
-            list_items = []
-            continue
-
-        if stripped == "[[OL_START]]":
-            flush_paragraph()
-            flush_list()
-            list_mode = "ol"
-            list_items = []
-            continue
-
-        if stripped in {"[[UL_END]]", "[[OL_END]]"}:
-            flush_paragraph()
-            flush_list()
-            continue
-
-        if stripped.startswith("[[H1]] ") or stripped.startswith("[[H2]] ") or stripped.startswith("[[H3]] "):
-            flush_paragraph()
-            flush_list()
-            marker, title = stripped.split(" ", 1)
-            level_map = {"[[H1]]": 1, "[[H2]]": 2, "[[H3]]": 3}
-            level = level_map[marker]
-            title_text = clean_inline(title)
-            if not title_text:
-                continue
-            anchor = make_slug(title_text, used_ids)
-            toc.append((level, title_text, anchor))
-            tag = f"h{level}"
-            parts.append(f'<{tag} id="{anchor}">{html.escape(title_text)}</{tag}>')
-            continue
-
-        if stripped.startswith("[[ITEM]] "):
-            flush_paragraph()
-            if not list_mode:
-                list_mode = "ul"
-                list_items = []
-            item_text = clean_inline(stripped[len("[[ITEM]] ") :])
-            if item_text:
-                list_items.append(item_text)
-            continue
-
-        if stripped.startswith("[[TABLE_ITEM]] "):
-            flush_paragraph()
-            flush_list()
-            row = clean_inline(stripped[len("[[TABLE_ITEM]] ") :])
-            if row:
-                parts.append(f'<p class="table-item">{html.escape(row)}</p>')
-            continue
-
-        if stripped.startswith("[[TABLE_ROW]] "):
-            flush_paragraph()
-            flush_list()
-            row = clean_inline(stripped[len("[[TABLE_ROW]] ") :], collapse_whitespace=False)
-            if row:
-                left, _, right = row.partition(" || ")
-                left = clean_inline(left)
-                right = clean_inline(right)
-                parts.append(
-                    "<div class=\"table-row\">"
-                    f"<p class=\"table-key\">{html.escape(left)}</p>"
-                    f"<p class=\"table-value\">{html.escape(right)}</p>"
-                    "</div>"
-                )
-            continue
-
-        if list_mode and list_items:
-            continuation = clean_inline(stripped)
-            if continuation:
-                list_items[-1] = f"{list_items[-1]} {continuation}"
-            continue
-
-        paragraph_chunks.append(stripped)
-
-    flush_paragraph()
-    flush_list()
-
-    if pre_mode and pre_lines:
-        pre_text = "\n".join(pre_lines)
-        parts.append(f"<pre>{html.escape(pre_text)}</pre>")
-
-    while callout_depth > 0:
-        parts.append("</aside>")
-        callout_depth -= 1
-
-    return "\n".join(parts), toc
+                yield "pre_line", f"引用文件缺失：{block.path}"
+            yield "pre_end", ""
+
+
+def event_html(events: Iterable[tuple[str, str]]) -> Iterator[tuple[str, str, str]]:
+    # Adds to each event the HTML it contributes, top-level blocks being
+    # separated by newlines.
+    separator = ""
+    first_line = False
+    for kind, value in events:
+        if kind == "part":
+            yield kind, value, separator + value
+            separator = "\n"
+        elif kind == "pre_start":
+            yield kind, value, separator + "<pre>"
+            separator = "\n"
+            first_line = True
+        elif kind == "pre_line":
+            yield kind, value, ("" if first_line else "\n") + html.escape(value)
+            first_line = False
+        else:
+            yield kind, value, "</pre>"
+
+
+def parse_to_html(document: Document, source_dir: Path) -> tuple[str, list[tuple[int, str, str]]]:
+    toc: list[tuple[int, str, str]] = []
+    body_html = "".join(piece for _, _, piece in event_html(html_events(document, source_dir, toc)))
+    return body_html, toc
 
 
 def build_toc_list_html(toc: list[tuple[int, str, str]]) -> str:
@@ -448,8 +243,134 @@ def build_mobile_toc_html(toc: list[tuple[int, str, str]]) -> str:
     )
 
 
-def render_page(title: str, body_html: str, toc_html: str, mobile_toc_html: str) -> str:
-    return f"""<!doctype html>
+def fold_case(text: str) -> str:
+    # Lowercase without changing the length, so offsets into the folded text
+    # are offsets into the page text too.
+    lowered = text.lower()
+    # No character lowercases to nothing, so equal lengths mean every one was
+    # mapped on its own; capital sigma depends on its neighbours.
+    if len(lowered) == len(text) and "Σ" not in text:
+        return lowered
+    return "".join(ch.lower() if len(ch.lower()) == 1 else ch for ch in text)
+
+
+def utf16_length(text: str) -> int:
+    return len(text.encode("utf-16-le")) // 2
+
+
+def search_index_name(spec: DocSpec) -> str:
+    return f"{Path(spec.output_name).stem}.search.json"
+
+
+def part_name(spec: DocSpec, index: int) -> str:
+    return f"{Path(spec.output_name).stem}-{index}.html"
+
+
+class BodyWriter:
+    # Streams the events of html_events into chunk files under directory and
+    # collects the search index on the way, holding one block at a time.
+    #
+    # The body is cut before H1/H2 headings outside callouts once the current
+    # chunk has reached chunk_size bytes (never if chunk_size is 0). The index
+    # has the text of every block as the browser sees it (textContent), folded
+    # and joined with newlines; offsets are in UTF-16 units like JavaScript
+    # strings and chunks holds the index of the first block of every chunk.
+
+    def __init__(self, directory: Path, chunk_size: int) -> None:
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.chunks: list[Path] = []
+        self.anchors: list[list[str]] = []
+        self.starts: list[int] = []
+        self.offsets: list[int] = []
+        self.handle: TextIO | None = None
+        self.size = 0
+        self.depth = 0
+        self.position = 0
+        self.pre_lines = 0
+        self.pre_skipped = False
+        self.text_path = directory / "index-text"
+        self.text = self.text_path.open("w", encoding="utf-8", newline="")
+
+    def open_chunk(self) -> None:
+        if self.handle is not None:
+            self.handle.close()
+        path = self.directory / f"chunk-{len(self.chunks)}.html"
+        self.handle = path.open("w", encoding="utf-8", newline="")
+        self.chunks.append(path)
+        self.anchors.append([])
+        self.starts.append(len(self.offsets))
+        self.size = 0
+
+    def begin_block(self) -> None:
+        if self.offsets:
+            self.add_text("\n")
+        self.offsets.append(self.position)
+
+    def add_text(self, text: str) -> None:
+        folded = fold_case(text)
+        self.text.write(json.dumps(folded, ensure_ascii=False)[1:-1])
+        self.position += utf16_length(folded)
+
+    def write(self, kind: str, value: str, piece: str) -> None:
+        boundary = kind == "part" and piece.startswith("\n") and CHUNK_HEADING_RE.match(value) is not None
+        # The newline before a boundary belongs to neither chunk.
+        counted = piece[1:] if boundary else piece
+        if self.handle is None:
+            self.open_chunk()
+        elif boundary and self.chunk_size > 0 and self.depth == 0 and self.size >= self.chunk_size:
+            self.open_chunk()
+            piece = counted
+        self.handle.write(piece)
+        self.size += len(counted.encode("utf-8"))
+
+        if kind == "part":
+            self.depth += value.count("<aside") - value.count("</aside>")
+            self.anchors[-1].extend(HEADING_ID_RE.findall(value))
+            for match in SEARCH_BLOCK_RE.finditer(value):
+                self.begin_block()
+                self.add_text(html.unescape(match.group(2)).replace("\r\n", "\n").replace("\r", "\n"))
+        elif kind == "pre_start":
+            self.begin_block()
+            self.pre_lines = 0
+            self.pre_skipped = False
+        elif kind == "pre_line":
+            # Browsers drop a newline right after <pre>, i.e. an empty first
+            # line that has more lines after it.
+            if self.pre_lines == 0 and not value:
+                self.pre_skipped = True
+            elif self.pre_lines == 1 and self.pre_skipped:
+                self.add_text(value)
+            else:
+                self.add_text(value if self.pre_lines == 0 else "\n" + value)
+            self.pre_lines += 1
+
+    def close(self) -> None:
+        if self.handle is None:
+            self.open_chunk()
+        self.handle.close()
+        self.text.close()
+
+    def write_index(self, path: Path) -> None:
+        head = {"version": 1, "chunks": self.starts, "offsets": self.offsets}
+        with path.open("w", encoding="utf-8", newline="") as out, self.text_path.open(encoding="utf-8", newline="") as text:
+            out.write(json.dumps(head, separators=(",", ":"))[:-1] + ',"text":"')
+            shutil.copyfileobj(text, out)
+            out.write('"}')
+
+
+def companion_files(spec: DocSpec) -> list[Path]:
+    # Files the rendered page refers to, under the names they are written as.
+    page = OUT_DIR / spec.output_name
+    parts = PART_SRC_RE.findall(page.read_text(encoding="utf-8")) if page.exists() else []
+    return [OUT_DIR / search_index_name(spec), *(PARTS_DIR / HASHED_NAME_RE.sub("", name) for name in parts)]
+
+
+def render_page_shell(
+    title: str, toc_html: str, mobile_toc_html: str, stylesheet: str, script: str, search_index: str
+) -> tuple[str, str]:
+    # The page around the body, which is streamed in between the two halves.
+    head = f"""<!doctype html>
 <html lang=\"zh-CN\">
   <head>
     <meta charset=\"UTF-8\" />
@@ -458,7 +379,8 @@ def render_page(title: str, body_html: str, toc_html: str, mobile_toc_html: str)
     <link rel=\"preconnect\" href=\"https://fonts.googleapis.com\" />
     <link rel=\"preconnect\" href=\"https://fonts.gstatic.com\" crossorigin />
     <link href=\"https://fonts.googleapis.com/css2?family=Noto+Sans+SC:wght@400;500;700;900&display=swap\" rel=\"stylesheet\" />
-    <link rel=\"stylesheet\" href=\"../assets/reader.css?v=20260210-0015\" />
+    <link rel=\"stylesheet\" href=\"../{stylesheet}\" />
+    <script src=\"../{script}\" defer></script>
   </head>
   <body>
     <a class=\"skip-link\" href=\"#docMain\">跳到正文</a>
@@ -479,202 +401,192 @@ def render_page(title: str, body_html: str, toc_html: str, mobile_toc_html: str)
         <span id=\"docSearchMeta\" class=\"doc-search-meta\">0/0</span>
       </section>
       {toc_html}
-      <article class=\"doc-content\">
-{body_html}
+      <article class=\"doc-content\" data-search-index=\"{search_index}\">
+"""
+    tail = """
       </article>
     </main>
-    <script>
-      (() => {{
-        const setupTocDrawer = () => {{
-          const btn = document.getElementById("tocFloatBtn");
-          const drawer = document.getElementById("tocDrawer");
-          if (!btn || !drawer) return;
-
-          const closeDrawer = () => {{
-            drawer.hidden = true;
-            btn.setAttribute("aria-expanded", "false");
-            document.body.classList.remove("toc-open");
-          }};
-
-          const openDrawer = () => {{
-            drawer.hidden = false;
-            btn.setAttribute("aria-expanded", "true");
-            document.body.classList.add("toc-open");
-          }};
-
-          btn.addEventListener("click", () => {{
-            if (drawer.hidden) openDrawer();
-            else closeDrawer();
-          }});
-
-          drawer.addEventListener("click", (event) => {{
-            const closeBtn = event.target.closest("[data-action='close-toc']");
-            if (closeBtn) {{
-              closeDrawer();
-              return;
-            }}
-            const tocLink = event.target.closest("a[href^='#']");
-            if (tocLink) closeDrawer();
-          }});
-
-          document.addEventListener("keydown", (event) => {{
-            if (event.key === "Escape") closeDrawer();
-          }});
-        }};
-
-        const setupDocSearch = () => {{
-          const root = document.querySelector(".doc-content");
-          const input = document.getElementById("docSearchInput");
-          const runBtn = document.getElementById("docSearchRun");
-          const prevBtn = document.getElementById("docSearchPrev");
-          const nextBtn = document.getElementById("docSearchNext");
-          const clearBtn = document.getElementById("docSearchClear");
-          const meta = document.getElementById("docSearchMeta");
-          if (!root || !input || !runBtn || !prevBtn || !nextBtn || !clearBtn || !meta) return;
-
-          let marks = [];
-          let activeIndex = -1;
-
-          const escapeRegExp = (text) => String(text).replace(/[.*+?^$()|[\\]\\\\{{}}]/g, "\\\\$&");
-          const updateMeta = () => {{
-            meta.textContent = `${{marks.length ? activeIndex + 1 : 0}}/${{marks.length}}`;
-          }};
-
-          const clearMarks = () => {{
-            root.querySelectorAll("mark.doc-search-hit, mark.doc-search-hit-active").forEach((mark) => {{
-              const text = document.createTextNode(mark.textContent || "");
-              mark.replaceWith(text);
-            }});
-            root.normalize();
-            marks = [];
-            activeIndex = -1;
-            updateMeta();
-          }};
-
-          const setActive = (index) => {{
-            if (!marks.length) {{
-              activeIndex = -1;
-              updateMeta();
-              return;
-            }}
-            marks.forEach((m) => m.classList.remove("doc-search-hit-active"));
-            activeIndex = ((index % marks.length) + marks.length) % marks.length;
-            const current = marks[activeIndex];
-            current.classList.add("doc-search-hit-active");
-            current.scrollIntoView({{ behavior: "smooth", block: "center" }});
-            updateMeta();
-          }};
-
-          const runSearch = () => {{
-            const keyword = input.value.trim();
-            clearMarks();
-            if (!keyword) return;
-
-            const regex = new RegExp(escapeRegExp(keyword), "gi");
-            const walker = document.createTreeWalker(root, NodeFilter.SHOW_TEXT, {{
-              acceptNode(node) {{
-                if (!node.nodeValue || !node.nodeValue.trim()) return NodeFilter.FILTER_REJECT;
-                const parent = node.parentElement;
-                if (!parent) return NodeFilter.FILTER_REJECT;
-                if (parent.closest("script,style,mark")) return NodeFilter.FILTER_REJECT;
-                return NodeFilter.FILTER_ACCEPT;
-              }},
-            }});
-
-            const textNodes = [];
-            while (walker.nextNode()) {{
-              textNodes.push(walker.currentNode);
-            }}
-
-            textNodes.forEach((node) => {{
-              const text = node.nodeValue || "";
-              regex.lastIndex = 0;
-              if (!regex.test(text)) return;
-              regex.lastIndex = 0;
-
-              const frag = document.createDocumentFragment();
-              let last = 0;
-              text.replace(regex, (match, offset) => {{
-                if (offset > last) {{
-                  frag.appendChild(document.createTextNode(text.slice(last, offset)));
-                }}
-                const mark = document.createElement("mark");
-                mark.className = "doc-search-hit";
-                mark.textContent = match;
-                frag.appendChild(mark);
-                last = offset + match.length;
-                return match;
-              }});
-              if (last < text.length) {{
-                frag.appendChild(document.createTextNode(text.slice(last)));
-              }}
-              node.replaceWith(frag);
-            }});
-
-            marks = Array.from(root.querySelectorAll("mark.doc-search-hit"));
-            if (marks.length) setActive(0);
-            else updateMeta();
-          }};
-
-          runBtn.addEventListener("click", runSearch);
-          prevBtn.addEventListener("click", () => {{
-            if (!marks.length) {{
-              runSearch();
-              return;
-            }}
-            setActive(activeIndex - 1);
-          }});
-          nextBtn.addEventListener("click", () => {{
-            if (!marks.length) {{
-              runSearch();
-              return;
-            }}
-            setActive(activeIndex + 1);
-          }});
-          clearBtn.addEventListener("click", () => {{
-            input.value = "";
-            clearMarks();
-            input.focus();
-          }});
-          input.addEventListener("keydown", (event) => {{
-            if (event.key === "Enter") {{
-              event.preventDefault();
-              runSearch();
-            }}
-          }});
-          input.addEventListener("input", () => {{
-            if (!input.value.trim()) clearMarks();
-          }});
-
-          updateMeta();
-        }};
-
-        setupTocDrawer();
-        setupDocSearch();
-      }})();
-    </script>
   </body>
 </html>
 """
+    return head, tail
+
+
+def write_page(path: Path, head: str, tail: str, body: BodyWriter, part_urls: list[str]) -> None:
+    # The first chunk is inline; the others are placeholders that reader.js
+    # fills from data-src, listing their heading ids so links can find them.
+    chunked = len(body.chunks) > 1
+    with path.open("w", encoding="utf-8", newline="") as out:
+        out.write(head)
+        if chunked:
+            out.write('<section class="doc-chunk">\n')
+        with body.chunks[0].open(encoding="utf-8", newline="") as chunk:
+            shutil.copyfileobj(chunk, out)
+        if chunked:
+            out.write("\n</section>")
+        for anchors, url in zip(body.anchors[1:], part_urls):
+            out.write(f'\n<section class="doc-chunk" data-src="{url}" data-anchors="{html.escape(" ".join(anchors))}"></section>')
+        out.write(tail)
+
+
+def doc_inputs_digest(spec: DocSpec) -> str:
+    source_path = spec.source_path
+    raw = read_tex(source_path) if source_path.exists() else ""
+    inputs = [source_path, *verbatim_input_paths(strip_comments(raw), source_path), DOCS / READER_CSS, DOCS / READER_JS]
+    return digest_text(digest_files(inputs), digest_json(asdict(spec)))
+
+
+def render_one(spec: DocSpec, force: bool = False) -> RenderedDoc:
+    # Writes the page, its search index and its chunks from the parsed source
+    # (see tex_ir.py); no more than a block of HTML is held in memory.
+    source_path = spec.source_path
+    document = load_document(source_path, force)
+    toc: list[tuple[int, str, str]] = []
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix=".render-", dir=OUT_DIR) as tmp:
+        directory = Path(tmp)
+        body = BodyWriter(directory, spec.chunk_size)
+        for kind, value, piece in event_html(html_events(document, source_path.parent, toc)):
+            body.write(kind, value, piece)
+        body.close()
+
+        # Index and chunks are referenced by their published names, as
+        # build_assets.py will publish them.
+        outputs: list[tuple[Path, Path]] = []
+        parts = [part_name(spec, index) for index in range(1, len(body.chunks))]
+        part_urls = []
+        for name, chunk in zip(parts, body.chunks[1:]):
+            part_urls.append(with_hash(f"parts/{name}", file_hash(chunk)))
+            outputs.append((chunk, PARTS_DIR / name))
+        index_path = directory / "index.json"
+        body.write_index(index_path)
+        outputs.append((index_path, OUT_DIR / search_index_name(spec)))
+
+        head, tail = render_page_shell(
+            spec.title,
+            build_toc_html(toc),
+            build_mobile_toc_html(toc),
+            asset_url(READER_CSS),
+            asset_url(READER_JS),
+            Path(with_hash(f"readers/{search_index_name(spec)}", file_hash(index_path))).name,
+        )
+        page_path = directory / "page.html"
+        write_page(page_path, head, tail, body, part_urls)
+        outputs.append((page_path, OUT_DIR / spec.output_name))
 
+        changed = False
+        for source, target in outputs:
+            changed = replace_if_changed(source, target) or changed
+    return RenderedDoc(changed, parts)
 
-def build_one(spec: DocSpec) -> None:
-    source_path = SRC_DIR / spec.source_name
-    output_path = OUT_DIR / spec.output_name
-
-    raw = read_tex(source_path)
-    preprocessed = preprocess(raw, source_path)
-    body_html, toc = parse_to_html(preprocessed)
-    page_html = render_page(spec.title, body_html, build_toc_html(toc), build_mobile_toc_html(toc))
 
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    output_path.write_text(page_html, encoding="utf-8")
-    print(f"Wrote {output_path}")
+def finish_one(spec: DocSpec, doc: RenderedDoc, inputs: str, cache: BuildCache) -> None:
+    output_path = OUT_DIR / spec.output_name
+    changed = doc.changed
+    # Chunks left over from an earlier, longer build (published copies are
+    # cleaned up by build_assets.py).
+    part_re = re.compile(rf"{re.escape(Path(spec.output_name).stem)}-\d+\.html")
+    if PARTS_DIR.is_dir():
+        for path in PARTS_DIR.iterdir():
+            if part_re.fullmatch(path.name) and path.name not in doc.parts:
+                path.unlink()
+                changed = True
+    print(f"{'Wrote' if changed else 'Unchanged'} {output_path}")
+    cache.record(spec.output_name, inputs, output_path)
+
+
+def build_all(specs: list[DocSpec], cache: BuildCache, jobs: int = 1) -> list[DocSpec]:
+    inputs = {spec.output_name: doc_inputs_digest(spec) for spec in specs}
+    stale = [
+        spec
+        for spec in specs
+        if not cache.is_fresh(spec.output_name, inputs[spec.output_name], OUT_DIR / spec.output_name)
+        or not all(path.exists() for path in companion_files(spec))
+    ]
+
+    pool = ProcessPoolExecutor(max_workers=min(jobs, len(stale))) if jobs > 1 and len(stale) > 1 else None
+    futures: dict[str, Future[RenderedDoc]] = {}
+    if pool is not None:
+        futures = {spec.output_name: pool.submit(render_one, spec, cache.force) for spec in stale}
+
+    failed: list[DocSpec] = []
+    try:
+        # Results are consumed in DOC_SPECS order so logs and cache entries do not
+        # depend on worker scheduling.
+        for spec in specs:
+            if spec not in stale:
+                print(f"Cached {OUT_DIR / spec.output_name}")
+                continue
+            try:
+                future = futures.get(spec.output_name)
+                with PROFILER.document(spec.output_name):
+                    doc = future.result() if future is not None else render_one(spec, cache.force)
+            except Exception as exc:
+                print(f"Failed {OUT_DIR / spec.output_name}: {type(exc).__name__}: {exc}", file=sys.stderr)
+                failed.append(spec)
+                continue
+            finish_one(spec, doc, inputs[spec.output_name], cache)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return failed
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Render docs/readers/*.html from the tex sources of the courses in tools/courses.json.")
+    parser.add_argument("--force", action="store_true", help="ignore the build cache and rebuild everything")
+    parser.add_argument("--course", action="append", help="render only the readers of this course id (repeatable; default: all)")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="render documents in N worker processes (0 = one per CPU, default 1)",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        type=Path,
+        const=default_report("build_web_docs"),
+        help="time each stage per document and write a JSON report (default .build-cache/profile-build_web_docs.json)",
+    )
+    parser.add_argument("--profile-pstats", type=Path, help="also run under cProfile and dump pstats to this file")
+    args = parser.parse_args(argv)
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    if args.profile or args.profile_pstats:
+        # Stages are only timed in this process.
+        if jobs > 1:
+            print("Profiling renders serially; ignoring --jobs")
+        jobs = 1
+    if args.profile:
+        PROFILER.enable()
+        PROFILER.instrument(sys.modules[__name__], PROFILE_STAGES)
+        PROFILER.instrument(tex_ir, tex_ir.PROFILE_STAGES)
+        PROFILER.instrument(BodyWriter, PROFILE_METHODS, "BodyWriter.")
+    with profiling("build_web_docs", args.profile, args.profile_pstats):
+        build(jobs, args.force, args.course)
+
+
+def open_cache(force: bool = False) -> BuildCache:
+    return BuildCache(
+        "build_web_docs",
+        code_version(PARSER_VERSION, [Path(__file__), Path(tex_clean.__file__), Path(tex_ir.__file__), Path(fingerprint.__file__)]),
+        force=force,
+    )
 
 
-def main() -> None:
-    for spec in DOC_SPECS:
-        build_one(spec)
+def build(jobs: int, force: bool, courses: list[str] | None = None) -> None:
+    unknown = set(courses or []) - {course.id for course in COURSES}
+    if unknown:
+        raise SystemExit(f"Unknown course(s): {', '.join(sorted(unknown))}")
+    specs = [spec for spec in DOC_SPECS if not courses or spec.course in courses]
+    cache = open_cache(force)
+    failed = build_all(specs, cache, jobs)
+    tex_ir.prune_documents({spec.source_path for spec in specs})
+    cache.save()
+    print(cache.summary())
+    if failed:
+        raise SystemExit(f"{len(failed)} document(s) failed: {', '.join(spec.output_name for spec in failed)}")
 
 
 if __name__ == "__main__":
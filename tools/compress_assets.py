@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import gzip
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fingerprint import DOCS
+
+try:
+    import brotli
+except ImportError:  # optional; only .gz siblings are written without it
+    brotli = None
+
+# Writes precompressed siblings (name.gz, name.br) next to every text file
+# under docs/, for servers that serve them directly (nginx gzip_static /
+# brotli_static). Run last, after build_assets.py. The siblings are not
+# committed; GitHub Pages compresses on its own.
+
+TEXT_SUFFIXES = {".html", ".css", ".js", ".json", ".svg", ".txt", ".xml", ".webmanifest"}
+# Below this size the compressed file saves less than a network packet.
+MIN_SIZE = 256
+
+
+def gzip_bytes(data: bytes) -> bytes:
+    # mtime=0 keeps the output identical across rebuilds.
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def brotli_bytes(data: bytes) -> bytes:
+    return brotli.compress(data, quality=11, mode=brotli.MODE_TEXT)
+
+
+def encoders() -> Dict[str, Optional[Callable[[bytes], bytes]]]:
+    return {".gz": gzip_bytes, ".br": brotli_bytes if brotli else None}
+
+
+def text_files(root: Path) -> List[Path]:
+    return sorted(path for path in root.rglob("*") if path.is_file() and path.suffix in TEXT_SUFFIXES)
+
+
+def is_current(source: Path, sibling: Path) -> bool:
+    return sibling.exists() and sibling.stat().st_mtime >= source.stat().st_mtime
+
+
+def compress_file(
+    source: Path, codecs: Dict[str, Optional[Callable[[bytes], bytes]]], force: bool
+) -> Tuple[int, Dict[str, Optional[int]], int]:
+    # Returns the source size, the size of each sibling (None if there is
+    # none) and how many siblings were (re)written.
+    data = source.read_bytes()
+    sizes: Dict[str, Optional[int]] = {}
+    written = 0
+    for suffix, encode in codecs.items():
+        sibling = source.with_name(source.name + suffix)
+        if encode is None or len(data) < MIN_SIZE:
+            # A sibling that can no longer be refreshed would be served stale.
+            if sibling.exists() and (len(data) < MIN_SIZE or not is_current(source, sibling)):
+                sibling.unlink()
+            sizes[suffix] = sibling.stat().st_size if sibling.exists() else None
+            continue
+        if not force and is_current(source, sibling):
+            sizes[suffix] = sibling.stat().st_size
+            continue
+        packed = encode(data)
+        if len(packed) >= len(data):
+            sibling.unlink(missing_ok=True)
+            sizes[suffix] = None
+            continue
+        sibling.write_bytes(packed)
+        sizes[suffix] = len(packed)
+        written += 1
+    return len(data), sizes, written
+
+
+def remove_orphans(root: Path, suffixes: List[str]) -> List[Path]:
+    # Only siblings this script could have written; other archives are left alone.
+    removed = []
+    for suffix in suffixes:
+        for sibling in sorted(root.rglob(f"*{suffix}")):
+            source = sibling.with_name(sibling.name[: -len(suffix)])
+            if source.suffix in TEXT_SUFFIXES and not source.exists():
+                sibling.unlink()
+                removed.append(sibling)
+    return removed
+
+
+def format_size(size: Optional[int]) -> str:
+    return "-" if size is None else f"{size / 1024:.1f}K"
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Write .gz/.br siblings for the text files under docs/.")
+    parser.add_argument("--force", action="store_true", help="recompress even if the siblings are up to date")
+    parser.add_argument("--quiet", action="store_true", help="print only the totals")
+    args = parser.parse_args(argv)
+
+    codecs = encoders()
+    if brotli is None:
+        print("brotli module not installed; writing .gz only (pip install brotli for .br)")
+
+    for path in remove_orphans(DOCS, list(codecs)):
+        print(f"Removed {path}")
+
+    totals = {"raw": 0, **{suffix: 0 for suffix in codecs}}
+    written = 0
+    rows = []
+    for source in text_files(DOCS):
+        size, sizes, count = compress_file(source, codecs, args.force)
+        written += count
+        totals["raw"] += size
+        for suffix, packed in sizes.items():
+            totals[suffix] += size if packed is None else packed
+        rows.append((source.relative_to(DOCS).as_posix(), size, sizes))
+
+    if not args.quiet:
+        width = max((len(name) for name, _, _ in rows), default=4)
+        print(f"{'file':<{width}}  {'raw':>8}" + "".join(f"  {suffix:>8}" for suffix in codecs))
+        for name, size, sizes in rows:
+            print(f"{name:<{width}}  {format_size(size):>8}" + "".join(f"  {format_size(sizes[s]):>8}" for s in codecs))
+    summary = ", ".join(
+        f"{suffix} {format_size(totals[suffix])} ({totals[suffix] / totals['raw']:.0%})"
+        for suffix in codecs
+        if codecs[suffix] is not None and totals["raw"]
+    )
+    print(f"Compressed: {len(rows)} files, {format_size(totals['raw'])} raw; {summary}; {written} written")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, Tuple
+
+from fingerprint import DOCS
+
+# The courses the build tools iterate over, read from tools/courses.json.
+# Each course has its own sources, PDFs, data shards and readers; styles,
+# scripts and the asset pipeline are shared. The first course is the one
+# index.html shows.
+#
+# Paths left out of a course entry default to courses/<id>/src,
+# courses/<id>/pdf, docs/assets/data-<id>/ and docs/files-<id>/. Each course
+# cleans up and globs its whole data and files directories, so those of two
+# courses may not contain one another. Readers of all courses are written to
+# docs/readers/, so their names must be unique.
+
+ROOT = Path(__file__).resolve().parents[1]
+COURSES_FILE = Path(__file__).resolve().parent / "courses.json"
+
+
+@dataclass(frozen=True)
+class ChapterSpec:
+    qtype: str
+    id_prefix: str
+    shard: str
+
+
+@dataclass(frozen=True)
+class CourseDocument:
+    source: str
+    # Delivery name of the compiled PDF; "" if the document is not compiled.
+    pdf: str = ""
+    # Documents with a reader page are listed on the site.
+    id: str = ""
+    title: str = ""
+    desc: str = ""
+    reader: str = ""
+    chunk_size: int = 0
+
+
+@dataclass(frozen=True)
+class Course:
+    id: str
+    title: str
+    version: str
+    src: str
+    pdf_dir: str
+    data_dir: str
+    files_dir: str
+    practice: str
+    knowledge: str
+    # Question-bank chapters of the practice source, keyed by the prefix of
+    # their \chapter title, in site order.
+    question_chapters: Dict[str, ChapterSpec]
+    documents: Tuple[CourseDocument, ...]
+
+    @property
+    def src_path(self) -> Path:
+        return ROOT / self.src
+
+    @property
+    def pdf_path(self) -> Path:
+        return ROOT / self.pdf_dir
+
+    @property
+    def data_path(self) -> Path:
+        return DOCS / self.data_dir
+
+    @property
+    def files_path(self) -> Path:
+        return DOCS / self.files_dir
+
+    @property
+    def practice_source(self) -> Path:
+        return self.src_path / self.practice
+
+    @property
+    def knowledge_source(self) -> Path:
+        return self.src_path / self.knowledge
+
+    def readers(self) -> List[CourseDocument]:
+        return [doc for doc in self.documents if doc.reader]
+
+
+def parse_course(entry: Dict) -> Course:
+    course_id = entry["id"]
+    return Course(
+        id=course_id,
+        title=entry["title"],
+        version=entry.get("version", "web-v1.0"),
+        src=entry.get("src", f"courses/{course_id}/src"),
+        pdf_dir=entry.get("pdf_dir", f"courses/{course_id}/pdf"),
+        data_dir=entry.get("data_dir", f"assets/data-{course_id}"),
+        files_dir=entry.get("files_dir", f"files-{course_id}"),
+        practice=entry["practice"],
+        knowledge=entry["knowledge"],
+        question_chapters={
+            chapter["prefix"]: ChapterSpec(chapter["qtype"], chapter["id_prefix"], chapter["shard"])
+            for chapter in entry["question_chapters"]
+        },
+        documents=tuple(CourseDocument(**doc) for doc in entry.get("documents", [])),
+    )
+
+
+def load_courses(path: Path = COURSES_FILE) -> List[Course]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    courses = [parse_course(entry) for entry in data["courses"]]
+    if not courses:
+        raise ValueError(f"{path}: no courses")
+    # Outputs shared between courses would overwrite each other.
+    owners: Dict[Tuple[str, str], str] = {}
+    for course in courses:
+        names = [("id", course.id), *(("reader", doc.reader) for doc in course.readers())]
+        for kind, name in names:
+            if (kind, name) in owners:
+                raise ValueError(f"{path}: {kind} {name!r} of course {course.id!r} is also used by {owners[kind, name]!r}")
+            owners[kind, name] = course.id
+    for kind in ("data_dir", "files_dir"):
+        dirs: Dict[PurePosixPath, str] = {}
+        for course in courses:
+            directory = PurePosixPath(getattr(course, kind))
+            for other, owner in dirs.items():
+                if directory == other or other in directory.parents or directory in other.parents:
+                    raise ValueError(f"{path}: {kind} {str(directory)!r} of course {course.id!r} overlaps {str(other)!r} of {owner!r}")
+            dirs[directory] = course.id
+    # Chapters of a course share its data directory and question ids.
+    for entry, course in zip(data["courses"], courses):
+        chapters: Dict[Tuple[str, str], None] = {}
+        for chapter in entry["question_chapters"]:
+            for kind in ("prefix", "id_prefix", "shard"):
+                if (kind, chapter[kind]) in chapters:
+                    raise ValueError(f"{path}: {kind} {chapter[kind]!r} is used by two question chapters of course {course.id!r}")
+                chapters[kind, chapter[kind]] = None
+    return courses
+
+
+COURSES = load_courses()
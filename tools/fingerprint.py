@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from pathlib import Path
+
+# Content-hashed asset names shared by the build tools. "assets/app.js" is
+# published as "assets/app.<hash>.js"; since the name changes whenever the
+# bytes do, published copies can be cached forever.
+
+ROOT = Path(__file__).resolve().parents[1]
+DOCS = ROOT / "docs"
+HASH_LENGTH = 10
+HASHED_NAME_RE = re.compile(rf"\.[0-9a-f]{{{HASH_LENGTH}}}(?=\.[^./]+$)")
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def file_hash(path: Path) -> str:
+    # content_hash of a file, read in blocks.
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def with_hash(rel: str, digest: str) -> str:
+    stem, dot, ext = rel.rpartition(".")
+    return f"{stem}.{digest}{dot}{ext}"
+
+
+def hashed_name(rel: str, data: bytes) -> str:
+    return with_hash(rel, content_hash(data))
+
+
+def asset_url(rel: str) -> str:
+    # Published name of a docs/ file, computed from its current bytes.
+    return hashed_name(rel, (DOCS / rel).read_bytes())
+
+
+def reference_re(rel: str) -> re.Pattern[str]:
+    # A reference to rel in any published form: plain, hashed, or with a
+    # legacy "?v=" cache buster.
+    stem, dot, ext = rel.rpartition(".")
+    return re.compile(
+        rf"(?<![\w.-]){re.escape(stem)}(?:\.[0-9a-f]{{{HASH_LENGTH}}})?{re.escape(dot + ext)}(?:\?v=[\w.-]*)?"
+    )
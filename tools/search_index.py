@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import re
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+
+# Character n-gram inverted index for the search boxes in docs/assets/app.js.
+#
+# Every searchable field is lowercased and split on whitespace the way the
+# app splits queries. Each run contributes its character bigrams; a run of a
+# single character contributes that character. A posting is item * F + field
+# (F = number of fields), postings are sorted and delta-encoded. A field can
+# only contain a query token if it holds all of the token's bigrams, so the
+# app intersects postings to find candidates and scores just those fields.
+# Fields listed under "scan" have no postings; the app scores them on every
+# item, which keeps the index small where the text is long.
+
+# The whitespace class of JavaScript's /\s/, which app.js splits queries on.
+JS_SPACE_RE = re.compile("[\t\n\v\f\r \u00a0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000\ufeff]+")
+
+# Must match TYPE_LABEL in docs/assets/app.js.
+TYPE_LABEL = {
+    "single": "单选",
+    "multiple": "多选",
+    "truefalse": "判断",
+    "short": "场景/简答",
+    "flash": "闪卡",
+}
+
+Field = Tuple[str, int, Callable[[Dict], str]]
+
+# Name, weight, text; the weights are the ones app.js ranks with.
+KNOWLEDGE_FIELDS: List[Field] = [
+    ("title", 7, lambda k: k["title"]),
+    ("chapter", 3, lambda k: k["chapter"]),
+    ("tags", 4, lambda k: " ".join(k["tags"])),
+    ("content", 1, lambda k: k["content"]),
+]
+QUESTION_FIELDS: List[Field] = [
+    ("id", 5, lambda q: q["id"]),
+    ("stem", 7, lambda q: q["stem"]),
+    ("options", 5, lambda q: " ".join(q["options"])),
+    ("explanation", 3, lambda q: q["explanation"]),
+    ("tags", 4, lambda q: " ".join(q["tags"])),
+    ("source", 2, lambda q: q["source"]),
+    ("type", 1, lambda q: TYPE_LABEL.get(q["qtype"], q["qtype"])),
+]
+# The question bodies were most of the index, and the bank is small enough to
+# scan on each query.
+QUESTION_SCANNED = {"stem", "options", "explanation"}
+
+
+def text_grams(text: str) -> Set[str]:
+    grams: Set[str] = set()
+    for run in JS_SPACE_RE.split(text.lower()):
+        if len(run) == 1:
+            grams.add(run)
+        for i in range(len(run) - 1):
+            grams.add(run[i : i + 2])
+    return grams
+
+
+def build_postings(items: List[Dict], fields: List[Field], scanned: Iterable[str] = ()) -> Dict:
+    width = len(fields)
+    postings: Dict[str, List[int]] = {}
+    for index, item in enumerate(items):
+        for field_index, (name, _, text) in enumerate(fields):
+            if name in scanned:
+                continue
+            for gram in text_grams(text(item)):
+                postings.setdefault(gram, []).append(index * width + field_index)
+
+    encoded: Dict[str, List[int]] = {}
+    for gram in sorted(postings):
+        prev = 0
+        deltas = []
+        for posting in postings[gram]:
+            deltas.append(posting - prev)
+            prev = posting
+        encoded[gram] = deltas
+    return {
+        "fields": [[name, weight] for name, weight, _ in fields],
+        "count": len(items),
+        "scan": [i for i, (name, _, _) in enumerate(fields) if name in scanned],
+        "postings": encoded,
+    }
+
+
+def build_search_index(data: Dict) -> Dict:
+    return {
+        "version": 2,
+        "knowledge": build_postings(data["knowledge"], KNOWLEDGE_FIELDS),
+        "questions": build_postings(data["questions"], QUESTION_FIELDS, QUESTION_SCANNED),
+    }
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import mimetypes
+import os
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+from fingerprint import DOCS, HASHED_NAME_RE, content_hash
+
+# Local preview of docs/. Responses carry an ETag (the content hash of the
+# bytes sent) and conditional GETs are answered with 304, hashed assets are
+# cacheable forever and everything else is revalidated on every load. The
+# .br/.gz siblings written by compress_assets.py are served when the client
+# accepts them and they are not older than their source.
+#
+# Pages get a small script that listens on /__livereload (server-sent
+# events); when files under docs/ change (tools/watch.py or a manual build)
+# and then stay unchanged for one poll, every open page reloads. The service
+# worker is replaced by one that unregisters itself, so reloads are never
+# answered from its cache; --with-sw serves the real one.
+
+RELOAD_PATH = "/__livereload"
+RELOAD_SCRIPT = (
+    b'<script>new EventSource("/__livereload").addEventListener("reload", () => location.reload());</script>\n'
+)
+UNREGISTER_SW = b"""// Served by tools/serve.py in place of docs/sw.js.
+self.addEventListener("install", () => self.skipWaiting());
+self.addEventListener("activate", (event) => {
+  event.waitUntil(
+    (async () => {
+      for (const key of await caches.keys()) await caches.delete(key);
+      await self.registration.unregister();
+    })()
+  );
+});
+"""
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+COMPRESSED_SUFFIXES = {suffix for _, suffix in ENCODINGS}
+# Seconds between keep-alive comments on idle event streams.
+HEARTBEAT = 15.0
+# Upper bound on cached ETags; the cache is also emptied on every rebuild.
+MAX_ETAGS = 4096
+
+mimetypes.add_type("application/manifest+json", ".webmanifest")
+mimetypes.add_type("text/javascript", ".js")
+
+
+class Reloader:
+    # Polls docs/ and bumps a version once a change has settled.
+    def __init__(self, root: Path, interval: float) -> None:
+        self.root = root
+        self.interval = interval
+        self.version = 0
+        self.changed = threading.Condition()
+
+    def snapshot(self) -> Dict[str, Tuple[int, int]]:
+        stamps = {}
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                if os.path.splitext(name)[1] in COMPRESSED_SUFFIXES:
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                stamps[path] = (stat.st_mtime_ns, stat.st_size)
+        return stamps
+
+    def run(self) -> None:
+        settled = self.snapshot()
+        pending = None
+        while True:
+            time.sleep(self.interval)
+            current = self.snapshot()
+            if current != (pending or settled):
+                pending = current
+            elif pending is not None:
+                settled, pending = pending, None
+                with self.changed:
+                    self.version += 1
+                    self.changed.notify_all()
+                print(f"Changes under {self.root}; reloading pages")
+
+    def wait(self, version: int, timeout: float) -> int:
+        with self.changed:
+            self.changed.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+
+class PreviewHandler(BaseHTTPRequestHandler):
+    server_version = "sms-preview"
+    root: Path = DOCS
+    reloader: Optional[Reloader] = None
+    with_sw = False
+    etags: Dict[Tuple[str, int, int, str], str] = {}
+    etags_version = 0
+    etags_lock = threading.Lock()
+
+    def do_GET(self) -> None:
+        self.respond(head=False)
+
+    def do_HEAD(self) -> None:
+        self.respond(head=True)
+
+    def resolve(self, url_path: str) -> Optional[Path]:
+        path = (self.root / unquote(url_path).lstrip("/")).resolve()
+        if not path.is_relative_to(self.root):
+            return None
+        return path if path.exists() else None
+
+    def accepted_encodings(self) -> List[str]:
+        accepted = []
+        for part in self.headers.get("Accept-Encoding", "").split(","):
+            name, _, params = part.strip().partition(";")
+            if params.strip().replace(" ", "") in ("q=0", "q=0.0"):
+                continue
+            accepted.append(name.strip().lower())
+        return accepted
+
+    def representation(self, path: Path) -> Tuple[Path, Optional[str]]:
+        accepted = self.accepted_encodings()
+        for encoding, suffix in ENCODINGS:
+            sibling = path.with_name(path.name + suffix)
+            if encoding in accepted and sibling.is_file() and sibling.stat().st_mtime >= path.stat().st_mtime:
+                return sibling, encoding
+        return path, None
+
+    def etag(self, path: Path, variant: str, body: bytes) -> str:
+        # Computed once per file version and variant (encoding, injected page).
+        # Rebuilds replace hashed files under new names, so entries of earlier
+        # builds are dropped rather than kept for the life of the server.
+        stat = path.stat()
+        key = (str(path), stat.st_mtime_ns, stat.st_size, variant)
+        version = self.reloader.version if self.reloader is not None else 0
+        with self.etags_lock:
+            if version != PreviewHandler.etags_version or len(self.etags) >= MAX_ETAGS:
+                self.etags.clear()
+                PreviewHandler.etags_version = version
+            etag = self.etags.get(key)
+        if etag is None:
+            etag = f'"{content_hash(body)}"'
+            with self.etags_lock:
+                self.etags[key] = etag
+        return etag
+
+    def respond(self, head: bool) -> None:
+        url_path = urlsplit(self.path).path
+        if url_path == RELOAD_PATH and self.reloader is not None:
+            self.stream_reloads()
+            return
+        path = self.resolve(url_path)
+        if path is not None and path.is_dir():
+            if not url_path.endswith("/"):
+                self.send_response(HTTPStatus.MOVED_PERMANENTLY)
+                self.send_header("Location", url_path + "/")
+                self.end_headers()
+                return
+            path = path / "index.html"
+        if path is None or not path.is_file():
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+
+        content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        if content_type.startswith("text/") or content_type.endswith(("json", "javascript")):
+            content_type += "; charset=utf-8"
+        source, encoding = path, None
+        if path == self.root / "sw.js" and not self.with_sw:
+            variant, body = "unregister", UNREGISTER_SW
+        elif content_type.startswith("text/html") and self.reloader is not None:
+            # Injected pages are sent uncompressed; the siblings lack the script.
+            variant, body = "reload", path.read_bytes()
+            end = body.rfind(b"</body>")
+            body = body[:end] + RELOAD_SCRIPT + body[end:] if end >= 0 else body + RELOAD_SCRIPT
+        else:
+            source, encoding = self.representation(path)
+            variant, body = encoding or "identity", source.read_bytes()
+        etag = self.etag(source, variant, body)
+
+        cache_control = "public, max-age=31536000, immutable" if HASHED_NAME_RE.search(path.name) else "no-cache"
+        matched = etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]
+        self.send_response(HTTPStatus.NOT_MODIFIED if matched else HTTPStatus.OK)
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", cache_control)
+        self.send_header("Vary", "Accept-Encoding")
+        if matched:
+            self.end_headers()
+            return
+        self.send_header("Content-Type", content_type)
+        if encoding is not None:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def stream_reloads(self) -> None:
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        version = self.reloader.version
+        try:
+            self.wfile.write(b"retry: 500\n\n")
+            self.wfile.flush()
+            while True:
+                current = self.reloader.wait(version, HEARTBEAT)
+                if current != version:
+                    version = current
+                    self.wfile.write(f"event: reload\ndata: {version}\n\n".encode("ascii"))
+                else:
+                    self.wfile.write(b": ping\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format: str, *args) -> None:
+        if urlsplit(self.path).path != RELOAD_PATH:
+            super().log_message(format, *args)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve docs/ locally with ETags, precompressed files and live reload.")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--bind", default="127.0.0.1")
+    parser.add_argument("--no-reload", action="store_true", help="do not inject the live-reload script or watch docs/")
+    parser.add_argument("--interval", type=float, default=0.1, help="seconds between polls of docs/ for live reload")
+    parser.add_argument("--with-sw", action="store_true", help="serve the real service worker instead of an unregistering one")
+    args = parser.parse_args(argv)
+
+    PreviewHandler.with_sw = args.with_sw
+    if not args.no_reload:
+        PreviewHandler.reloader = Reloader(DOCS, args.interval)
+        threading.Thread(target=PreviewHandler.reloader.run, daemon=True).start()
+    server = ThreadingHTTPServer((args.bind, args.port), PreviewHandler)
+    server.daemon_threads = True
+    print(f"Serving {DOCS} at http://{args.bind}:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopped")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
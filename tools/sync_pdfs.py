@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from courses import COURSES, Course
+from fingerprint import file_hash
+
+# Copies each course's delivered PDFs from its pdf_dir to its files_dir
+# (output/pdf to docs/files for the first course; see tools/courses.json),
+# skipping the ones whose bytes are already there, so an unchanged PDF is
+# neither rewritten nor recommitted. build_assets.py then records their
+# sizes and hashes and fingerprints the links to them.
+
+
+def same_file(source: Path, target: Path) -> bool:
+    return target.exists() and source.stat().st_size == target.stat().st_size and file_hash(source) == file_hash(target)
+
+
+def sync(source: Path, target: Path) -> bool:
+    if same_file(source, target):
+        return False
+    target.parent.mkdir(parents=True, exist_ok=True)
+    staging = target.with_name(f".{target.name}.tmp")
+    shutil.copyfile(source, staging)
+    os.replace(staging, target)
+    return True
+
+
+def sync_course(course: Course, prune: bool) -> Tuple[int, int]:
+    # Returns the number of PDFs copied and left unchanged.
+    sources = sorted(course.pdf_path.glob("*.pdf"))
+    copied = 0
+    for source in sources:
+        target = course.files_path / source.name
+        if sync(source, target):
+            copied += 1
+            print(f"Copied {target} ({source.stat().st_size / 1_000_000:.1f} MB)")
+        else:
+            print(f"Unchanged {target}")
+    if prune:
+        names = {source.name for source in sources}
+        for path in sorted(course.files_path.glob("*.pdf")):
+            if path.name not in names:
+                path.unlink()
+                print(f"Removed {path}")
+    return copied, len(sources) - copied
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Copy changed PDFs from each course's pdf_dir to its docs/ files_dir.")
+    parser.add_argument("--course", action="append", help="only sync this course id (repeatable; default: all)")
+    parser.add_argument("--prune", action="store_true", help="also delete published PDFs that the course's pdf_dir no longer has")
+    args = parser.parse_args(argv)
+
+    unknown = set(args.course or []) - {course.id for course in COURSES}
+    if unknown:
+        raise SystemExit(f"Unknown course(s): {', '.join(sorted(unknown))}")
+    courses = [course for course in COURSES if not args.course or course.id in args.course]
+    empty = [course for course in courses if not any(course.pdf_path.glob("*.pdf"))]
+    if empty:
+        raise SystemExit(f"No PDFs in {', '.join(str(course.pdf_path) for course in empty)}; run output/scripts/build_all.sh first")
+    copied = unchanged = 0
+    for course in courses:
+        counts = sync_course(course, args.prune)
+        copied += counts[0]
+        unchanged += counts[1]
+    print(f"PDFs: {copied} copied, {unchanged} unchanged")
+
+
+if __name__ == "__main__":
+    main()
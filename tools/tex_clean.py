@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import re
+
+# Shared LaTeX-to-text cleaning for build_web_data.py and build_web_docs.py.
+#
+# Both cleaners walk their input once with a single compiled token pattern
+# (control words, control symbols, math shifts); the plain text between two
+# tokens is copied through as one slice, and bare braces are dropped from the
+# joined result. The token handlers reproduce the output of the former chained
+# re.sub passes on the course sources.
+
+_TOKEN = re.compile(r"\\([a-zA-Z]+)|\\(.)|\$", re.S)
+_GROUP_TOKEN = re.compile(r"\\([a-zA-Z]+)|\\.|([{}])", re.S)
+_BRACE = re.compile(r"[{}]")
+
+_TEX_ESCAPES = {"%": "%", "#": "#", "_": "_"}
+_TEX_MATH_LITERALS = (
+    ("$\\leq67$", "≤67"),
+    ("$\\leq 67$", "≤67"),
+    ("$>67$", ">67"),
+    ("$\\Rightarrow$", "=>"),
+)
+
+_INLINE_ESCAPES = {"%": "%", "#": "#", "_": "_", "&": "&", "\\": " "}
+_LINE_COMMANDS = {"ansline": "答案：", "expline": "解释：", "coverline": ""}
+_WRAPPERS = frozenset({"textbf", "mystrong", "texttt", "ansbadge", "emph", "underline"})
+_MATH_WORDS = (
+    ("leq", "≤"),
+    ("geq", "≥"),
+    ("Rightarrow", "=>"),
+    ("rightarrow", "→"),
+    ("leftarrow", "←"),
+)
+_ARG_COMMANDS = {
+    "vspace": re.compile(r"\*?\{[^{}]*\}"),
+    "fontsize": re.compile(r"\{[^{}]*\}\{[^{}]*\}"),
+    "color": re.compile(r"\{[^{}]*\}"),
+}
+_OPTIONAL_ARG = re.compile(r"\*?(?:\[[^\]]*\])?")
+# Math drops braces before commands, so a removed command also eats the
+# letters of a braced argument that follows it.
+_MATH_COMMAND_TAIL = re.compile(r"[{}a-zA-Z]*")
+
+
+def collapse_ws(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _drop_braces(text: str) -> str:
+    return text.replace("{", "").replace("}", "")
+
+
+def clean_tex(s: str) -> str:
+    out: list[str] = []
+    dollars: list[int] = []
+    # True while out[-1] is an unpaired "$" with nothing emitted after it.
+    adjacent = False
+    pos = 0
+    search = _TOKEN.search
+
+    while True:
+        m = search(s, pos)
+        if m is None:
+            out.append(s[pos:])
+            break
+
+        start = m.start()
+        if start > pos:
+            chunk = s[pos:start]
+            # Bare braces vanish, so they must not separate a "$$" pair.
+            if chunk.strip("{}"):
+                out.append(chunk)
+                adjacent = False
+        word, sym = m.groups()
+        pos = m.end()
+
+        if word is not None:
+            if word[0] == "n":
+                # "\n" is a newline escape, even when it starts a longer word.
+                piece = "\n" + word[1:]
+            elif word.startswith("item"):
+                piece = "- " + word[4:]
+            elif word.startswith("par"):
+                piece = "\n" + word[3:]
+            else:
+                if (word == "begin" or word == "end") and s.startswith("{", pos):
+                    close = s.find("}", pos + 1)
+                    if close > pos + 1:
+                        pos = close + 1
+                continue
+        elif sym is not None:
+            piece = _TEX_ESCAPES.get(sym)
+            if piece is None:
+                piece = "\\"
+                pos = start + 1
+        else:
+            for literal, replacement in _TEX_MATH_LITERALS:
+                if s.startswith(literal, start):
+                    piece = replacement
+                    pos = start + len(literal)
+                    break
+            else:
+                if adjacent:
+                    # "$$" (possibly left behind by removed commands) reads as an arrow.
+                    dollars.pop()
+                    out[-1] = " → "
+                    adjacent = False
+                else:
+                    dollars.append(len(out))
+                    out.append("$")
+                    adjacent = True
+                continue
+
+        out.append(piece)
+        adjacent = False
+
+    # Remaining single "$" close pairwise as inline math; an odd last one stays.
+    for index in dollars[: len(dollars) - len(dollars) % 2]:
+        out[index] = ""
+    return collapse_ws(_drop_braces("".join(out)).replace("=>", "→"))
+
+
+def _line_group_end(text: str, pos: int) -> int:
+    m = _BRACE.search(text, pos + 1)
+    if m is None or m.group() != "}":
+        return -1
+    return m.start()
+
+
+def _wrapper_group_end(text: str, pos: int) -> int:
+    # A wrapper unwraps when every brace group inside it is itself an
+    # unwrappable wrapper, or a line command with a brace-free argument.
+    end = _line_group_end(text, pos)
+    if end >= 0:
+        return end
+    stack: list[str] = []
+    prev_word = ""
+    prev_end = -1
+    for m in _GROUP_TOKEN.finditer(text, pos + 1):
+        word, brace = m.groups()
+        if word is not None:
+            prev_word = word
+            prev_end = m.end()
+            continue
+        if brace is None:
+            continue
+        if brace == "}":
+            if not stack:
+                return m.start()
+            stack.pop()
+            continue
+        if "line" in stack or prev_end != m.start():
+            return -1
+        if prev_word in _WRAPPERS:
+            stack.append("wrapper")
+        elif prev_word in _LINE_COMMANDS:
+            stack.append("line")
+        else:
+            return -1
+    return -1
+
+
+def _unwrap_end(text: str, pos: int, word: str) -> int:
+    if word in _LINE_COMMANDS:
+        return _line_group_end(text, pos)
+    return _wrapper_group_end(text, pos)
+
+
+def _math_text(expr: str, inline: bool) -> str:
+    out: list[str] = []
+    pos = 0
+    search = _TOKEN.search
+
+    while True:
+        m = search(expr, pos)
+        if m is None:
+            out.append(expr[pos:])
+            break
+
+        start = m.start()
+        out.append(expr[pos:start])
+        word, sym = m.groups()
+        pos = m.end()
+
+        if word is not None:
+            if inline and word.startswith("par"):
+                out.append(" " + word[3:])
+                continue
+            if (
+                inline
+                and (word in _WRAPPERS or word in _LINE_COMMANDS)
+                and expr.startswith("{", pos)
+                and _unwrap_end(expr, pos, word) >= 0
+            ):
+                out.append(_LINE_COMMANDS.get(word, ""))
+                continue
+            for name, symbol in _MATH_WORDS:
+                if word.startswith(name):
+                    out.append(symbol + word[len(name) :])
+                    break
+            else:
+                pos = _MATH_COMMAND_TAIL.match(expr, pos).end()
+        elif sym is not None:
+            piece = _INLINE_ESCAPES.get(sym) if inline else ("%" if sym == "%" else None)
+            if piece is None:
+                out.append("\\")
+                pos = start + 1
+            else:
+                out.append(piece)
+        else:
+            out.append("$")
+
+    s = _drop_braces("".join(out))
+    return collapse_ws(s.replace("~", " ") if inline else s)
+
+
+def clean_math(expr: str) -> str:
+    return _math_text(expr, inline=False)
+
+
+def clean_inline(text: str, collapse_whitespace: bool = True) -> str:
+    out: list[str] = []
+    pos = 0
+    # Groups that start before this index are already known to unwrap.
+    unwrap_until = -1
+    search = _TOKEN.search
+
+    while True:
+        m = search(text, pos)
+        if m is None:
+            out.append(text[pos:])
+            break
+
+        start = m.start()
+        if start > pos:
+            out.append(text[pos:start])
+        word, sym = m.groups()
+        pos = m.end()
+
+        if word is not None:
+            if word.startswith("par"):
+                out.append(" " + word[3:])
+                continue
+
+            if (word in _WRAPPERS or word in _LINE_COMMANDS) and text.startswith("{", pos):
+                unwrapped = start < unwrap_until
+                if not unwrapped:
+                    end = _unwrap_end(text, pos, word)
+                    unwrapped = end >= 0
+                    if unwrapped:
+                        unwrap_until = end
+                if unwrapped:
+                    out.append(_LINE_COMMANDS.get(word, ""))
+                    continue
+
+            arg = _ARG_COMMANDS.get(word)
+            am = arg.match(text, pos) if arg is not None else None
+            if am is None:
+                am = _OPTIONAL_ARG.match(text, pos)
+            pos = am.end()
+            out.append(" ")
+        elif sym is not None:
+            piece = _INLINE_ESCAPES.get(sym)
+            if piece is None:
+                out.append("\\")
+                pos = start + 1
+            else:
+                out.append(piece)
+        else:
+            close = -1 if text.startswith("$", pos) else text.find("$", pos)
+            if close < 0:
+                out.append("$")
+            else:
+                out.append(_math_text(text[pos:close], inline=True))
+                pos = close + 1
+
+    s = _drop_braces("".join(out)).replace("~", " ")
+    if collapse_whitespace:
+        return collapse_ws(s)
+    return s.strip()
@@ -0,0 +1,566 @@
+from __future__ import annotations
+
+import glob
+import gzip
+import hashlib
+import os
+import pickle
+import re
+import tempfile
+import zlib
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, NamedTuple
+
+import tex_clean
+from build_cache import CACHE_DIR, ROOT, code_version, digest_text
+from tex_clean import clean_inline
+
+# The shared front end of build_web_data.py and build_web_docs.py: a course
+# source is parsed once into a flat sequence of typed blocks (headings,
+# paragraphs, lists, callouts, table rows, \VerbatimInput references and
+# question rows), which the reader renders to HTML and the data build turns
+# into quiz items. Text in blocks is already cleaned for display; question
+# rows also keep their raw tex for the data build's own cleaning.
+#
+# Parsed documents are cached under .build-cache/ir/ as a gzip stream of
+# pickled batches of blocks ending with the block count (about half the size
+# of the source; a hit is read through once before use), keyed by the
+# source text and the code of this module and tex_clean.py, so whichever tool
+# runs first parses a source and the other loads the result. Blocks are
+# written as they are parsed and read back as they are consumed: apart from
+# the rewritten tex text, only one batch is held in memory.
+
+IR_DIR = CACHE_DIR / "ir"
+# Bump when the parse output changes for reasons the code digest cannot see.
+IR_VERSION = "2"
+# Blocks per pickled record of a cache file.
+IR_BATCH = 256
+VERBATIM_INPUT_RE = re.compile(r"\\VerbatimInput(?:\[[^\]]*\])?\{([^}]*)\}")
+VERBATIM_MARK = "[[VERBATIM_INPUT]] "
+QUESTION_MARK = "[[QUESTION]] "
+CHAPTER_RE = re.compile(r"\\chapter\{([^}]*)")
+# Numbered question rows of the question-bank tables, e.g. "\textbf{12.} ... & ... \\".
+QUESTION_LABEL_RE = re.compile(r"\\textbf\{(\d+)\.\}")
+# A line and the break after it, with the line boundaries of str.splitlines().
+LINE_RE = re.compile(r"([^\n\r\x0b\x0c\x1c-\x1e\x85\u2028\u2029]*)(\r\n|[\n\r\x0b\x0c\x1c-\x1e\x85\u2028\u2029]|$)")
+# Functions timed by --profile in both tools.
+PROFILE_STAGES = [
+    "load_document",
+    "parse_document",
+    "preprocess_text",
+    "convert_longtable_blocks",
+    "parse_blocks",
+    "clean_inline",
+]
+
+
+class Heading(NamedTuple):
+    level: int
+    title: str
+    anchor: str
+
+
+class Paragraph(NamedTuple):
+    text: str
+
+
+class ListBlock(NamedTuple):
+    ordered: bool
+    items: tuple[str, ...]
+
+
+class Callout(NamedTuple):
+    # keybox/riskbox; the blocks between an opening and a closing one are inside.
+    opening: bool
+
+
+class TableItem(NamedTuple):
+    text: str
+
+
+class TableRow(NamedTuple):
+    key: str
+    value: str
+
+
+class Verbatim(NamedTuple):
+    # A \VerbatimInput file relative to the source's directory, read when
+    # rendered so that the document does not depend on it.
+    path: str
+
+
+class Question(NamedTuple):
+    # A numbered table row: the index of its chapter in Document.chapters, its
+    # number, the raw tex after the number and the row as the reader shows it.
+    chapter: int
+    number: str
+    tex: str
+    row: TableRow | TableItem | None
+
+
+Block = Heading | Paragraph | ListBlock | Callout | TableItem | TableRow | Verbatim | Question
+
+
+class Document(NamedTuple):
+    # Raw \chapter titles (up to any nested brace) in document order.
+    chapters: tuple[str, ...]
+    # A tuple, or a StoredBlocks read from the cache on each iteration.
+    blocks: Iterable[Block]
+
+
+@dataclass
+class QuestionRows:
+    # Collected by convert_longtable_blocks.
+    chapters: list[str] = field(default_factory=list)
+    rows: list[tuple[int, str, str]] = field(default_factory=list)
+
+
+def strip_comments(text: str) -> str:
+    return re.sub(r"(?<!\\)%[^\n]*", "", text)
+
+
+def extract_document_body(text: str) -> str:
+    begin = re.search(r"\\begin\{document\}", text)
+    end = re.search(r"\\end\{document\}", text)
+    if begin and end and begin.end() < end.start():
+        return text[begin.end() : end.start()]
+    return text
+
+
+def remove_braced_command(text: str, command: str) -> str:
+    token = f"\\{command}" + "{"
+    cursor = 0
+    parts = []
+
+    while True:
+        start = text.find(token, cursor)
+        if start < 0:
+            parts.append(text[cursor:])
+            break
+
+        parts.append(text[cursor:start])
+        i = start + len(token)
+        depth = 1
+
+        while i < len(text) and depth > 0:
+            if text[i] == "{":
+                depth += 1
+            elif text[i] == "}":
+                depth -= 1
+            i += 1
+
+        cursor = i
+
+    return "".join(parts)
+
+
+def verbatim_input_paths(text: str, source_path: Path) -> list[Path]:
+    return [(source_path.parent / m.group(1).strip()).resolve() for m in VERBATIM_INPUT_RE.finditer(text)]
+
+
+def mark_verbatim_input(text: str) -> str:
+    # Leaves a marker line that parse_blocks turns into a Verbatim block.
+    def repl(match: re.Match[str]) -> str:
+        return f"\n[[PRE_START]]\n{VERBATIM_MARK}{match.group(1).strip()}\n[[PRE_END]]\n"
+
+    return VERBATIM_INPUT_RE.sub(repl, text)
+
+
+def convert_longtable_blocks(text: str, found: QuestionRows | None = None) -> str:
+    # Rows become [[TABLE_ROW]]/[[TABLE_ITEM]] lines. With found, numbered rows
+    # are also recorded there with their chapter and prefixed with a
+    # [[QUESTION]] marker that points at the record.
+    pattern = re.compile(r"\\begin\{longtable\}\{[^\n]*\}(.*?)\\end\{longtable\}", re.S)
+    starts: list[int] = []
+    if found is not None:
+        for match in CHAPTER_RE.finditer(text):
+            starts.append(match.start())
+            found.chapters.append(match.group(1))
+
+    def repl(match: re.Match[str]) -> str:
+        block = match.group(1)
+        block = re.sub(r"\\(?:toprule|midrule|bottomrule|hline)", "", block)
+        chapter = bisect_right(starts, match.start()) - 1
+
+        rows = []
+        for raw_row in re.split(r"\\\\", block):
+            row = raw_row.strip()
+            if not row:
+                continue
+            cells = [clean_inline(cell) for cell in row.split("&")]
+            cells = [cell for cell in cells if cell]
+
+            line = ""
+            if len(cells) == 1:
+                line = f"[[TABLE_ITEM]] {cells[0]}"
+            elif cells:
+                left = cells[0]
+                right = "；".join(cells[1:])
+                line = f"[[TABLE_ROW]] {left} || {right}"
+
+            label = QUESTION_LABEL_RE.search(row) if found is not None else None
+            if label is not None:
+                line = f"{QUESTION_MARK}{len(found.rows)} {line}".rstrip()
+                found.rows.append((chapter, label.group(1), row[label.end() :]))
+            if line:
+                rows.append(line)
+
+        if not rows:
+            return "\n"
+        return "\n" + "\n".join(rows) + "\n"
+
+    return pattern.sub(repl, text)
+
+
+def iter_lines(text: str) -> Iterator[str]:
+    # str.splitlines() without the list.
+    for match in LINE_RE.finditer(text):
+        line, end = match.groups()
+        if not end:
+            if line:
+                yield line
+            return
+        yield line
+
+
+def preprocess_text(text: str, found: QuestionRows | None = None) -> str:
+    content = extract_document_body(text)
+    content = strip_comments(content)
+    content = mark_verbatim_input(content)
+    content = remove_braced_command(content, "hypersetup")
+    content = convert_longtable_blocks(content, found)
+
+    content = re.sub(r"\\chapter\{([^{}]*)\}", lambda m: f"\n[[H1]] {clean_inline(m.group(1))}\n", content)
+    content = re.sub(r"\\section\{([^{}]*)\}", lambda m: f"\n[[H2]] {clean_inline(m.group(1))}\n", content)
+    content = re.sub(r"\\subsection\{([^{}]*)\}", lambda m: f"\n[[H3]] {clean_inline(m.group(1))}\n", content)
+
+    block_replacements = {
+        r"\begin{itemize}": "\n[[UL_START]]\n",
+        r"\end{itemize}": "\n[[UL_END]]\n",
+        r"\begin{enumerate}": "\n[[OL_START]]\n",
+        r"\end{enumerate}": "\n[[OL_END]]\n",
+        r"\begin{keybox}": "\n[[CALLOUT_START]]\n",
+        r"\end{keybox}": "\n[[CALLOUT_END]]\n",
+        r"\begin{riskbox}": "\n[[CALLOUT_START]]\n",
+        r"\end{riskbox}": "\n[[CALLOUT_END]]\n",
+        r"\begin{titlepage}": "\n",
+        r"\end{titlepage}": "\n",
+        r"\tableofcontents": "\n",
+        r"\clearpage": "\n",
+        r"\newpage": "\n",
+        r"\vfill": "\n",
+        r"\centering": "\n",
+    }
+    for src, dst in block_replacements.items():
+        content = content.replace(src, dst)
+
+    content = re.sub(r"\\item\s*", "\n[[ITEM]] ", content)
+    content = re.sub(r"\\vspace\*?\{[^{}]*\}", "\n", content)
+
+    content = re.sub(r"\\begin\{[^}]+\}", "\n", content)
+    content = re.sub(r"\\end\{[^}]+\}", "\n", content)
+
+    content = content.replace("\\\\", "\n")
+    content = content.replace("\\par", "\n")
+    return content
+
+
+def preprocess_lines(text: str, found: QuestionRows | None = None) -> Iterator[str]:
+    return iter_lines(preprocess_text(text, found))
+
+
+def preprocess(text: str) -> str:
+    return "\n".join(preprocess_lines(text))
+
+
+def make_slug(text: str, used: set[str]) -> str:
+    slug = re.sub(r"[^a-zA-Z0-9\u4e00-\u9fff]+", "-", text).strip("-").lower()
+    if not slug:
+        slug = "section"
+    base = slug
+    i = 2
+    while slug in used:
+        slug = f"{base}-{i}"
+        i += 1
+    used.add(slug)
+    return slug
+
+
+def table_block(line: str) -> TableRow | TableItem | None:
+    if line.startswith("[[TABLE_ITEM]] "):
+        row = clean_inline(line[len("[[TABLE_ITEM]] ") :])
+        return TableItem(row) if row else None
+    if line.startswith("[[TABLE_ROW]] "):
+        row = clean_inline(line[len("[[TABLE_ROW]] ") :], collapse_whitespace=False)
+        if not row:
+            return None
+        left, _, right = row.partition(" || ")
+        return TableRow(clean_inline(left), clean_inline(right))
+    return None
+
+
+def parse_blocks(lines: Iterable[str], rows: list[tuple[int, str, str]] | None = None) -> Iterator[Block]:
+    # Groups preprocessed lines into blocks; rows resolves [[QUESTION]] markers.
+    used_ids: set[str] = set()
+
+    paragraph_chunks: list[str] = []
+    list_mode: str | None = None
+    list_items: list[str] = []
+    callout_depth = 0
+    pre_mode = False
+
+    def flush_paragraph() -> Iterator[Block]:
+        nonlocal paragraph_chunks
+        if not paragraph_chunks:
+            return
+        text = clean_inline(" ".join(paragraph_chunks))
+        paragraph_chunks = []
+        if text:
+            yield Paragraph(text)
+
+    def flush_list() -> Iterator[Block]:
+        nonlocal list_mode, list_items
+        if not list_mode:
+            list_items = []
+            return
+        cleaned = [clean_inline(item) for item in list_items]
+        cleaned = [item for item in cleaned if item]
+        if cleaned:
+            yield ListBlock(list_mode == "ol", tuple(cleaned))
+        list_mode = None
+        list_items = []
+
+    for raw_line in lines:
+        stripped = raw_line.strip()
+
+        if pre_mode:
+            if stripped == "[[PRE_END]]":
+                pre_mode = False
+            elif raw_line.startswith(VERBATIM_MARK):
+                yield Verbatim(raw_line[len(VERBATIM_MARK) :])
+            continue
+
+        if not stripped:
+            if list_mode:
+                continue
+            yield from flush_paragraph()
+            yield from flush_list()
+            continue
+
+        if stripped == "[[PRE_START]]":
+            yield from flush_paragraph()
+            yield from flush_list()
+            pre_mode = True
+            continue
+
+        if stripped == "[[CALLOUT_START]]":
+            yield from flush_paragraph()
+            yield from flush_list()
+            yield Callout(True)
+            callout_depth += 1
+            continue
+
+        if stripped == "[[CALLOUT_END]]":
+            yield from flush_paragraph()
+            yield from flush_list()
+            if callout_depth > 0:
+                yield Callout(False)
+                callout_depth -= 1
+            continue
+
+        if stripped == "[[UL_START]]":
+            yield from flush_paragraph()
+            yield from flush_list()
+            list_mode = "ul"
+            list_items = []
+            continue
+
+        if stripped == "[[OL_START]]":
+            yield from flush_paragraph()
+            yield from flush_list()
+            list_mode = "ol"
+            list_items = []
+            continue
+
+        if stripped in {"[[UL_END]]", "[[OL_END]]"}:
+            yield from flush_paragraph()
+            yield from flush_list()
+            continue
+
+        if stripped.startswith("[[H1]] ") or stripped.startswith("[[H2]] ") or stripped.startswith("[[H3]] "):
+            yield from flush_paragraph()
+            yield from flush_list()
+            marker, title = stripped.split(" ", 1)
+            level_map = {"[[H1]]": 1, "[[H2]]": 2, "[[H3]]": 3}
+            title_text = clean_inline(title)
+            if not title_text:
+                continue
+            yield Heading(level_map[marker], title_text, make_slug(title_text, used_ids))
+            continue
+
+        if stripped.startswith("[[ITEM]] "):
+            yield from flush_paragraph()
+            if not list_mode:
+                list_mode = "ul"
+                list_items = []
+            item_text = clean_inline(stripped[len("[[ITEM]] ") :])
+            if item_text:
+                list_items.append(item_text)
+            continue
+
+        if stripped.startswith(QUESTION_MARK) and rows is not None:
+            yield from flush_paragraph()
+            yield from flush_list()
+            index, _, line = stripped[len(QUESTION_MARK) :].partition(" ")
+            chapter, number, tex = rows[int(index)]
+            yield Question(chapter, number, tex, table_block(line))
+            continue
+
+        if stripped.startswith("[[TABLE_ITEM]] ") or stripped.startswith("[[TABLE_ROW]] "):
+            yield from flush_paragraph()
+            yield from flush_list()
+            block = table_block(stripped)
+            if block is not None:
+                yield block
+            continue
+
+        if list_mode and list_items:
+            continuation = clean_inline(stripped)
+            if continuation:
+                list_items[-1] = f"{list_items[-1]} {continuation}"
+            continue
+
+        paragraph_chunks.append(stripped)
+
+    yield from flush_paragraph()
+    yield from flush_list()
+
+    while callout_depth > 0:
+        yield Callout(False)
+        callout_depth -= 1
+
+
+def parse_stream(text: str) -> tuple[tuple[str, ...], Iterator[Block]]:
+    # The chapters are known once the text is rewritten; the blocks follow lazily.
+    found = QuestionRows()
+    content = preprocess_text(text, found)
+    return tuple(found.chapters), parse_blocks(iter_lines(content), found.rows)
+
+
+def parse_document(text: str) -> Document:
+    chapters, blocks = parse_stream(text)
+    return Document(chapters, tuple(blocks))
+
+
+class StoredBlocks:
+    # The blocks of a cache file, read back one batch at a time. The file ends
+    # with the block count; a file cut short before it is an error, not the end
+    # of the document.
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def __iter__(self) -> Iterator[Block]:
+        count = 0
+        with gzip.open(self.path, "rb") as data:
+            pickle.load(data)
+            while True:
+                try:
+                    record = pickle.load(data)
+                except EOFError:
+                    raise ValueError(f"{self.path}: truncated IR cache after {count} blocks") from None
+                if not isinstance(record, list):
+                    break
+                count += len(record)
+                yield from record
+            # Reading to the end checks the gzip trailer (length and CRC).
+            if data.read():
+                raise ValueError(f"{self.path}: data after the end of the IR cache")
+        if record != count:
+            raise ValueError(f"{self.path}: IR cache ends after {count} of {record} blocks")
+
+
+def ir_version() -> str:
+    return code_version(IR_VERSION, [Path(__file__), Path(tex_clean.__file__)])
+
+
+def ir_prefix(source_path: Path) -> str:
+    # Sources of different courses may share a file name, so cache files are
+    # named after the source's path (relative to the repository when inside it).
+    resolved = source_path.resolve()
+    name = resolved.relative_to(ROOT).as_posix() if resolved.is_relative_to(ROOT) else resolved.as_posix()
+    return f"{source_path.stem}-{digest_text(name)[:12]}"
+
+
+def source_key(source_path: Path) -> str:
+    # Hashed in chunks, so a cache hit never holds the source in memory.
+    h = hashlib.sha256(ir_version().encode("utf-8"))
+    with source_path.open("rb") as source:
+        for chunk in iter(lambda: source.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()[:32]
+
+
+def write_blocks(out: BinaryIO, chapters: tuple[str, ...], blocks: Iterable[Block]) -> None:
+    with gzip.GzipFile(fileobj=out, mode="wb", compresslevel=1, mtime=0) as data:
+        pickle.dump(chapters, data, protocol=pickle.HIGHEST_PROTOCOL)
+        batch: list[Block] = []
+        count = 0
+        for block in blocks:
+            batch.append(block)
+            if len(batch) == IR_BATCH:
+                pickle.dump(batch, data, protocol=pickle.HIGHEST_PROTOCOL)
+                count += len(batch)
+                batch = []
+        if batch:
+            pickle.dump(batch, data, protocol=pickle.HIGHEST_PROTOCOL)
+            count += len(batch)
+        pickle.dump(count, data, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_document(source_path: Path, force: bool = False) -> Document:
+    # The cached parse of source_path, parsing and caching it if there is none
+    # for this text and code. The blocks are streamed from the cache file
+    # whenever they are iterated, so files are never removed here (see
+    # prune_documents).
+    key = source_key(source_path)
+    prefix = ir_prefix(source_path)
+    path = IR_DIR / f"{prefix}.{key}.ir"
+    if path.exists() and not force:
+        # Read through once, so a damaged file is reparsed rather than failing
+        # (or coming up short) while a build consumes it.
+        try:
+            with gzip.open(path, "rb") as data:
+                chapters = pickle.load(data)
+            for _ in StoredBlocks(path):
+                pass
+            return Document(chapters, StoredBlocks(path))
+        except (OSError, EOFError, ValueError, zlib.error, pickle.UnpicklingError, AttributeError, TypeError):
+            pass
+
+    chapters, blocks = parse_stream(source_path.read_text(encoding="utf-8"))
+    IR_DIR.mkdir(parents=True, exist_ok=True)
+    # Written under a temporary name, as parallel builds may read it.
+    handle, tmp = tempfile.mkstemp(prefix=".ir-", dir=IR_DIR)
+    try:
+        with os.fdopen(handle, "wb") as out:
+            write_blocks(out, chapters, blocks)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return Document(chapters, StoredBlocks(path))
+
+
+def prune_documents(source_paths: Iterable[Path]) -> None:
+    # Removes the cache files of earlier versions of these sources. Run once a
+    # build is done with its documents, never from the parallel renders.
+    for source_path in source_paths:
+        if not source_path.exists():
+            continue
+        prefix = ir_prefix(source_path)
+        current = f"{prefix}.{source_key(source_path)}.ir"
+        for old in IR_DIR.glob(f"{glob.escape(prefix)}.*.ir"):
+            if old.name != current:
+                old.unlink(missing_ok=True)
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+# Topic tagging for build_web_data.py.
+#
+# All keywords of the taxonomy are compiled into one Aho-Corasick automaton
+# whose failure links are folded into the transition tables, so a text is
+# tagged in a single pass over its characters however many topics there are.
+# Matching is case-insensitive (keywords and text are both lowercased).
+
+
+class TopicMatcher:
+    def __init__(self, topics: List[Tuple[str, List[str]]], fallback: str) -> None:
+        self.topics = topics
+        self.fallback = fallback
+        self.keywords: List[Tuple[int, str]] = [
+            (topic_index, keyword) for topic_index, (_, keywords) in enumerate(topics) for keyword in keywords
+        ]
+        self._build()
+
+    def _build(self) -> None:
+        goto: List[Dict[str, int]] = [{}]
+        out: List[Set[int]] = [set()]
+        for index, (_, keyword) in enumerate(self.keywords):
+            state = 0
+            for ch in keyword.lower():
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append(set())
+                state = nxt
+            out[state].add(index)
+
+        # Breadth-first, so a state's failure target (always shallower) is
+        # complete before the state copies its transitions. Children of the
+        # root fail to the root.
+        delta: List[Dict[str, int]] = [dict() for _ in goto]
+        delta[0] = dict(goto[0])
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:
+            delta[state] = dict(delta[fail[state]])
+            delta[state].update(goto[state])
+            out[state] |= out[fail[state]]
+            for ch, nxt in goto[state].items():
+                fail[nxt] = delta[fail[state]].get(ch, 0)
+                queue.append(nxt)
+        self._delta = delta
+        self._out = [tuple(sorted(found)) for found in out]
+
+    def hits(self, text: str) -> Dict[str, List[str]]:
+        delta = self._delta
+        out = self._out
+        found: Set[int] = set()
+        state = 0
+        for ch in text.lower():
+            state = delta[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+
+        hits: Dict[str, List[str]] = {}
+        for index in sorted(found):
+            topic_index, keyword = self.keywords[index]
+            hits.setdefault(self.topics[topic_index][0], []).append(keyword)
+        return hits
+
+
+def load_taxonomy(path: Path) -> TopicMatcher:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    topics = [(topic["tag"], list(topic["keywords"])) for topic in data["topics"]]
+    return TopicMatcher(topics, data["fallback"])
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import build_assets
+import build_web_data
+import build_web_docs
+import tex_ir
+from build_web_data import TAXONOMY
+from build_web_docs import DOC_SPECS, DocSpec
+from courses import COURSES, Course
+from topic_match import load_taxonomy
+
+# Rebuilds one course of the site (the first in tools/courses.json unless
+# --course says otherwise) while its sources are edited. Watches its sources,
+# the files pulled in with \VerbatimInput, the topic taxonomy and the reader
+# assets, and rebuilds only the outputs that depend on what changed: the data
+# shards (practice bank, knowledge points, taxonomy) and the readers whose
+# source, verbatim inputs or assets changed, then republishes with
+# build_assets.py (which is all an edit of app.js or styles.css needs).
+# Parsed questions and knowledge points stay in memory, so a change to one
+# source does not reparse the other. Changes to the tools themselves need a
+# restart.
+
+READER_ASSETS = [build_web_docs.DOCS / build_web_docs.READER_CSS, build_web_docs.DOCS / build_web_docs.READER_JS]
+STATIC_ASSETS = [build_assets.DOCS / rel for rel in build_assets.STATIC_ASSETS]
+
+Stamp = Optional[Tuple[int, int]]
+
+
+def stamp(path: Path) -> Stamp:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def doc_dependencies(spec: DocSpec) -> List[Path]:
+    source_path = spec.source_path
+    raw = build_web_docs.read_tex(source_path) if source_path.exists() else ""
+    verbatim = build_web_docs.verbatim_input_paths(build_web_docs.strip_comments(raw), source_path)
+    return [source_path, *verbatim, *READER_ASSETS]
+
+
+class SiteState:
+    def __init__(self, course: Course, wire: str, precache_pdfs: bool) -> None:
+        self.course = course
+        self.data_sources = [course.practice_source, course.knowledge_source, TAXONOMY]
+        self.doc_specs = [spec for spec in DOC_SPECS if spec.course == course.id]
+        self.wire = wire
+        self.precache_pdfs = precache_pdfs
+        self.data_cache = build_web_data.open_cache()
+        self.docs_cache = build_web_docs.open_cache()
+        self.knowledge: List[build_web_data.KnowledgeItem] = []
+        self.questions: List[build_web_data.QuestionItem] = []
+        self.doc_inputs = {spec.output_name: doc_dependencies(spec) for spec in self.doc_specs}
+
+    def watched(self) -> Set[Path]:
+        paths = set(self.data_sources) | set(STATIC_ASSETS)
+        for deps in self.doc_inputs.values():
+            paths.update(deps)
+        return paths
+
+    def affected(self, changed: Set[Path]) -> Tuple[Set[Path], List[DocSpec]]:
+        data = changed.intersection(self.data_sources)
+        docs = [spec for spec in self.doc_specs if changed.intersection(self.doc_inputs.get(spec.output_name, []))]
+        return data, docs
+
+    def rebuild_data(self, changed: Set[Path]) -> None:
+        course = self.course
+        if TAXONOMY in changed:
+            # Tags of every item come from the taxonomy.
+            build_web_data.TOPICS = load_taxonomy(TAXONOMY)
+            changed = changed | {course.practice_source, course.knowledge_source}
+        if course.practice_source in changed:
+            self.questions = build_web_data.parse_practice(course)
+        if course.knowledge_source in changed:
+            self.knowledge = build_web_data.parse_knowledge_source(course)
+        inputs = build_web_data.site_inputs(course, self.wire)
+        outputs = build_web_data.site_outputs(course)
+        if all([self.data_cache.is_fresh(key, inputs, out) for key, out in outputs]):
+            print(f"Cached {course.data_path} ({len(outputs)} files)")
+        else:
+            build_web_data.write_site(course, self.knowledge, self.questions, self.wire)
+            for key, out in outputs:
+                self.data_cache.record(key, inputs, out)
+        self.data_cache.save()
+
+    def rebuild_docs(self, specs: List[DocSpec]) -> List[DocSpec]:
+        failed = build_web_docs.build_all(specs, self.docs_cache)
+        for spec in specs:
+            self.doc_inputs[spec.output_name] = doc_dependencies(spec)
+        self.docs_cache.save()
+        return failed
+
+    def rebuild(self, changed: Set[Path]) -> bool:
+        data, docs = self.affected(changed)
+        failed: List[DocSpec] = []
+        try:
+            if data:
+                self.rebuild_data(data)
+            if docs:
+                failed = self.rebuild_docs(docs)
+            # Earlier parses are only removed once both builds are done with them.
+            tex_ir.prune_documents({self.course.practice_source, *(spec.source_path for spec in docs)})
+            build_assets.main(["--precache-pdfs"] if self.precache_pdfs else [])
+        except Exception as exc:
+            print(f"Build failed: {type(exc).__name__}: {exc}")
+            return False
+        return not failed
+
+
+def settle(stamps: Dict[Path, Stamp], debounce: float, interval: float) -> Set[Path]:
+    # Waits until no watched file has changed for `debounce` seconds and
+    # returns everything that changed since `stamps`, which is updated.
+    changed: Set[Path] = set()
+    quiet_since = time.perf_counter()
+    while True:
+        burst = {path for path, old in stamps.items() if stamp(path) != old}
+        for path in burst:
+            stamps[path] = stamp(path)
+        if burst:
+            changed |= burst
+            quiet_since = time.perf_counter()
+        elif changed and time.perf_counter() - quiet_since >= debounce:
+            return changed
+        time.sleep(interval)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Rebuild a course's site data and readers whenever their sources change.")
+    parser.add_argument("--course", default=COURSES[0].id, help="id of the course to watch (default: the first in tools/courses.json)")
+    parser.add_argument("--wire", choices=["compact", "pretty"], default="compact", help="shard encoding, as in build_web_data.py")
+    parser.add_argument("--precache-pdfs", action="store_true", help="passed on to build_assets.py")
+    parser.add_argument("--debounce", type=float, default=0.2, help="seconds without further saves before rebuilding")
+    parser.add_argument("--interval", type=float, default=0.1, help="seconds between polls of the watched files")
+    args = parser.parse_args(argv)
+
+    course = next((course for course in COURSES if course.id == args.course), None)
+    if course is None:
+        raise SystemExit(f"Unknown course: {args.course}")
+    state = SiteState(course, args.wire, args.precache_pdfs)
+    t0 = time.perf_counter()
+    state.rebuild(state.watched())
+    print(f"Initial build in {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+    stamps = {path: stamp(path) for path in state.watched()}
+    print(f"Watching {len(stamps)} files; Ctrl-C to stop")
+    try:
+        while True:
+            changed = settle(stamps, args.debounce, args.interval)
+            t0 = time.perf_counter()
+            names = ", ".join(sorted(path.name for path in changed))
+            data, docs = state.affected(changed)
+            targets = (["data"] if data else []) + [spec.output_name for spec in docs] + ["assets"]
+            print(f"Changed: {names} -> rebuilding {', '.join(targets)}")
+            ok = state.rebuild(changed)
+            # Verbatim inputs may have been added or removed.
+            stamps = {path: stamps.get(path, stamp(path)) for path in state.watched()}
+            newest = max((s[0] for s in map(stamp, changed) if s is not None), default=None)
+            since_save = f", {time.time_ns() / 1e6 - newest / 1e6:.0f} ms after the last save" if newest else ""
+            status = "Rebuilt" if ok else "Rebuilt with errors"
+            print(f"{status} in {(time.perf_counter() - t0) * 1000:.0f} ms{since_save}")
+    except KeyboardInterrupt:
+        print("Stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import re
+from typing import Dict, List, Optional
+
+from search_index import JS_SPACE_RE, KNOWLEDGE_FIELDS, QUESTION_FIELDS
+
+# Compact encoding of the site data shards (see decodeShard in app.js).
+#
+# Records become positional arrays; tags, sources, qtypes and chapters are
+# interned into manifest tables and referenced by index. Each question carries
+# its correct option letters. The normalized (trimmed and lowercased) text of
+# every search field goes into the search index, which is only fetched for
+# searching, so the browser derives neither; a search blob is null where
+# normalizing leaves the field text unchanged.
+
+FORMAT = "compact-1"
+KNOWLEDGE_COLUMNS = ["id", "chapter", "title", "content", "tags"]
+QUESTION_COLUMNS = ["id", "source", "qtype", "stem", "options", "answer", "explanation", "tags", "correct"]
+JS_TRIM_RE = re.compile(rf"^{JS_SPACE_RE.pattern}|{JS_SPACE_RE.pattern}$")
+
+
+def js_normalize(text: str) -> str:
+    # normalize() in app.js: String#trim, then toLowerCase.
+    return JS_TRIM_RE.sub("", text).lower()
+
+
+def parse_answer_letters(answer: str) -> List[str]:
+    letters = re.sub(r"[^A-Z]", "", answer.strip().upper())
+    return list(dict.fromkeys(letters))
+
+
+def correct_letters(q: Dict) -> List[str]:
+    # deriveCorrectLetters() in app.js.
+    options = q["options"]
+    if not options:
+        return []
+    if q["qtype"] in ("single", "multiple"):
+        direct = parse_answer_letters(q["answer"])
+        if direct:
+            return direct
+        ans = js_normalize(q["answer"])
+        matches = [i for i, opt in enumerate(options) if js_normalize(opt) == ans]
+        return [chr(65 + matches[0])] if matches else []
+    if q["qtype"] == "truefalse":
+        ans = JS_TRIM_RE.sub("", q["answer"])
+        if re.fullmatch(r"[A-Za-z]", ans):
+            return [ans.upper()]
+        matches = [i for i, opt in enumerate(options) if JS_TRIM_RE.sub("", opt) == ans]
+        return [chr(65 + matches[0])] if matches else []
+    return []
+
+
+def search_blobs(item: Dict, fields) -> List[Optional[str]]:
+    blobs: List[Optional[str]] = []
+    for _, _, text in fields:
+        raw = text(item)
+        blob = js_normalize(raw)
+        blobs.append(None if blob == raw else blob)
+    while blobs and blobs[-1] is None:
+        blobs.pop()
+    return blobs
+
+
+class Interner:
+    def __init__(self, values: Optional[List[str]] = None) -> None:
+        self.values: List[str] = []
+        self.index: Dict[str, int] = {}
+        for value in values or []:
+            self(value)
+
+    def __call__(self, value: str) -> int:
+        if value not in self.index:
+            self.index[value] = len(self.values)
+            self.values.append(value)
+        return self.index[value]
+
+
+def encode_site(files: Dict[str, Dict], manifest_name: str, knowledge_name: str, index_name: str) -> Dict[str, Dict]:
+    manifest = dict(files[manifest_name])
+    tags = Interner(manifest["tags"])
+    sources = Interner()
+    qtypes = Interner()
+    chapters = Interner()
+
+    encoded: Dict[str, Dict] = {}
+    for name, payload in files.items():
+        if name in (manifest_name, index_name):
+            continue
+        if name == knowledge_name:
+            encoded[name] = {
+                "knowledge": [
+                    [
+                        k["id"],
+                        chapters(k["chapter"]),
+                        k["title"],
+                        k["content"],
+                        [tags(t) for t in k["tags"]],
+                    ]
+                    for k in payload["knowledge"]
+                ]
+            }
+        elif "offset" in payload:
+            encoded[name] = {
+                "offset": payload["offset"],
+                "questions": [
+                    [
+                        q["id"],
+                        sources(q["source"]),
+                        qtypes(q["qtype"]),
+                        q["stem"],
+                        q["options"],
+                        q["answer"],
+                        q["explanation"],
+                        [tags(t) for t in q["tags"]],
+                        correct_letters(q),
+                    ]
+                    for q in payload["questions"]
+                ],
+            }
+
+    knowledge = files[knowledge_name]["knowledge"]
+    questions = [q for payload in files.values() if "offset" in payload for q in payload["questions"]]
+    index = dict(files[index_name])
+    index["knowledge"] = {**index["knowledge"], "search": [search_blobs(k, KNOWLEDGE_FIELDS) for k in knowledge]}
+    index["questions"] = {**index["questions"], "search": [search_blobs(q, QUESTION_FIELDS) for q in questions]}
+    encoded[index_name] = index
+
+    manifest["format"] = FORMAT
+    manifest["tables"] = {
+        "sources": sources.values,
+        "qtypes": qtypes.values,
+        "chapters": chapters.values,
+    }
+    manifest["columns"] = {"knowledge": KNOWLEDGE_COLUMNS, "questions": QUESTION_COLUMNS}
+    return {manifest_name: manifest, **encoded}